@@ -25,10 +25,12 @@ Copyright 2012 David Rio Vierra
 #  UNICODE_NAMES
 #According to NBT specification, tag names are UTF-8 encoded text. Decoding the bytes to unicode objects takes
 #time and also takes a lot of memory because unicode strings can't be interned. Since all known tag names can be
-#represented using ASCII, we can read the names as str objects ('bytes' according to Cython),
+#represented using ASCII, we can read the names as str objects ('bytes' according to Cython), and intern them,
 #saving time by skipping the decode step and saving a ton of memory by not storing duplicate strings.
 #
-#(I also tried to address this by "interning" the unicode strings into a dict myself, but this doubled the load time.)
+#(I also tried to address this by "interning" the unicode strings into a dict myself, but this doubled the load time.
+#Short string values are still interned that way by intern_string below, since they repeat much less often than names
+#and the lookup is cheaper than the decode it replaces.)
 #
 # When UNICODE_NAMES is True, follows the NBT spec exactly and decodes all tag names to 'unicode' objects
 # When UNICODE_NAMES is False, reads tag names as 'str' objects
@@ -72,7 +74,12 @@ cdef char TAG_SHORT_ARRAY = 12
 class NBTFormatError (ValueError):
     pass
 
-import nbt_util
+# nbt.py sets this to nbt_util.nested_string. Importing nbt_util from here would import nbt.py a second time.
+nested_string = None
+
+# See nbt.TAG_Value.renames
+cdef unsigned long renames = 0
+
 cdef class TAG_Value:
     IF UNICODE_NAMES:
         cdef unicode _name
@@ -84,24 +91,34 @@ cdef class TAG_Value:
         return "<%s name=\"%s\" value=%r>" % (self.__class__.__name__, self.name, self.value)
 
     def __str__(self):
-        return nbt_util.nested_string(self)
+        return nested_string(self)
 
     property name:
         def __get__(self):
             return self._name
 
         def __set__(self, val):
+            global renames
             IF UNICODE_NAMES:
                 if isinstance(val, str):
                     val = PyUnicode_DecodeUTF8(val, len(val), "strict")
             ELSE:
                 if isinstance(val, unicode):
                     val = str(val)
+            if self._name and val != self._name:
+                renames += 1
             self._name = val
 
     def __reduce__(self):
         return self.__class__, (self.value, self._name)
 
+    def copy(self):
+        """See nbt.TAG_Value.copy"""
+        return self.__class__(self.value, self._name)
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
 
 cdef class TAG_Byte(TAG_Value):
     cdef public char value
@@ -176,7 +193,7 @@ cdef class TAG_Double(TAG_Value):
 
 
 cdef class TAG_Byte_Array(TAG_Value):
-    cdef public object value
+    cdef object _value
     dtype = numpy.dtype('u1')
 
     def __init__(self, value=None, name=""):
@@ -187,15 +204,33 @@ cdef class TAG_Byte_Array(TAG_Value):
         self.name = name
         self.tagID = TAG_BYTE_ARRAY
 
+    property value:
+        def __get__(self):
+            # Arrays loaded with views=True are read-only until they are first asked for here.
+            if not self._value.flags.writeable:
+                self._value = self._value.copy()
+            return self._value
+
+        def __set__(self, value):
+            self._value = value
+
+    property view:
+        """The value without copying it. It may be read-only."""
+        def __get__(self):
+            return self._value
+
+    def copy(self):
+        return self.__class__(self._value.copy(), self._name)
+
     cdef save_value(self, buf):
-        save_array(self.value, buf, 1)
+        save_array(self._value, buf, 1)
 
     def __repr__(self):
-        return "<%s name=%s length=%d>" % (self.__class__.__name__, self.name, len(self.value))
+        return "<%s name=%s length=%d>" % (self.__class__.__name__, self.name, len(self._value))
 
 
 cdef class TAG_Int_Array(TAG_Value):
-    cdef public object value
+    cdef object _value
     dtype = numpy.dtype('>u4')
 
     def __init__(self, value=None, name=""):
@@ -206,12 +241,30 @@ cdef class TAG_Int_Array(TAG_Value):
         self.name = name
         self.tagID = TAG_INT_ARRAY
 
+    property value:
+        def __get__(self):
+            # Arrays loaded with views=True are read-only until they are first asked for here.
+            if not self._value.flags.writeable:
+                self._value = self._value.copy()
+            return self._value
+
+        def __set__(self, value):
+            self._value = value
+
+    property view:
+        """The value without copying it. It may be read-only."""
+        def __get__(self):
+            return self._value
+
+    def copy(self):
+        return self.__class__(self._value.copy(), self._name)
+
     cdef save_value(self, buf):
-        save_array(self.value, buf, 4)
+        save_array(self._value, buf, 4)
 
 
 cdef class TAG_Short_Array(TAG_Value):
-    cdef public object value
+    cdef object _value
     dtype = numpy.dtype('>u2')
 
     def __init__(self, value=None, name=""):
@@ -222,8 +275,26 @@ cdef class TAG_Short_Array(TAG_Value):
         self.name = name
         self.tagID = TAG_SHORT_ARRAY
 
+    property value:
+        def __get__(self):
+            # Arrays loaded with views=True are read-only until they are first asked for here.
+            if not self._value.flags.writeable:
+                self._value = self._value.copy()
+            return self._value
+
+        def __set__(self, value):
+            self._value = value
+
+    property view:
+        """The value without copying it. It may be read-only."""
+        def __get__(self):
+            return self._value
+
+    def copy(self):
+        return self.__class__(self._value.copy(), self._name)
+
     cdef save_value(self, buf):
-        save_array(self.value, buf, 2)
+        save_array(self._value, buf, 2)
 
 
 cdef class TAG_String(TAG_Value):
@@ -248,8 +319,9 @@ cdef class TAG_String(TAG_Value):
 
 
 cdef class _TAG_List(TAG_Value):
-    cdef public list value
+    cdef list _value
     cdef public char list_type
+    cdef object _raw
 
     def __init__(self, value=None, name="", list_type=TAG_BYTE):
         self.value = []
@@ -262,6 +334,33 @@ cdef class _TAG_List(TAG_Value):
                 self.check_tag(tag)
             self.value = list(value)
 
+    property value:
+        def __get__(self):
+            self.materialize()
+            return self._value
+
+        def __set__(self, value):
+            self._raw = None
+            self._value = value
+
+    def copy(self):
+        cdef _TAG_List tag = self.__class__(name=self._name, list_type=self.list_type)
+        if self._raw is not None:
+            tag._raw = self._raw
+        else:
+            tag._value = [t.copy() for t in self._value]
+        return tag
+
+    cdef materialize(self):
+        # Lists loaded lazily keep the location of their items in the loaded data until they are first used.
+        if self._raw is None:
+            return
+
+        cdef load_ctx ctx = raw_ctx(self._raw)
+        self._raw = None
+        self._value = []
+        load_items(ctx, self)
+
 
     def __repr__(self):
         return "<%s name='%s' list_type=%r length=%d>" % (self.__class__.__name__, self.name,
@@ -302,14 +401,18 @@ cdef class _TAG_List(TAG_Value):
         del self.value[key]
 
     cdef save_value(self, buf):
+        if self._raw is not None:
+            save_raw(self._raw, buf)
+            return
+
         cdef char list_type = self.list_type
         cdef TAG_Value tag
 
         save_tag_id(list_type, buf)
-        save_int(<int>len(self.value), buf)
+        save_int(<int>len(self._value), buf)
 
         cdef TAG_Value subtag
-        for subtag in self.value:
+        for subtag in self._value:
             if subtag.tagID != list_type:
                 raise ValueError("Asked to save TAG_List with different types! Found %s and %s" % (subtag.tagID,
                                                                                                    list_type))
@@ -321,44 +424,102 @@ class TAG_List(_TAG_List, collections.MutableSequence):
 
 
 cdef class _TAG_Compound(TAG_Value):
-    cdef public object value
+    cdef list _value
+    cdef dict _index
+    cdef unsigned long _indexedRenames
+    cdef object _raw
 
     def __init__(self, value=None, name=""):
         self.value = value or []
         self.name = name
         self.tagID = TAG_COMPOUND
 
+    property value:
+        def __get__(self):
+            self.materialize()
+            return self._value
+
+        def __set__(self, value):
+            self._raw = None
+            self._value = list(value)
+            self.reindex()
+
+    cdef reindex(self):
+        # Tags are looked up through an index of the first tag with each name, as in nbt.py
+        cdef TAG_Value tag
+        self._index = {}
+        self._indexedRenames = renames
+        for tag in self._value:
+            self._index.setdefault(tag._name, tag)
+
+    def copy(self):
+        cdef _TAG_Compound tag = self.__class__(name=self._name)
+        if self._raw is not None:
+            tag._raw = self._raw
+        else:
+            tag._value = [t.copy() for t in self._value]
+            tag.reindex()
+        return tag
+
+    cdef materialize(self):
+        # Compounds loaded lazily keep the location of their children in the loaded data until they are first used.
+        if self._raw is None:
+            return
+
+        cdef load_ctx ctx = raw_ctx(self._raw)
+        self._raw = None
+        self._value = []
+        self._index = {}
+        load_children(ctx, self)
+
     #
     # --- collection methods ---
     #
 
+    cdef TAG_Value lookup(self, key):
+        self.materialize()
+        cdef TAG_Value tag = self._index.get(key)
+        if tag is None:
+            if self._indexedRenames == renames:
+                return None
+        elif tag._name == key:
+            return tag
+
+        # a tag was renamed since it was indexed
+        self.reindex()
+        return self._index.get(key)
+
     def __getitem__(self, key):
-        cdef TAG_Value tag
-        for tag in self.value:
-            if tag._name == key:
-                return tag
-        raise KeyError("Key %s not found." % key)
+        cdef TAG_Value tag = self.lookup(key)
+        if tag is None:
+            raise KeyError("Key %s not found." % key)
+        return tag
 
     def __setitem__(self, key, tag):
+        self.materialize()
         tag.name = key
-        cdef TAG_Value v
-        self.value = [v for v in self.value if v._name != key]
-        self.value.append(tag)
+        cdef TAG_Value v = tag
+        if not self.ALLOW_DUPLICATE_KEYS:
+            if self.lookup(key) is not None:
+                self._value = [t for t in self._value if t.name != key]
+            self._index[v._name] = v
+        else:
+            self._index.setdefault(v._name, v)
+        self._value.append(v)
 
     def __delitem__(self, key):
-        oldlen = len(self.value)
-        cdef TAG_Value v
-        self.value = [v for v in self.value if v._name != key]
-        if oldlen == len(self.value):
-            raise KeyError("Key %s not found" % key)
+        tag = self[key]
+        self._value.__delitem__(self._value.index(tag))
+        self.reindex()
 
     def __iter__(self):
+        self.materialize()
         cdef TAG_Value v
-        for v in self.value:
+        for v in self._value:
             yield v._name
 
     def __contains__(self, k):
-        return any(tag.name == k for tag in self.value)
+        return self.lookup(k) is not None
 
     def __len__(self):
         return len(self.value)
@@ -376,29 +537,33 @@ cdef class _TAG_Compound(TAG_Value):
         return [v for v in self.value if v.name == key]
 
     cdef save_value(self, buf):
+        if self._raw is not None:
+            save_raw(self._raw, buf)
+            return
+
         cdef TAG_Value subtag
-        for subtag in self.value:
+        for subtag in self._value:
             save_tag_id(subtag.tagID, buf)
             save_tag_name(subtag, buf)
             save_tag_value(subtag, buf)
         save_tag_id(TAG_END, buf)
 
-    def save(self, filename_or_buf=None, compressed=True):
+    def save(self, filename_or_buf=None, compressed=True, compressor=None):
         """
         Pass a filename to save the data to a file. Pass a file-like object (with a read() method)
         to write the data to that object. Pass nothing to return the data as a string.
+
+        Pass a zlib compressobj as compressor to compress the data with it instead of gzip.
         """
         io = StringIO()
         save_tag_id(self.tagID, io)
         save_tag_name(self, io)
         save_tag_value(self, io)
         data = io.getvalue()
-        if compressed:
-            gzio = StringIO()
-            gz = gzip.GzipFile(fileobj=gzio, mode='wb')
-            gz.write(data)
-            gz.close()
-            data = gzio.getvalue()
+        if compressed and compressor is None:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip format
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.flush()
 
         if filename_or_buf is None:
             return data
@@ -411,7 +576,7 @@ cdef class _TAG_Compound(TAG_Value):
 
 
 class TAG_Compound(_TAG_Compound, collections.MutableMapping):
-    pass
+    ALLOW_DUPLICATE_KEYS = False
 #    def __init__(self, value = None, name=""):
 #        _TAG_Compound.__init__(self, value, name)
 
@@ -440,20 +605,26 @@ def try_gunzip(data):
     return data
 
 
-def load(filename="", buf=None):
+def load(filename="", buf=None, lazy=False, views=False):
+    """
+    Unserialize data from an NBT file and return the root TAG_Compound object. See nbt.load.
+    """
     if filename:
         buf = file(filename, "rb")
 
     if hasattr(buf, "read"):
         buf = buf.read()
 
-    return load_buffer(try_gunzip(buf))
+    return load_buffer(try_gunzip(buf), lazy, views)
 
 
 cdef class load_ctx:
     cdef size_t offset
     cdef char * buffer
     cdef size_t size
+    cdef object source
+    cdef bint views
+    cdef bint lazy
 
 
 cdef char * require(load_ctx self, size_t s) except NULL:
@@ -465,9 +636,11 @@ cdef char * require(load_ctx self, size_t s) except NULL:
     return ret
 
 
-cdef load_buffer(bytes buf):
+cdef load_ctx root_ctx(bytes buf):
+    # The caller must keep buf alive while using the returned context.
     cdef load_ctx ctx = load_ctx()
     ctx.offset = 1
+    ctx.source = buf
     ctx.buffer = buf
     ctx.size = len(buf)
     if len(buf) < 1:
@@ -478,6 +651,33 @@ cdef load_buffer(bytes buf):
     if ctx.buffer[0] != TAG_COMPOUND:
         raise NBTFormatError('Not an NBT file with a root TAG_Compound '
                              '(file starts with "%4s" (0x%08x)' % (ctx.buffer, magic_no[0]))
+    return ctx
+
+
+cdef load_ctx raw_ctx(tuple raw):
+    # raw is (data, start, end, views) for a lazily loaded compound or list
+    cdef bytes source = raw[0]
+    cdef load_ctx ctx = load_ctx()
+    ctx.source = source
+    ctx.buffer = source
+    ctx.offset = raw[1]
+    ctx.size = raw[2]
+    ctx.views = raw[3]
+    ctx.lazy = True
+    return ctx
+
+
+cdef save_raw(tuple raw, object buf):
+    cdef bytes source = raw[0]
+    cdef size_t start = raw[1]
+    cdef size_t end = raw[2]
+    cwrite(buf, (<char *> source) + start, end - start)
+
+
+cdef load_buffer(bytes buf, bint lazy=False, bint views=False):
+    cdef load_ctx ctx = root_ctx(buf)
+    ctx.views = views
+    ctx.lazy = lazy
     name = load_name(ctx)
     tag = load_compound(ctx)
     tag.name = name
@@ -542,22 +742,49 @@ cdef load_array(load_ctx ctx, object TagClass):
     swab(&length, 4)
 
     byte_length = length * TagClass.dtype.itemsize
+    cdef size_t start = ctx.offset
     cdef char *arr = require(ctx, byte_length)
+    if ctx.views:
+        return TagClass(frombuffer(ctx.source, dtype=TagClass.dtype, count=length, offset=start))
     return TagClass(fromstring(arr[:byte_length], dtype=TagClass.dtype, count=length))
 
 
 cdef load_compound(load_ctx ctx):
-    cdef char tagID
     cdef _TAG_Compound root_tag = TAG_Compound()
+    load_children(ctx, root_tag)
+    return root_tag
+
 
+cdef load_children(load_ctx ctx, _TAG_Compound root_tag):
+    cdef char tagID
+    cdef TAG_Value tag
+
+    root_tag._indexedRenames = renames
     while True:
         tagID = require(ctx, 1)[0]
         if tagID == TAG_END:
             break
         else:
-            root_tag.value.append(load_named(ctx, tagID))
+            tag = load_named(ctx, tagID)
+            root_tag._value.append(tag)
+            root_tag._index.setdefault(tag._name, tag)
 
-    return root_tag
+
+cdef load_lazy(load_ctx ctx, char tagID):
+    cdef size_t start = ctx.offset
+    skip_tag(tagID, ctx)
+
+    cdef _TAG_List list_tag
+    cdef _TAG_Compound compound_tag
+    raw = (ctx.source, start, ctx.offset, ctx.views)
+    if tagID == TAG_LIST:
+        list_tag = TAG_List(list_type=ctx.buffer[start])
+        list_tag._raw = raw
+        return list_tag
+    else:
+        compound_tag = TAG_Compound()
+        compound_tag._raw = raw
+        return compound_tag
 
 
 cdef load_named(load_ctx ctx, char tagID):
@@ -568,19 +795,41 @@ cdef load_named(load_ctx ctx, char tagID):
 
 
 cdef load_list(load_ctx ctx):
+    cdef _TAG_List tag = TAG_List()
+    load_items(ctx, tag)
+    return tag
 
+
+cdef load_items(load_ctx ctx, _TAG_List tag):
     cdef char list_type = require(ctx, 1)[0]
     cdef int * ptr = <int *> require(ctx, 4)
     cdef int length = ptr[0]
     swab(&length, 4)
 
-    cdef _TAG_List tag = TAG_List(list_type=list_type)
-    cdef list val = tag.value
+    tag.list_type = list_type
+    cdef list val = tag._value
     cdef int i
     for i in range(length):
         PyList_Append(val, load_tag(list_type, ctx))
 
-    return tag
+
+# See nbt.intern_string
+DEF INTERN_MAX_LENGTH = 64
+DEF INTERN_MAX_COUNT = 65536
+cdef dict _interned = {}
+
+cdef unicode intern_string(char * encoded, unsigned short length):
+    if length > INTERN_MAX_LENGTH:
+        return PyUnicode_DecodeUTF8(encoded, length, "strict")
+
+    key = encoded[:length]
+    decoded = _interned.get(key)
+    if decoded is None:
+        decoded = PyUnicode_DecodeUTF8(encoded, length, "strict")
+        if len(_interned) >= INTERN_MAX_COUNT:
+            _interned.clear()
+        _interned[key] = decoded
+    return decoded
 
 
 cdef unicode load_string(load_ctx ctx):
@@ -589,8 +838,7 @@ cdef unicode load_string(load_ctx ctx):
     cdef unsigned short length = ptr[0]
     swab(&length, 2)
 
-    u = PyUnicode_DecodeUTF8(require(ctx, length), length, "strict")
-    return u
+    return intern_string(require(ctx, length), length)
 
 IF UNICODE_NAMES:
     cdef unicode load_name(load_ctx ctx):
@@ -598,13 +846,13 @@ IF UNICODE_NAMES:
 ELSE:
     cdef bytes load_name(load_ctx ctx):
         """
-        Like load_string, but returns a str instead so python can intern it, saving memory.
+        Like load_string, but returns an interned str, so that all tags with the same name share one object.
         """
         cdef unsigned short *ptr = <unsigned short *> require(ctx, 2)
         cdef unsigned short length = ptr[0]
         swab(&length, 2)
 
-        return require(ctx, length)[:length]
+        return intern(require(ctx, length)[:length])
 
 cdef load_tag(char tagID, load_ctx ctx):
     if tagID == TAG_BYTE:
@@ -633,9 +881,13 @@ cdef load_tag(char tagID, load_ctx ctx):
         return TAG_String(u)
 
     if tagID == TAG_LIST:
+        if ctx.lazy:
+            return load_lazy(ctx, tagID)
         return load_list(ctx)
 
     if tagID == TAG_COMPOUND:
+        if ctx.lazy:
+            return load_lazy(ctx, tagID)
         return load_compound(ctx)
 
     if tagID == TAG_INT_ARRAY:
@@ -645,6 +897,164 @@ cdef load_tag(char tagID, load_ctx ctx):
         return load_array(ctx, TAG_Short_Array)
 
 
+cdef int skip_tag(char tagID, load_ctx ctx) except -1:
+    cdef int * ptr
+    cdef unsigned short * sptr
+    cdef int length
+    cdef unsigned short name_length
+    cdef char itemID
+    cdef int i
+
+    if tagID == TAG_BYTE:
+        require(ctx, 1)
+    elif tagID == TAG_SHORT:
+        require(ctx, 2)
+    elif tagID == TAG_INT or tagID == TAG_FLOAT:
+        require(ctx, 4)
+    elif tagID == TAG_LONG or tagID == TAG_DOUBLE:
+        require(ctx, 8)
+    elif tagID == TAG_BYTE_ARRAY or tagID == TAG_INT_ARRAY or tagID == TAG_SHORT_ARRAY:
+        ptr = <int *> require(ctx, 4)
+        length = ptr[0]
+        swab(&length, 4)
+        if tagID == TAG_INT_ARRAY:
+            length *= 4
+        elif tagID == TAG_SHORT_ARRAY:
+            length *= 2
+        require(ctx, length)
+    elif tagID == TAG_STRING:
+        sptr = <unsigned short *> require(ctx, 2)
+        name_length = sptr[0]
+        swab(&name_length, 2)
+        require(ctx, name_length)
+    elif tagID == TAG_LIST:
+        itemID = require(ctx, 1)[0]
+        ptr = <int *> require(ctx, 4)
+        length = ptr[0]
+        swab(&length, 4)
+        for i in range(length):
+            skip_tag(itemID, ctx)
+    elif tagID == TAG_COMPOUND:
+        while True:
+            itemID = require(ctx, 1)[0]
+            if itemID == TAG_END:
+                break
+            sptr = <unsigned short *> require(ctx, 2)
+            name_length = sptr[0]
+            swab(&name_length, 2)
+            require(ctx, name_length)
+            skip_tag(itemID, ctx)
+    else:
+        raise NBTFormatError("Unknown tag type %d" % tagID)
+
+    return 0
+
+
+def extract(buf, paths):
+    """
+    Reads only the tags at the given paths from NBT data, skipping over everything else without decoding it.
+    See nbt.extract.
+    """
+    if hasattr(buf, "read"):
+        buf = buf.read()
+
+    buf = try_gunzip(buf)
+    cdef load_ctx ctx = root_ctx(buf)
+    load_name(ctx)
+
+    cdef dict tree = {}
+    cdef dict results = {}
+    for path in paths:
+        node = tree
+        for part in path.split("/"):
+            node = node.setdefault(part, {})
+        node.setdefault(None, []).append(path)  # the key None holds the paths ending at this node
+        results[path] = []
+
+    extract_compound(ctx, tree, results)
+    return results
+
+
+def _merge_nodes(a, b):
+    node = dict(a)
+    for key, child in b.iteritems():
+        if key is None:
+            node[None] = a.get(None, []) + child
+        elif key in node:
+            node[key] = _merge_nodes(node[key], child)
+        else:
+            node[key] = child
+    return node
+
+
+cdef _child_node(dict node, key):
+    child = node.get(key)
+    wildcard = node.get("*")
+    if child is None:
+        return wildcard
+    if wildcard is None:
+        return child
+    return _merge_nodes(child, wildcard)
+
+
+cdef extract_value(load_ctx ctx, char tagID, dict node, dict results):
+    cdef size_t start, end
+    paths = node.get(None)
+    if paths is not None:
+        start = ctx.offset
+        tag = load_tag(tagID, ctx)
+        for path in paths:
+            results[path].append(tag)
+        if len(node) == 1:
+            return
+
+        # paths below this one were also asked for
+        end = ctx.offset
+        ctx.offset = start
+        extract_value(ctx, tagID, dict((k, v) for k, v in node.iteritems() if k is not None), results)
+        ctx.offset = end
+
+    elif tagID == TAG_COMPOUND:
+        extract_compound(ctx, node, results)
+    elif tagID == TAG_LIST:
+        extract_list(ctx, node, results)
+    else:
+        skip_tag(tagID, ctx)
+
+
+cdef extract_compound(load_ctx ctx, dict node, dict results):
+    cdef char tagID
+    while True:
+        tagID = require(ctx, 1)[0]
+        if tagID == TAG_END:
+            return
+
+        child = _child_node(node, load_name(ctx))
+        if child is None:
+            skip_tag(tagID, ctx)
+        else:
+            extract_value(ctx, tagID, child, results)
+
+
+cdef extract_list(load_ctx ctx, dict node, dict results):
+    if "*" not in node and not any(key.isdigit() for key in node if key is not None):
+        skip_tag(TAG_LIST, ctx)
+        return
+
+    cdef char list_type = require(ctx, 1)[0]
+    cdef int * ptr = <int *> require(ctx, 4)
+    cdef int length = ptr[0]
+    swab(&length, 4)
+
+    cdef int i
+    for i in range(length):
+        child = _child_node(node, str(i))
+        if child is None:
+            skip_tag(list_type, ctx)
+        else:
+            extract_value(ctx, list_type, child, results)
+
+
 def hexdump(src, length=8):
     FILTER=''.join([(len(repr(chr(x)))==3) and chr(x) or '.' for x in range(256)])
     N=0
@@ -3,29 +3,30 @@ import logging
 log = logging.getLogger(__name__)
 
 import numpy
+import blockrotation
 from box import BoundingBox, Vector
 from mclevelbase import exhaust
 import materials
 from entity import Entity, TileEntity
 
 
-def convertBlocks(destLevel, sourceLevel, blocks, blockData):
-    return materials.convertBlocks(destLevel.materials, sourceLevel.materials, blocks, blockData)
+def copyTable(destLevel, sourceLevel, blocksToCopy=None):
+    """ Returns a flat table indexed by (ID << 4 | data) in sourceLevel, giving the (ID << 4 | data) to write
+    in destLevel, or -1 where the block is not to be copied. Returns None if the copy leaves every block unchanged.
+    """
+    table = materials.conversionTable(destLevel.materials, sourceLevel.materials)
+    if blocksToCopy is None:
+        return table
 
-def sourceMaskFunc(blocksToCopy):
-    if blocksToCopy is not None:
-        typemask = numpy.zeros(materials.id_limit, dtype='bool')
-        typemask[blocksToCopy] = 1
+    if table is None:
+        table = numpy.arange(materials.id_limit << 4, dtype='int32')
+    else:
+        table = table.astype('int32')
 
-        def maskedSourceMask(sourceBlocks):
-            return typemask[sourceBlocks]
-
-        return maskedSourceMask
-
-    def unmaskedSourceMask(_sourceBlocks):
-        return slice(None, None)
-
-    return unmaskedSourceMask
+    typemask = numpy.zeros(materials.id_limit, dtype='bool')
+    typemask[blocksToCopy] = 1
+    table[~typemask.repeat(16)] = -1
+    return table
 
 
 def adjustCopyParameters(destLevel, sourceLevel, sourceBox, destinationPoint):
@@ -46,11 +47,39 @@ def adjustCopyParameters(destLevel, sourceLevel, sourceBox, destinationPoint):
     return actualSourceBox, actualDestPoint
 
 
+def copiesWholeChunks(destLevel, sourceLevel, sourceBox, destinationPoint, blocksToCopy=None, entities=True):
+    """ Returns True if the copy covers whole chunk columns in both levels and can be done by copying chunks
+    directly with copyChunkWithOffset, without converting blocks or decoding the chunks' sections. """
+    from infiniteworld import MCInfdevOldLevel
+
+    if not (isinstance(destLevel, MCInfdevOldLevel) and isinstance(sourceLevel, MCInfdevOldLevel)):
+        return False
+    if blocksToCopy is not None or not entities or destLevel.materials is not sourceLevel.materials:
+        return False
+    if destLevel.Height != sourceLevel.Height:
+        return False
+
+    destBox = BoundingBox(destinationPoint, sourceBox.size)
+    for box in (sourceBox, destBox):
+        if box.miny != 0 or box.height != destLevel.Height:
+            return False
+        if not box.isChunkAligned or box.width & 0xf or box.length & 0xf:
+            return False
+
+    if sourceLevel is destLevel and sourceBox.intersect(destBox).volume:
+        return False
+
+    return True
+
+
 
 def copyBlocksFromIter(destLevel, sourceLevel, sourceBox, destinationPoint, blocksToCopy=None, entities=True, create=False, biomes=False):
     """ copy blocks between two infinite levels by looping through the
     destination's chunks. make a sub-box of the source level for each chunk
-    and copy block and entities in the sub box to the dest chunk."""
+    and copy block and entities in the sub box to the dest chunk.
+
+    Chunks created by an unshifted whole-chunk copy between two worlds are only copied without recompressing
+    them when biomes is True, since the copied chunk would otherwise have to drop its biomes."""
 
     (lx, ly, lz) = sourceBox.size
 
@@ -65,9 +94,18 @@ def copyBlocksFromIter(destLevel, sourceLevel, sourceBox, destinationPoint, bloc
     e = 0
     t = 0
 
-    sourceMask = sourceMaskFunc(blocksToCopy)
+    table = copyTable(destLevel, sourceLevel, blocksToCopy)
+
+    # A rotated schematic is copied from its reoriented arrays, rotating the block data in the same lookup that
+    # converts it, instead of first copying the arrays to rotate the data.
+    sourceRotation = None
+    if getattr(sourceLevel, "_arraysReoriented", False) and sourceLevel is not destLevel:
+        sourceRotation = sourceLevel.orientedArrays()[2]
+        if sourceRotation is not None:
+            table = blockrotation.RotationConversionTable(sourceRotation, table)
 
     copyOffset = [d - s for s, d in zip(sourceBox.origin, destinationPoint)]
+    wholeChunks = copiesWholeChunks(destLevel, sourceLevel, sourceBox, destinationPoint, blocksToCopy, entities)
 
     # Visit each chunk in the destination area.
     #   Get the region of the source area corresponding to that chunk
@@ -79,6 +117,18 @@ def copyBlocksFromIter(destLevel, sourceLevel, sourceBox, destinationPoint, bloc
     for destCpos in destBox.chunkPositions:
         cx, cz = destCpos
 
+        if wholeChunks:
+            # Copy the whole chunk unless the destination chunk is in use, then fall back to the block copy.
+            scx, scz = cx - (copyOffset[0] >> 4), cz - (copyOffset[2] >> 4)
+            if not sourceLevel.containsChunk(scx, scz):
+                continue
+            if not (create or destLevel.containsChunk(cx, cz)):
+                continue
+            if destLevel.copyChunkWithOffset(sourceLevel, scx, scz, cx, cz, biomes):
+                i += 1
+                yield (i, chunkCount)
+                continue
+
         destChunkBox = BoundingBox((cx << 4, 0, cz << 4), (16, destLevel.Height, 16)).intersect(destBox)
         destChunkBoxInSourceLevel = BoundingBox([d - o for o, d in zip(copyOffset, destChunkBox.origin)], destChunkBox.size)
 
@@ -90,7 +140,8 @@ def copyBlocksFromIter(destLevel, sourceLevel, sourceBox, destinationPoint, bloc
                 continue
 
         destChunk = destLevel.getChunk(*destCpos)
-
+        copiedEntities = []
+        copiedTileEntities = []
 
         i += 1
         yield (i, chunkCount)
@@ -111,32 +162,43 @@ def copyBlocksFromIter(destLevel, sourceLevel, sourceBox, destinationPoint, bloc
 
             _, destSlices = destChunk.getChunkSlicesForBox(sourceChunkBoxInDestLevel)
 
-            sourceBlocks = sourceChunk.Blocks[sourceSlices]
-            sourceData = sourceChunk.Data[sourceSlices]
+            if sourceRotation is not None:
+                sourceBlocks, sourceData, _ = sourceChunk.orientedArrays(sourceSlices)
+            else:
+                sourceBlocks = sourceChunk.Blocks[sourceSlices]
+                sourceData = sourceChunk.Data[sourceSlices]
 
-            mask = sourceMask(sourceBlocks)
-            convertedSourceBlocks, convertedSourceData = convertBlocks(destLevel, sourceLevel, sourceBlocks, sourceData)
+            if table is None:
+                destChunk.Blocks[destSlices] = sourceBlocks
+                destChunk.Data[destSlices] = sourceData
+            else:
+                # Convert and mask the blocks with a single lookup of (ID << 4 | data)
+                blocks = sourceBlocks.astype(table.dtype)
+                blocks <<= 4
+                blocks |= sourceData
+                table.take(blocks, out=blocks, mode='clip')
+                mask = blocks >= 0 if blocksToCopy is not None else True
 
-            destChunk.Blocks[destSlices][mask] = convertedSourceBlocks[mask]
-            if convertedSourceData is not None:
-                destChunk.Data[destSlices][mask] = convertedSourceData[mask]
+                numpy.copyto(destChunk.Data[destSlices], blocks & 0xf, casting='unsafe', where=mask)
+                blocks >>= 4
+                numpy.copyto(destChunk.Blocks[destSlices], blocks, casting='unsafe', where=mask)
 
             if entities:
-                ents = sourceChunk.getEntitiesInBox(destChunkBoxInSourceLevel)
-                e += len(ents)
-                for entityTag in ents:
-                    eTag = Entity.copyWithOffset(entityTag, copyOffset)
-                    destLevel.addEntity(eTag)
-
-            tileEntities = sourceChunk.getTileEntitiesInBox(destChunkBoxInSourceLevel)
-            t += len(tileEntities)
-            for tileEntityTag in tileEntities:
-                eTag = TileEntity.copyWithOffset(tileEntityTag, copyOffset)
-                destLevel.addTileEntity(eTag)
+                copiedEntities.extend(Entity.copyWithOffset(entityTag, copyOffset)
+                                      for entityTag in sourceChunk.getEntitiesInBox(destChunkBoxInSourceLevel))
+
+            copiedTileEntities.extend(TileEntity.copyWithOffset(tileEntityTag, copyOffset)
+                                      for tileEntityTag in sourceChunk.getTileEntitiesInBox(destChunkBoxInSourceLevel))
 
             if biomes and hasattr(destChunk, 'Biomes') and hasattr(sourceChunk, 'Biomes'):
                 destChunk.Biomes[destSlices[:2]] = sourceChunk.Biomes[sourceSlices[:2]]
 
+        # Adding the copies together lets the level look up each destination chunk once
+        e += len(copiedEntities)
+        t += len(copiedTileEntities)
+        destLevel.addEntities(copiedEntities)
+        destLevel.addTileEntities(copiedTileEntities)
+
         destChunk.chunkChanged()
 
     log.info("Duration: {0}".format(datetime.now() - startTime))
@@ -7,7 +7,7 @@ import numpy
 
 from mclevelbase import exhaust
 import blockrotation
-from entity import TileEntity
+from box import BoundingBox
 
 def blockReplaceTable(blocksToReplace):
     blocktable = numpy.zeros((materials.id_limit, 16), dtype='bool')
@@ -19,6 +19,67 @@ def blockReplaceTable(blocksToReplace):
 
     return blocktable
 
+def replaceParameters(level, blockInfo, blocksToReplace):
+    """ Returns (blocktable, shouldRetainData, changesLighting) for replacing blocksToReplace with blockInfo.
+    blocktable is None if blocksToReplace is empty. """
+    # shouldRetainData = (not blockInfo.hasVariants and not any([b.hasVariants for b in blocksToReplace]))
+    # if shouldRetainData:
+    #    log.info( "Preserving data bytes" )
+    if not len(blocksToReplace):
+        return None, False, True  # xxx old behavior overwrote blockdata with 0 when e.g. replacing water with lava
+
+    blocktable = blockReplaceTable(blocksToReplace)
+    shouldRetainData = all([blockrotation.SameRotationType(blockInfo, b) for b in blocksToReplace])
+
+    newAbsorption = level.materials.lightAbsorption[blockInfo.ID]
+    oldAbsorptions = [level.materials.lightAbsorption[b.ID] for b in blocksToReplace]
+    changesLighting = False
+    for a in oldAbsorptions:
+        if a != newAbsorption:
+            changesLighting = True
+
+    newEmission = level.materials.lightEmission[blockInfo.ID]
+    oldEmissions = [level.materials.lightEmission[b.ID] for b in blocksToReplace]
+    for a in oldEmissions:
+        if a != newEmission:
+            changesLighting = True
+
+    return blocktable, shouldRetainData, changesLighting
+
+def replaceChunkBlocks(chunk, slices, origin, blocktable, idsToReplace, blockID, blockData, shouldRetainData,
+                       changesLighting):
+    """ Replaces the blocks selected by blocktable in chunk.Blocks[slices], whose first block is at origin, and
+    removes the tile entities of the replaced blocks. idsToReplace is blocktable.any(axis=1). Returns the number of
+    blocks replaced. If it is zero, the chunk was not changed. """
+    if chunk.keepsBlockCounts and not chunk.blockCounts()[idsToReplace].any():
+        # the chunk has none of the blocks to replace, so leave it untouched. Chunks that would count their blocks
+        # again only for this are checked by the replace mask below.
+        return 0
+
+    blocks = chunk.Blocks[slices]
+    data = chunk.Data[slices]
+    mask = blocktable[blocks, data]
+
+    # don't waste time relighting and copying if the mask is empty
+    blockCount = mask.sum()
+    if not blockCount:
+        return 0
+
+    blocks[mask] = blockID
+    if not shouldRetainData:
+        data[mask] = blockData
+
+    sizeX, sizeZ, sizeY = mask.shape
+    chunk.removeTileEntitiesInMask(BoundingBox(origin, (sizeX, sizeY, sizeZ)), mask)
+
+    if changesLighting:
+        chunk.chunkChanged(True)
+    else:
+        # light absorption is unchanged, so the height map is still good
+        chunk.dirty = True
+
+    return blockCount
+
 def fillBlocks(level, box, blockInfo, blocksToReplace=()):
     return exhaust(level.fillBlocksIter(box, blockInfo, blocksToReplace))
 
@@ -29,31 +90,11 @@ def fillBlocksIter(level, box, blockInfo, blocksToReplace=()):
     else:
         chunkIterator = level.getChunkSlices(box)
 
-    # shouldRetainData = (not blockInfo.hasVariants and not any([b.hasVariants for b in blocksToReplace]))
-    # if shouldRetainData:
-    #    log.info( "Preserving data bytes" )
-    shouldRetainData = False  # xxx old behavior overwrote blockdata with 0 when e.g. replacing water with lava
-
     log.info("Replacing {0} with {1}".format(blocksToReplace, blockInfo))
 
-    changesLighting = True
-    blocktable = None
-    if len(blocksToReplace):
-        blocktable = blockReplaceTable(blocksToReplace)
-        shouldRetainData = all([blockrotation.SameRotationType(blockInfo, b) for b in blocksToReplace])
-
-        newAbsorption = level.materials.lightAbsorption[blockInfo.ID]
-        oldAbsorptions = [level.materials.lightAbsorption[b.ID] for b in blocksToReplace]
-        changesLighting = False
-        for a in oldAbsorptions:
-            if a != newAbsorption:
-                changesLighting = True
-
-        newEmission = level.materials.lightEmission[blockInfo.ID]
-        oldEmissions = [level.materials.lightEmission[b.ID] for b in blocksToReplace]
-        for a in oldEmissions:
-            if a != newEmission:
-                changesLighting = True
+    blocktable, shouldRetainData, changesLighting = replaceParameters(level, blockInfo, blocksToReplace)
+    if blocktable is not None:
+        idsToReplace = blocktable.any(axis=1)
 
     i = 0
     skipped = 0
@@ -65,41 +106,22 @@ def fillBlocksIter(level, box, blockInfo, blocksToReplace=()):
             log.info(u"Chunk {0}...".format(i))
         yield i, box.chunkCount
 
-        blocks = chunk.Blocks[slices]
-        data = chunk.Data[slices]
-        mask = slice(None)
-
-        needsLighting = changesLighting
-
         if blocktable is not None:
-            mask = blocktable[blocks, data]
-
-            blockCount = mask.sum()
+            blockCount = replaceChunkBlocks(chunk, slices, box.origin + point, blocktable, idsToReplace,
+                                            blockInfo.ID, blockInfo.blockData, shouldRetainData, changesLighting)
             replaced += blockCount
-
-            # don't waste time relighting and copying if the mask is empty
-            if blockCount:
-                blocks[:][mask] = blockInfo.ID
-                if not shouldRetainData:
-                    data[mask] = blockInfo.blockData
-            else:
+            if not blockCount:
                 skipped += 1
-                needsLighting = False
+            continue
 
-            def include(tileEntity):
-                p = TileEntity.pos(tileEntity)
-                x, y, z = map(lambda a, b, c: (a - b) - c, p, point, box.origin)
-                return not ((p in box) and mask[x, z, y])
-
-            chunk.TileEntities[:] = filter(include, chunk.TileEntities)
-
-        else:
-            blocks[:] = blockInfo.ID
-            if not shouldRetainData:
-                data[:] = blockInfo.blockData
-            chunk.removeTileEntitiesInBox(box)
+        blocks = chunk.Blocks[slices]
+        data = chunk.Data[slices]
+        blocks.fill(blockInfo.ID)
+        if not shouldRetainData:
+            data.fill(blockInfo.blockData)
+        chunk.removeTileEntitiesInBox(box)
 
-        chunk.chunkChanged(needsLighting)
+        chunk.chunkChanged(changesLighting)
 
     if len(blocksToReplace):
         log.info(u"Replace: Skipped {0} chunks, replaced {1} blocks".format(skipped, replaced))
@@ -0,0 +1,162 @@
+"""
+World-wide block replacement spread over several processes.
+
+The world is sharded by region file. Each worker process reads the chunks of one region, replaces blocks in them
+and writes the changed chunks straight into the region file of the same name in the world's work folder, so no two
+workers ever touch the same file. The changes are then part of the world's unsaved work, just as if fillBlocks had
+made them.
+"""
+from datetime import datetime
+import logging
+log = logging.getLogger(__name__)
+
+from collections import namedtuple
+import multiprocessing
+
+import block_fill
+from infiniteworld import AnvilChunk, AnvilChunkData, checkSessionLockFile
+import materials
+from mclevelbase import exhaust
+import nbt
+
+__all__ = ["ReplaceResult", "replaceBlocksParallel", "replaceBlocksParallelIter"]
+
+# The number of blocks replaced and of chunks left unchanged by a replacement
+ReplaceResult = namedtuple("ReplaceResult", ("replaced", "skipped"))
+
+
+def replaceChunkBlocks(chunk, box, blocktable, blockID, blockData, shouldRetainData, changesLighting):
+    """ Replaces the blocks selected by blocktable in the part of the chunk inside box. Returns the number of blocks
+    replaced. If it is zero, the chunk was not changed. """
+    localBox, slices = chunk.getChunkSlicesForBox(box)
+    if localBox.volume == 0:
+        return 0
+
+    return block_fill.replaceChunkBlocks(chunk, slices, localBox.origin, blocktable, blocktable.any(axis=1),
+                                         blockID, blockData, shouldRetainData, changesLighting)
+
+
+class RegionWorld(object):
+    """ Stands in for the level that owns the chunks loaded by a worker process. Worker processes never open the
+    level itself, since opening it would take the session lock and clear the work folder. """
+    def __init__(self, materialsName, height, dimNo):
+        self.materials = materials.namedMaterials[materialsName]
+        self.Height = height
+        self.dimNo = dimNo
+        self.chunksNeedingLighting = set()
+        self.displayName = "RegionWorld"
+
+
+def _replaceInRegion(args):
+    (regionCoords, chunks, worldFolder, workFolder, lockfile, initTime,
+     worldInfo, box, blocktable, blockID, blockData, shouldRetainData, changesLighting) = args
+
+    world = RegionWorld(*worldInfo)
+
+    replaced = 0
+    skipped = 0
+    changedChunks = []
+
+    for cx, cz in chunks:
+        if workFolder.containsChunk(cx, cz):
+            data = workFolder.readChunk(cx, cz)
+        elif worldFolder.containsChunk(cx, cz):
+            data = worldFolder.readChunk(cx, cz)
+        else:
+            continue
+
+        chunk = AnvilChunk(AnvilChunkData(world, (cx, cz), nbt.load(buf=data, lazy=True, views=True)))
+        blockCount = replaceChunkBlocks(chunk, box, blocktable, blockID, blockData, shouldRetainData, changesLighting)
+        if not blockCount:
+            skipped += 1
+            continue
+
+        checkSessionLockFile(lockfile, initTime)
+        workFolder.saveChunk(cx, cz, chunk.savedTagData())
+
+        replaced += blockCount
+        changedChunks.append((cx, cz))
+
+    worldFolder.closeRegions()
+    workFolder.closeRegions()
+    return replaced, skipped, changedChunks
+
+
+def replaceBlocksParallelIter(level, box, blockInfo, blocksToReplace, processes=None):
+    """ Replaces blocksToReplace with blockInfo inside box, or the whole level if box is None, using a pool of
+    worker processes that each handle one region file of an MCInfdevOldLevel at a time. Yields (regionsDone,
+    regionCount) progress pairs, and finally a ReplaceResult.
+
+    Chunks currently in use by another object are replaced in this process instead. The replaced chunks are
+    marked as needing lighting if the light absorption or emission changes.
+    """
+    startTime = datetime.now()
+    level.checkSessionLock()
+    lockWorld = level.parentWorld or level
+
+    log.info("Replacing {0} with {1}".format(blocksToReplace, blockInfo))
+    blocktable, shouldRetainData, changesLighting = block_fill.replaceParameters(level, blockInfo, blocksToReplace)
+    if blocktable is None:
+        raise ValueError("replaceBlocksParallel needs at least one block to replace")
+
+    # Give the workers a consistent view of the world: write loaded chunks with changes to the work folder and
+    # forget the rest. Chunks in use by other objects stay loaded and are replaced here.
+    inUse = set(level._loadedChunks.keys())
+    for (cx, cz), chunkData in level._loadedChunkData.items():
+        if (cx, cz) in inUse:
+            continue
+        if chunkData.dirty:
+            level.unsavedWorkFolder.saveChunk(cx, cz, chunkData.savedTagData())
+        del level._loadedChunkData[cx, cz]
+    level.unsavedWorkFolder.closeRegions()
+
+    if box is None:
+        box = level.bounds
+
+    regions = {}
+    for cx, cz in level.allChunks:
+        if (cx, cz) in inUse or not (box.mincx <= cx < box.maxcx and box.mincz <= cz < box.maxcz):
+            continue
+        regions.setdefault((cx >> 5, cz >> 5), []).append((cx, cz))
+
+    worldInfo = (level.materials.name, level.Height, level.dimNo)
+    tasks = [(regionCoords, sorted(chunks), level.worldFolder, level.unsavedWorkFolder,
+              lockWorld.worldFolder.getFilePath("session.lock"), lockWorld.initTime,
+              worldInfo, box, blocktable, blockInfo.ID, blockInfo.blockData, shouldRetainData, changesLighting)
+             for regionCoords, chunks in sorted(regions.iteritems())]
+
+    replaced = 0
+    skipped = 0
+    pool = multiprocessing.Pool(processes)
+    try:
+        for i, (regionReplaced, regionSkipped, changedChunks) in enumerate(pool.imap_unordered(_replaceInRegion, tasks)):
+            replaced += regionReplaced
+            skipped += regionSkipped
+            if changesLighting:
+                level.chunksNeedingLighting.update(changedChunks)
+            yield i + 1, len(tasks)
+    finally:
+        pool.terminate()
+        pool.join()
+        level.unsavedWorkFolder.closeRegions()
+
+    for cx, cz in inUse:
+        if not level.containsChunk(cx, cz):
+            continue
+        chunk = level.getChunk(cx, cz)
+        blockCount = replaceChunkBlocks(chunk, box, blocktable, blockInfo.ID, blockInfo.blockData,
+                                        shouldRetainData, changesLighting)
+        replaced += blockCount
+        if not blockCount:
+            skipped += 1
+
+    log.info(u"Replace: Skipped {0} chunks, replaced {1} blocks".format(skipped, replaced))
+    log.info("Duration: {0} using {1} processes".format(datetime.now() - startTime,
+                                                          processes or multiprocessing.cpu_count()))
+    yield ReplaceResult(replaced, skipped)
+
+
+def replaceBlocksParallel(level, box, blockInfo, blocksToReplace, processes=None):
+    """ Replaces blocksToReplace with blockInfo inside box and returns a ReplaceResult. See
+    replaceBlocksParallelIter. """
+    return exhaust(replaceBlocksParallelIter(level, box, blockInfo, blocksToReplace, processes))
@@ -0,0 +1,209 @@
+import logging
+log = logging.getLogger(__name__)
+
+import numpy
+from box import BoundingBox
+from mclevelbase import ChunkMalformed, ChunkNotPresent
+
+__all__ = ["BlockView", "blockView"]
+
+
+class BlockView(object):
+    """ An ndarray-like view of one of a level's chunk arrays (Blocks, Data, BlockLight, SkyLight)
+    over an arbitrary box. Nothing is copied until the view is indexed. Indexing returns a new
+    array holding only the requested part of the box, read from the chunks covering it, and assigning
+    to an index writes through to those chunks and marks them dirty.
+
+    Like the level's own arrays, the view is indexed x,z,y. Positions in missing chunks or outside
+    the level read as zero and are not written.
+
+        view = level.blockView(box)
+        column = view[5, 5, :]
+        view[:, :, 0:4] = level.materials.Bedrock.ID
+    """
+
+    def __init__(self, level, box, arrayName="Blocks"):
+        self.level = level
+        self.box = BoundingBox(box)
+        self.arrayName = arrayName
+        self._dtype = None
+
+    def __repr__(self):
+        return "BlockView({0}, {1}, {2!r})".format(self.level, self.box, self.arrayName)
+
+    @property
+    def shape(self):
+        return self.box.width, self.box.length, self.box.height
+
+    @property
+    def ndim(self):
+        return 3
+
+    @property
+    def size(self):
+        return self.box.volume
+
+    def __len__(self):
+        return self.box.width
+
+    @property
+    def dtype(self):
+        if self._dtype is None:
+            for chunk, chunkSlices, viewSlices in self._chunkSlices(self.box):
+                self._dtype = getattr(chunk, self.arrayName).dtype
+                break
+            else:
+                self._dtype = numpy.dtype('uint16' if self.arrayName == "Blocks" else 'uint8')
+        return self._dtype
+
+    # --- Chunk access ---
+
+    def _chunkSlices(self, box):
+        """ Yields (chunk, chunkSlices, viewSlices) for each present chunk intersecting box. chunkSlices index the
+        chunk's array and viewSlices index an array shaped like box. """
+        level = self.level
+        clippedBox = box.intersect(level.bounds)
+        if clippedBox.volume == 0:
+            return
+
+        for cx, cz in clippedBox.chunkPositions:
+            if not level.containsChunk(cx, cz):
+                continue
+            try:
+                chunk = level.getChunk(cx, cz)
+            except (ChunkMalformed, ChunkNotPresent):
+                continue
+
+            localBox, chunkSlices = chunk.getChunkSlicesForBox(clippedBox)
+            if localBox.volume == 0:
+                continue
+
+            viewSlices = (
+                slice(localBox.minx - box.minx, localBox.maxx - box.minx),
+                slice(localBox.minz - box.minz, localBox.maxz - box.minz),
+                slice(localBox.miny - box.miny, localBox.maxy - box.miny),
+            )
+            yield chunk, chunkSlices, viewSlices
+
+    def _read(self, box):
+        array = numpy.zeros((box.width, box.length, box.height), self.dtype)
+        for chunk, chunkSlices, viewSlices in self._chunkSlices(box):
+            array[viewSlices] = getattr(chunk, self.arrayName)[chunkSlices]
+
+        return array
+
+    def _write(self, box, array):
+        arrayName = self.arrayName
+        for chunk, chunkSlices, viewSlices in self._chunkSlices(box):
+            getattr(chunk, arrayName)[chunkSlices] = array[viewSlices]
+            if arrayName == "Blocks":
+                # regenerates the height map too, as every other way of writing blocks does
+                chunk.chunkChanged(True)
+                continue
+            # light written by the caller is kept rather than recalculated at the next relight
+            chunk.dirty = True
+
+    # --- Indexing ---
+
+    def _resolve(self, key):
+        """ Converts an index into the box covering every position it selects, plus a list holding, for each axis
+        of that box, either None (every position), an integer (one position; the axis is dropped) or an array of
+        positions (for slices with a step). """
+        if not isinstance(key, tuple):
+            key = (key,)
+        if Ellipsis in key:
+            i = key.index(Ellipsis)
+            key = key[:i] + (slice(None),) * (4 - len(key)) + key[i + 1:]
+        key = key + (slice(None),) * (3 - len(key))
+        if len(key) != 3:
+            raise IndexError("Too many indices for BlockView: {0}".format(key))
+
+        origin = []
+        size = []
+        axes = []
+        for k, length in zip(key, self.shape):
+            if isinstance(k, slice):
+                start, stop, step = k.indices(length)
+                positions = xrange(start, stop, step)
+                if len(positions) == 0:
+                    origin.append(0)
+                    size.append(0)
+                    axes.append(None)
+                    continue
+
+                low = min(positions[0], positions[-1])
+                high = max(positions[0], positions[-1]) + 1
+                origin.append(low)
+                size.append(high - low)
+                if step == 1:
+                    axes.append(None)
+                else:
+                    axes.append(numpy.array(positions) - low)
+            else:
+                k = int(k)
+                if k < 0:
+                    k += length
+                if not 0 <= k < length:
+                    raise IndexError("Index {0} out of range for BlockView of shape {1}".format(k, self.shape))
+                origin.append(k)
+                size.append(1)
+                axes.append(0)
+
+        # view arrays are x,z,y; boxes are x,y,z
+        box = self.box
+        subBox = BoundingBox((box.minx + origin[0], box.miny + origin[2], box.minz + origin[1]),
+                             (size[0], size[2], size[1]))
+
+        return subBox, axes
+
+    def __getitem__(self, key):
+        subBox, axes = self._resolve(key)
+        array = self._read(subBox)
+        for axis, positions in enumerate(axes):
+            if isinstance(positions, numpy.ndarray):
+                array = array.take(positions, axis=axis)
+
+        return array[tuple(slice(None) if positions is None or isinstance(positions, numpy.ndarray) else 0
+                           for positions in axes)]
+
+    def __setitem__(self, key, value):
+        subBox, axes = self._resolve(key)
+        shape = (subBox.width, subBox.length, subBox.height)
+
+        if all(positions is None or isinstance(positions, int) for positions in axes):
+            array = numpy.empty(shape, self.dtype)
+            selection = (slice(None),) * 3
+        else:
+            array = self._read(subBox)
+            selection = numpy.ix_(*[numpy.arange(length) if positions is None
+                                    else numpy.atleast_1d(positions)
+                                    for positions, length in zip(axes, shape)])
+
+        # broadcast the value against the indexed shape, then restore the axes dropped by integer indices
+        indexedShape = [len(positions) if isinstance(positions, numpy.ndarray) else length
+                        for positions, length in zip(axes, shape)]
+        logicalShape = [length for positions, length in zip(axes, indexedShape) if not isinstance(positions, int)]
+        array[selection] = numpy.broadcast_to(value, logicalShape).reshape(indexedShape)
+
+        self._write(subBox, array)
+
+    # --- Array conversion ---
+
+    def __array__(self, dtype=None):
+        array = self._read(self.box)
+        if dtype is not None:
+            array = array.astype(dtype)
+        return array
+
+    def copy(self):
+        return self._read(self.box)
+
+    def astype(self, dtype):
+        return self._read(self.box).astype(dtype)
+
+
+def blockView(level, box=None, arrayName="Blocks"):
+    """ Returns a BlockView of the given array over box, or over the whole level if box is None. """
+    if box is None:
+        box = level.bounds
+    return BlockView(level, box, arrayName)
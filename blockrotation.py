@@ -1,6 +1,6 @@
 import materials
 from materials import alphaMaterials
-from numpy import arange, zeros
+from numpy import arange, newaxis, zeros
 
 
 def genericVerticalFlip(cls):
@@ -583,12 +583,25 @@ def rotationTypeTable():
     return table
 
 
-class BlockRotation:
-    rotateLeft = masterRotationTable("rotateLeft")
-    flipEastWest = masterRotationTable("flipEastWest")
-    flipNorthSouth = masterRotationTable("flipNorthSouth")
-    flipVertical = masterRotationTable("flipVertical")
-    typeTable = rotationTypeTable()
+class _LazyTable(object):
+    """ A BlockRotation table that is built the first time it is used. """
+    def __init__(self, name, build, *args):
+        self.name = name
+        self.build = build
+        self.args = args
+
+    def __get__(self, instance, owner):
+        table = self.build(*self.args)
+        setattr(owner, self.name, table)
+        return table
+
+
+class BlockRotation(object):
+    rotateLeft = _LazyTable("rotateLeft", masterRotationTable, "rotateLeft")
+    flipEastWest = _LazyTable("flipEastWest", masterRotationTable, "flipEastWest")
+    flipNorthSouth = _LazyTable("flipNorthSouth", masterRotationTable, "flipNorthSouth")
+    flipVertical = _LazyTable("flipVertical", masterRotationTable, "flipVertical")
+    typeTable = _LazyTable("typeTable", rotationTypeTable)
 
 
 def SameRotationType(blocktype1, blocktype2):
@@ -597,16 +610,53 @@ def SameRotationType(blocktype1, blocktype2):
 
 
 def FlipVertical(blocks, data):
-    data[:] = BlockRotation.flipVertical[blocks, data]
+    ApplyRotation(BlockRotation.flipVertical, blocks, data)
 
 
 def FlipNorthSouth(blocks, data):
-    data[:] = BlockRotation.flipNorthSouth[blocks, data]
+    ApplyRotation(BlockRotation.flipNorthSouth, blocks, data)
 
 
 def FlipEastWest(blocks, data):
-    data[:] = BlockRotation.flipEastWest[blocks, data]
+    ApplyRotation(BlockRotation.flipEastWest, blocks, data)
 
 
 def RotateLeft(blocks, data):
-    data[:] = BlockRotation.rotateLeft[blocks, data]
+    ApplyRotation(BlockRotation.rotateLeft, blocks, data)
+
+
+def ComposeRotations(first, second):
+    """ Returns a table like those of BlockRotation that does the rotation in table first, then the one in table
+    second. """
+    return second[arange(len(second))[:, newaxis], first]
+
+
+def _blockIndex(blocks, data):
+    index = blocks.astype('uint16')
+    index <<= 4
+    index |= data
+    return index
+
+
+def RotatedData(table, blocks, data):
+    """ Returns data rotated with a table like those of BlockRotation, looking up (ID << 4 | data) in the flattened
+    table. """
+    return table.ravel().take(_blockIndex(blocks, data))
+
+
+def ApplyRotation(table, blocks, data):
+    data[:] = RotatedData(table, blocks, data)
+
+
+def RotationConversionTable(rotationTable, conversionTable=None):
+    """ Returns a flat table mapping (ID << 4 | data) to the (ID << 4 | data) of the block after rotating its data
+    with rotationTable, a table like those of BlockRotation, then converting it with conversionTable, a flat table
+    like those of materials.conversionTable. The result has the dtype of conversionTable, so the entries of -1 that
+    block_copy uses for blocks it does not copy are kept. """
+    table = arange(materials.id_limit << 4, dtype='uint16')
+    table &= 0xfff0
+    table |= rotationTable.ravel()
+    if conversionTable is not None:
+        table = conversionTable[table]
+    return table
+
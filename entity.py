@@ -6,7 +6,7 @@ Created on Jul 23, 2011
 from math import isnan
 
 import nbt
-from copy import deepcopy
+import numpy
 
 __all__ = ["Entity", "TileEntity"]
 
@@ -92,7 +92,7 @@ class TileEntity(object):
 
     @classmethod
     def copyWithOffset(cls, tileEntity, copyOffset):
-        eTag = deepcopy(tileEntity)
+        eTag = tileEntity.copy()
         eTag['x'] = nbt.TAG_Int(tileEntity['x'].value + copyOffset[0])
         eTag['y'] = nbt.TAG_Int(tileEntity['y'].value + copyOffset[1])
         eTag['z'] = nbt.TAG_Int(tileEntity['z'].value + copyOffset[2])
@@ -201,7 +201,7 @@ class Entity(object):
 
     @classmethod
     def copyWithOffset(cls, entity, copyOffset):
-        eTag = deepcopy(entity)
+        eTag = entity.copy()
 
         positionTags = map(lambda p, co: nbt.TAG_Double(p.value + co), eTag["Pos"], copyOffset)
         eTag["Pos"] = nbt.TAG_List(positionTags)
@@ -220,3 +220,87 @@ class InvalidEntity(ValueError):
 
 class InvalidTileEntity(ValueError):
     pass
+
+
+def _positionKeys(tags, entityClass):
+    """ Returns the values of the position tags of each of tags, or None for a tag without them. Two lists of keys
+    for the same tags differ if any of them has moved, however its position tags were changed. """
+    keys = []
+    if entityClass is Entity:
+        for tag in tags:
+            try:
+                keys.append(tuple([p.value for p in tag["Pos"].value]))
+            except (KeyError, AttributeError):
+                keys.append(None)
+    else:
+        for tag in tags:
+            try:
+                keys.append((tag["x"].value, tag["y"].value, tag["z"].value))
+            except KeyError:
+                keys.append(None)
+    return keys
+
+
+class PositionIndex(object):
+    """
+    The positions of a list of entity or tile entity tags gathered into an array, so that the tags inside a box can
+    be found with one numpy comparison and a tile entity can be looked up by its position in a dict.
+
+    The index belongs to the TAG_List it was built from and can be reused as long as matches() is true for that list.
+    Tags without a position are never found.
+    """
+    def __init__(self, tagList, entityClass, tags=None, positions=None, valid=None, keys=None):
+        self.values = tagList.value
+        if tags is None:
+            tags = list(self.values)
+            keys = _positionKeys(tags, entityClass)
+            dtype = 'float64' if entityClass is Entity else 'int32'
+            positions = numpy.zeros((len(tags), 3), dtype)
+            valid = numpy.ones(len(tags), bool)
+            for i, tag in enumerate(tags):
+                try:
+                    positions[i] = entityClass.pos(tag)
+                except (KeyError, InvalidEntity):
+                    valid[i] = False
+
+        self.entityClass = entityClass
+        self.tags = tags
+        self.ids = map(id, tags)
+        self.keys = keys
+        self.positions = positions
+        self.valid = valid
+        self._byPosition = None
+
+    def matches(self, tagList):
+        """ Returns True if tagList still holds the tags this index was built from, in the same order, and none of
+        them has moved. Checking costs a read of each tag's position tags, but no conversion of them. """
+        values = tagList.value
+        if values is not self.values or map(id, values) != self.ids:
+            return False
+        return _positionKeys(self.tags, self.entityClass) == self.keys
+
+    def maskInBox(self, box):
+        """ Returns a boolean array that is True for the tags whose positions are inside box. """
+        positions = self.positions
+        return (self.valid & (positions >= box.origin).all(axis=1) & (positions < box.maximum).all(axis=1))
+
+    def tagsInBox(self, box):
+        return [self.tags[i] for i in numpy.flatnonzero(self.maskInBox(box))]
+
+    def at(self, x, y, z):
+        """ Returns the first tag at the position (x, y, z), or None. """
+        if self._byPosition is None:
+            byPosition = {}
+            for tag, pos, valid in zip(self.tags, self.positions.tolist(), self.valid):
+                if valid:
+                    byPosition.setdefault(tuple(pos), tag)
+            self._byPosition = byPosition
+        return self._byPosition.get((x, y, z))
+
+    def keep(self, keepMask, tagList):
+        """ Replaces the tags of tagList with the ones selected by keepMask and returns the index of the result. """
+        indices = numpy.flatnonzero(keepMask)
+        tags = [self.tags[i] for i in indices]
+        tagList.value[:] = tags
+        return PositionIndex(tagList, self.entityClass, tags, self.positions[indices], self.valid[indices],
+                             [self.keys[i] for i in indices])
@@ -0,0 +1,139 @@
+"""
+Export of a level's entities and tile entities as columns of numpy arrays.
+
+The level is read one chunk at a time and only its entity lists are decoded. The columns are written to a
+compressed .npz file, so that questions about every entity in a world can be answered with numpy instead of
+decoding the world again:
+
+    columns = loadEntityColumns("world.npz")
+    isCreeper = columns["strings"][columns["entity_id"]] == "Creeper"
+    creeperChunks = set(zip(columns["entity_cx"][isCreeper], columns["entity_cz"][isCreeper]))
+
+Entities have the columns entity_id, entity_x, entity_y, entity_z, entity_cx and entity_cz. Tile entities have the
+same columns prefixed with tileentity_. The _id columns index the strings column, which holds each ID once. Entity
+positions are float64 and tile entity positions, which are block coordinates, are int32.
+"""
+import array
+from datetime import datetime
+import logging
+log = logging.getLogger(__name__)
+
+from math import floor
+import numpy
+
+from entity import Entity, TileEntity, InvalidEntity
+from infiniteworld import MCInfdevOldLevel
+from mclevelbase import ChunkMalformed, ChunkNotPresent, exhaust
+
+__all__ = ["exportEntities", "exportEntitiesIter", "loadEntityColumns"]
+
+_entityPaths = ["Level/Entities", "Level/TileEntities"]
+
+
+def _extractedEntities(level, cx, cz):
+    """ Returns (entities, tileEntities) for a chunk of an MCInfdevOldLevel as lists of (id, position) pairs,
+    reading only the entity lists from the chunk. Each entity's ID and position are taken from that entity's own
+    tag, and entities missing either are skipped. """
+    found = level.extractChunkTags(cx, cz, _entityPaths)
+    entities, tileEntities = [[tag for tagList in found[path] for tag in tagList] for path in _entityPaths]
+    return _chunkEntities(entities, Entity), _chunkEntities(tileEntities, TileEntity)
+
+
+def _chunkEntities(tags, entityClass):
+    entities = []
+    for tag in tags:
+        try:
+            entities.append((tag["id"].value, entityClass.pos(tag)))
+        except (KeyError, InvalidEntity):
+            log.debug("Skipping entity without an ID or position: {0!r}".format(tag))
+    return entities
+
+
+def _asArray(values, dtype):
+    if not len(values):
+        return numpy.zeros(0, dtype)
+    return numpy.frombuffer(values, values.typecode).astype(dtype)
+
+
+class _Columns(object):
+    def __init__(self, prefix, dtype):
+        self.prefix = prefix
+        self.dtype = dtype
+        self.ids = array.array('i')
+        self.positions = array.array('d' if dtype == 'float64' else 'l')
+        self.chunks = array.array('i')
+
+    def extend(self, strings, cx, cz, entities):
+        for entityID, pos in entities:
+            self.ids.append(strings.setdefault(entityID, len(strings)))
+            self.positions.extend(pos)
+            self.chunks.extend((cx, cz))
+
+    def arrays(self):
+        positions = _asArray(self.positions, self.dtype).reshape(-1, 3)
+        chunks = _asArray(self.chunks, 'int32').reshape(-1, 2)
+        prefix = self.prefix
+        return {
+            prefix + "id": _asArray(self.ids, 'int32'),
+            prefix + "x": positions[:, 0].copy(),
+            prefix + "y": positions[:, 1].copy(),
+            prefix + "z": positions[:, 2].copy(),
+            prefix + "cx": chunks[:, 0].copy(),
+            prefix + "cz": chunks[:, 1].copy(),
+        }
+
+
+def exportEntitiesIter(level, filename):
+    """ Writes the IDs and positions of every entity and tile entity in level to the .npz file filename. Yields
+    (chunksDone, chunkCount) progress pairs, and finally an (entityCount, tileEntityCount) pair. """
+    startTime = datetime.now()
+    strings = {}
+    entityColumns = _Columns("entity_", 'float64')
+    tileEntityColumns = _Columns("tileentity_", 'int32')
+
+    if hasattr(level, "Entities"):
+        # levels without real chunks, such as schematics, hold their entities directly
+        for entityID, pos in _chunkEntities(level.Entities, Entity):
+            entityColumns.extend(strings, int(floor(pos[0])) >> 4, int(floor(pos[2])) >> 4, [(entityID, pos)])
+        for entityID, pos in _chunkEntities(getattr(level, "TileEntities", ()), TileEntity):
+            tileEntityColumns.extend(strings, pos[0] >> 4, pos[2] >> 4, [(entityID, pos)])
+    else:
+        chunkPositions = list(level.allChunks)
+        for i, (cx, cz) in enumerate(chunkPositions):
+            try:
+                if isinstance(level, MCInfdevOldLevel):
+                    entities, tileEntities = _extractedEntities(level, cx, cz)
+                else:
+                    chunk = level.getChunk(cx, cz)
+                    entities = _chunkEntities(chunk.Entities, Entity)
+                    tileEntities = _chunkEntities(chunk.TileEntities, TileEntity)
+            except (ChunkMalformed, ChunkNotPresent), e:
+                log.warning(u"Skipping chunk {0}: {1!r}".format((cx, cz), e))
+                continue
+
+            entityColumns.extend(strings, cx, cz, entities)
+            tileEntityColumns.extend(strings, cx, cz, tileEntities)
+            yield i + 1, len(chunkPositions)
+
+    columns = {"strings": numpy.array(sorted(strings, key=strings.get), dtype=unicode)}
+    columns.update(entityColumns.arrays())
+    columns.update(tileEntityColumns.arrays())
+    numpy.savez_compressed(filename, **columns)
+
+    entityCount = len(entityColumns.ids)
+    tileEntityCount = len(tileEntityColumns.ids)
+    log.info(u"Exported {0} entities and {1} tile entities to {2} in {3}".format(
+        entityCount, tileEntityCount, filename, datetime.now() - startTime))
+    yield entityCount, tileEntityCount
+
+
+def exportEntities(level, filename):
+    """ Writes the entities of level to filename and returns (entityCount, tileEntityCount). See
+    exportEntitiesIter. """
+    return exhaust(exportEntitiesIter(level, filename))
+
+
+def loadEntityColumns(filename):
+    """ Returns a dict holding the columns written by exportEntities. """
+    with numpy.load(filename) as npz:
+        return dict((name, npz[name]) for name in npz.files)
@@ -4,6 +4,7 @@ Created on Jul 22, 2011
 @author: Rio
 '''
 
+from collections import defaultdict
 import copy
 from datetime import datetime
 import itertools
@@ -25,10 +26,10 @@ from box import BoundingBox
 from entity import Entity, TileEntity
 from faces import FaceXDecreasing, FaceXIncreasing, FaceZDecreasing, FaceZIncreasing
 from level import LightedChunk, EntityLevel, computeChunkHeightMap, MCLevel, ChunkBase
-from materials import alphaMaterials
+from materials import alphaMaterials, id_limit
 from mclevelbase import ChunkMalformed, ChunkNotPresent, exhaust, PlayerNotFound
 import nbt
-from numpy import array, clip, maximum, zeros
+from numpy import array, bincount, clip, maximum, zeros
 from regionfile import MCRegionFile
 
 log = getLogger(__name__)
@@ -44,6 +45,16 @@ class SessionLockLost(IOError):
     pass
 
 
+def checkSessionLockFile(lockfile, initTime):
+    """ Raises SessionLockLost unless the session lock file still holds initTime. """
+    try:
+        (lock, ) = struct.unpack(">q", file(lockfile, "rb").read())
+    except struct.error:
+        lock = -1
+    if lock != initTime:
+        raise SessionLockLost, "Session lock lost. This world is being accessed from another location."
+
+
 
 def ZeroChunk(height=512):
     z = _zeros.get(height)
@@ -112,6 +123,8 @@ class AnvilChunkData(object):
         self.world = world
         self.root_tag = root_tag
         self.dirty = False
+        self._blockCounts = None
+        self.entityIndex = self.tileEntityIndex = None
 
         self.Blocks = zeros((16, 16, world.Height), 'uint16')
         self.Data = zeros((16, 16, world.Height), 'uint8')
@@ -157,28 +170,46 @@ class AnvilChunkData(object):
         for sec in self.root_tag["Level"].pop("Sections", []):
             y = sec["Y"].value * 16
 
+            # the section arrays are only read, so their views are used to avoid copying them
             for name in "Blocks", "Data", "SkyLight", "BlockLight":
                 arr = getattr(self, name)
-                secarray = sec[name].value
+                secarray = sec[name].view
                 if name == "Blocks":
-                    secarray.shape = (16, 16, 16)
+                    secarray = secarray.reshape((16, 16, 16))
                 else:
-                    secarray.shape = (16, 16, 8)
-                    secarray = unpackNibbleArray(secarray)
+                    secarray = unpackNibbleArray(secarray.reshape((16, 16, 8)))
 
                 arr[..., y:y + 16] = secarray.swapaxes(0, 2)
 
             tag = sec.get("Add")
             if tag is not None:
-                tag.value.shape = (16, 16, 8)
-                add = unpackNibbleArray(tag.value)
+                add = unpackNibbleArray(tag.view.reshape((16, 16, 8)))
                 self.Blocks[...,y:y + 16] |= (array(add, 'uint16') << 8).swapaxes(0, 2)
 
+    @property
+    def dirty(self):
+        return self._dirty
+
+    @dirty.setter
+    def dirty(self, value):
+        # Blocks changed without going through AnvilChunk.Blocks are changed along with the dirty flag.
+        if value:
+            self._blockCounts = None
+        self._dirty = value
+
+    def blockCounts(self):
+        """ Returns an array of length id_limit holding the number of blocks of each ID in this chunk. The counts
+        are kept until the chunk is next marked dirty or its Blocks array is handed out by an AnvilChunk. """
+        if self._blockCounts is None:
+            self._blockCounts = bincount(self.Blocks.ravel(), minlength=id_limit)
+        return self._blockCounts
+
     def savedTagData(self):
         """ does not recalculate any data or light """
 
         log.debug(u"Saving chunk: {0}".format(self))
         sanitizeBlocks(self)
+        self._blockCounts = None
 
         sections = nbt.TAG_List()
         for y in range(0, self.world.Height, 16):
@@ -240,6 +271,11 @@ class AnvilChunk(LightedChunk):
     def savedTagData(self):
         return self.chunkData.savedTagData()
 
+    keepsBlockCounts = True
+
+    def blockCounts(self):
+        return self.chunkData.blockCounts()
+
 
     def __str__(self):
         return u"AnvilChunk, coords:{0}, world: {1}, D:{2}, L:{3}".format(self.chunkPosition, self.world.displayName, self.dirty, self.needsLighting)
@@ -289,6 +325,24 @@ class AnvilChunk(LightedChunk):
     def root_tag(self):
         return self.chunkData.root_tag
 
+    # the position indexes are kept with the chunk data, so that they outlive this chunk object
+
+    @property
+    def _entityIndex(self):
+        return self.chunkData.entityIndex
+
+    @_entityIndex.setter
+    def _entityIndex(self, index):
+        self.chunkData.entityIndex = index
+
+    @property
+    def _tileEntityIndex(self):
+        return self.chunkData.tileEntityIndex
+
+    @_tileEntityIndex.setter
+    def _tileEntityIndex(self, index):
+        self.chunkData.tileEntityIndex = index
+
     @property
     def dirty(self):
         return self.chunkData.dirty
@@ -305,6 +359,9 @@ class AnvilChunk(LightedChunk):
 
     @property
     def Blocks(self):
+        # The array may be written through before the chunk is marked dirty, so the block counts are outdated
+        # once it is handed out.
+        self.chunkData._blockCounts = None
         return self.chunkData.Blocks
 
     @property
@@ -879,6 +936,10 @@ class AnvilWorldFolder(object):
         self.filename = filename
         self.regionFiles = {}
 
+    def __reduce__(self):
+        # world folders are sent to worker processes by path, without their open region files
+        return self.__class__, (self.filename,)
+
     # --- File paths ---
 
     def getFilePath(self, path):
@@ -1033,7 +1094,7 @@ class MCInfdevOldLevel(ChunkedLevelMixin, EntityLevel):
             raise IOError('File is not a Minecraft Alpha world')
 
 
-        self.worldFolder = AnvilWorldFolder(filename)
+        self.worldFolder = self._openWorldFolder(filename)
         self.filename = self.worldFolder.getFilePath("level.dat")
         self.readonly = readonly
         if not readonly:
@@ -1072,6 +1133,9 @@ class MCInfdevOldLevel(ChunkedLevelMixin, EntityLevel):
 
     # --- Load, save, create ---
 
+    def _openWorldFolder(self, filename):
+        return AnvilWorldFolder(filename)
+
     def _create(self, filename, random_seed, last_played):
 
         # create a new level
@@ -1111,13 +1175,7 @@ class MCInfdevOldLevel(ChunkedLevelMixin, EntityLevel):
         if self.readonly:
             raise SessionLockLost, "World is opened read only."
 
-        lockfile = self.worldFolder.getFilePath("session.lock")
-        try:
-            (lock, ) = struct.unpack(">q", file(lockfile, "rb").read())
-        except struct.error:
-            lock = -1
-        if lock != self.initTime:
-            raise SessionLockLost, "Session lock lost. This world is being accessed from another location."
+        checkSessionLockFile(self.worldFolder.getFilePath("session.lock"), self.initTime)
 
     def loadLevelDat(self, create=False, random_seed=None, last_played=None):
 
@@ -1409,7 +1467,6 @@ class MCInfdevOldLevel(ChunkedLevelMixin, EntityLevel):
                 # Only source chunk loaded. Discard destination chunk and save source chunk in its place.
                 self._loadedChunkData.pop((cx, cz), None)
                 self.unsavedWorkFolder.saveChunk(cx, cz, sourceChunk.savedTagData())
-                return
         else:
             if destChunk:
                 log.debug("Destination chunk loaded. Using block copy.")
@@ -1433,19 +1490,131 @@ class MCInfdevOldLevel(ChunkedLevelMixin, EntityLevel):
 
                 self.unsavedWorkFolder.copyChunkFrom(sourceFolder, cx, cz)
 
+        # Chunks in the work folder are only found by containsChunk once the chunk positions are loaded.
+        if self._allChunks is None:
+            self.preloadChunkPositions()
+        self._allChunks.add((cx, cz))
+        self._bounds = None
+
+    def copyChunkWithOffset(self, world, cx, cz, destCx, destCz, biomes=True):
+        """
+        Copy the chunk at (cx, cz) in world to (destCx, destCz) in self, replacing the destination chunk's blocks.
+        The chunk's sections are never decoded; only its position, entities, tile entities and tile ticks are
+        rewritten. As with a block copy, the destination chunk keeps its own entities and tile ticks, and keeps
+        its tile entities except those at the positions of copied ones.
+
+        If biomes is False, the destination chunk keeps its old biomes.
+
+        When the offset is zero, biomes is True and the destination chunk does not exist yet, there is nothing of
+        the destination to keep and the compressed chunk is copied as-is.
+
+        Returns False without copying anything if the destination chunk is in use by another object, in which
+        case the caller should fall back to a block copy.
+        """
+        assert isinstance(world, MCInfdevOldLevel)
+        if self.readonly:
+            raise IOError, "World is opened read only."
+
+        if (destCx, destCz) in self._loadedChunks:
+            return False
+
+        destExists = self.containsChunk(destCx, destCz)
+        if (cx, cz) == (destCx, destCz) and biomes and world is not self and not destExists:
+            self.copyChunkFrom(world, cx, cz)
+            return True
+
+        self.checkSessionLock()
+
+        sourceChunkData = world._loadedChunkData.get((cx, cz))
+        if sourceChunkData and sourceChunkData.dirty:
+            data = sourceChunkData.savedTagData()
+        else:
+            data = world._getChunkBytes(cx, cz)
+
+        root_tag = nbt.load(buf=data, lazy=True)
+        levelTag = root_tag["Level"]
+        levelTag["xPos"] = nbt.TAG_Int(destCx)
+        levelTag["zPos"] = nbt.TAG_Int(destCz)
+
+        copyOffset = ((destCx - cx) << 4, 0, (destCz - cz) << 4)
+        if "Entities" in levelTag:
+            levelTag["Entities"].value[:] = [Entity.copyWithOffset(e, copyOffset) for e in levelTag["Entities"]]
+        if "TileEntities" in levelTag:
+            levelTag["TileEntities"].value[:] = [TileEntity.copyWithOffset(t, copyOffset)
+                                                 for t in levelTag["TileEntities"]]
+        for tick in levelTag.get("TileTicks", ()):
+            tick["x"].value += copyOffset[0]
+            tick["z"].value += copyOffset[2]
+
+        destChunkData = self._loadedChunkData.get((destCx, destCz))
+        if destChunkData:
+            destLevelTag = destChunkData.root_tag["Level"]
+        elif destExists:
+            destLevelTag = nbt.load(buf=self._getChunkBytes(destCx, destCz), lazy=True)["Level"]
+        else:
+            destLevelTag = None
+
+        if destLevelTag is not None:
+            self._keepDestinationEntities(levelTag, destLevelTag)
+
+        if not biomes:
+            levelTag.pop("Biomes", None)
+            destBiomes = destLevelTag.get("Biomes") if destLevelTag is not None else None
+            if destBiomes is not None:
+                levelTag["Biomes"] = destBiomes
+
+        self._loadedChunkData.pop((destCx, destCz), None)
+        self.unsavedWorkFolder.saveChunk(destCx, destCz, root_tag.save(compressed=False))
+
+        # Chunks in the work folder are only found by containsChunk once the chunk positions are loaded.
+        if self._allChunks is None:
+            self.preloadChunkPositions()
+        self._allChunks.add((destCx, destCz))
+        self._bounds = None
+        return True
+
+    @staticmethod
+    def _keepDestinationEntities(levelTag, destLevelTag):
+        """ Adds the entities, tile ticks and unreplaced tile entities of destLevelTag to the copied levelTag. """
+        copiedTileEntities = list(levelTag.get("TileEntities", ()))
+        copiedPositions = set(tuple(TileEntity.pos(t)) for t in copiedTileEntities)
+        keptTileEntities = [t for t in destLevelTag.get("TileEntities", ())
+                            if tuple(TileEntity.pos(t)) not in copiedPositions]
+
+        for name, keptTags in (("Entities", list(destLevelTag.get("Entities", ()))),
+                               ("TileEntities", keptTileEntities),
+                               ("TileTicks", list(destLevelTag.get("TileTicks", ())))):
+            if keptTags:
+                levelTag[name] = nbt.TAG_List(keptTags + list(levelTag.get(name, ())))
+
     def _getChunkBytes(self, cx, cz):
         if not self.readonly and self.unsavedWorkFolder.containsChunk(cx, cz):
             return self.unsavedWorkFolder.readChunk(cx, cz)
         else:
             return self.worldFolder.readChunk(cx, cz)
 
+    def extractChunkTags(self, cx, cz, paths):
+        """ Reads only the tags at the given paths from a chunk without loading it. See nbt.extract. """
+        chunkData = self._loadedChunkData.get((cx, cz))
+        if chunkData is not None and chunkData.dirty:
+            data = chunkData.savedTagData()
+        else:
+            data = self._getChunkBytes(cx, cz)
+
+        try:
+            return nbt.extract(data, paths)
+        except MemoryError:
+            raise
+        except Exception, e:
+            raise ChunkMalformed, "Chunk {0} had an error: {1!r}".format((cx, cz), e), sys.exc_info()[2]
+
     def _getChunkData(self, cx, cz):
         chunkData = self._loadedChunkData.get((cx, cz))
         if chunkData is not None: return chunkData
 
         try:
             data = self._getChunkBytes(cx, cz)
-            root_tag = nbt.load(buf=data)
+            root_tag = nbt.load(buf=data, lazy=True, views=True)
             chunkData = AnvilChunkData(self, (cx, cz), root_tag)
         except (MemoryError, ChunkNotPresent):
             raise
@@ -1547,6 +1716,33 @@ class MCInfdevOldLevel(ChunkedLevelMixin, EntityLevel):
         chunk.addTileEntity(tileEntityTag)
         chunk.dirty = True
 
+    def _chunksForTags(self, tags, entityClass):
+        """ Groups tags by the chunk holding their positions and yields (chunk, tags) for each existing chunk. """
+        byChunk = defaultdict(list)
+        for tag in tags:
+            assert isinstance(tag, nbt.TAG_Compound)
+            x, y, z = entityClass.pos(tag)
+            byChunk[int(floor(x)) >> 4, int(floor(z)) >> 4].append(tag)
+
+        for (cx, cz), chunkTags in byChunk.iteritems():
+            try:
+                chunk = self.getChunk(cx, cz)
+            except (ChunkNotPresent, ChunkMalformed):
+                continue
+            yield chunk, chunkTags
+
+    def addEntities(self, entities):
+        """ Adds entities to the chunks holding them, getting each chunk once. """
+        for chunk, chunkEntities in self._chunksForTags(entities, Entity):
+            chunk.addEntities(chunkEntities)
+            chunk.dirty = True
+
+    def addTileEntities(self, tileEntities):
+        """ Adds tile entities to the chunks holding them, getting each chunk once. """
+        for chunk, chunkTileEntities in self._chunksForTags((t for t in tileEntities if 'x' in t), TileEntity):
+            chunk.addTileEntities(chunkTileEntities)
+            chunk.dirty = True
+
     def getEntitiesInBox(self, box):
         entities = []
         for chunk, slices, point in self.getChunkSlices(box):
@@ -7,14 +7,15 @@ Created on Jul 22, 2011
 import blockrotation
 from box import BoundingBox
 from collections import defaultdict
-from entity import Entity, TileEntity
+from entity import Entity, PositionIndex, TileEntity
 import itertools
 from logging import getLogger
 import materials
 from math import floor
 from mclevelbase import ChunkMalformed, ChunkNotPresent, exhaust
 import nbt
-from numpy import argmax, swapaxes, zeros, zeros_like
+import numpy
+from numpy import argmax, bincount, swapaxes, zeros, zeros_like
 import os.path
 
 log = getLogger(__name__)
@@ -198,6 +199,9 @@ class MCLevel(object):
     def addTileEntity(self, entityTag):
         pass
 
+    def addTileEntities(self, tileEntities):
+        pass
+
     def getEntitiesInBox(self, box):
         return []
 
@@ -356,6 +360,10 @@ class MCLevel(object):
 
     from block_fill import fillBlocks, fillBlocksIter
 
+    # --- Views ---
+
+    from block_view import blockView
+
     # --- Transformations ---
     def rotateLeft(self):
         self.Blocks = swapaxes(self.Blocks, 1, 0)[:, ::-1, :]  # x=z; z=-x
@@ -421,44 +429,75 @@ class MCLevel(object):
 class EntityLevel(MCLevel):
     """Abstract subclass of MCLevel that adds default entity behavior"""
 
+    _entityIndex = _tileEntityIndex = None
+
+    def entityIndex(self):
+        """Returns a PositionIndex of Entities, building it again if Entities has changed"""
+        entities = self.Entities  # may move entities first, see MCSchematic
+        index = self._entityIndex
+        if index is None or not index.matches(entities):
+            index = self._entityIndex = PositionIndex(entities, Entity)
+        return index
+
+    def tileEntityIndex(self):
+        """Returns a PositionIndex of TileEntities, building it again if TileEntities has changed"""
+        tileEntities = self.TileEntities
+        index = self._tileEntityIndex
+        if index is None or not index.matches(tileEntities):
+            index = self._tileEntityIndex = PositionIndex(tileEntities, TileEntity)
+        return index
+
+    def entitiesChanged(self):
+        """Call after moving entities or tile entities, so that the entities distributed into fake chunks are
+        distributed again. The position indexes notice moved tags by themselves."""
+        self._entityIndex = self._tileEntityIndex = None
+        self._fakeEntities = None
+
     def getEntitiesInBox(self, box):
         """Returns a list of references to entities in this chunk, whose positions are within box"""
-        return [ent for ent in self.Entities if Entity.pos(ent) in box]
+        return self.entityIndex().tagsInBox(box)
 
     def getTileEntitiesInBox(self, box):
         """Returns a list of references to tile entities in this chunk, whose positions are within box"""
-        return [ent for ent in self.TileEntities if TileEntity.pos(ent) in box]
+        return self.tileEntityIndex().tagsInBox(box)
 
     def removeEntitiesInBox(self, box):
+        index = self.entityIndex()
+        inBox = index.maskInBox(box)
+        entsRemoved = int(inBox.sum())
+        if entsRemoved:
+            self._entityIndex = index.keep(~inBox, self.Entities)
 
-        newEnts = []
-        for ent in self.Entities:
-            if Entity.pos(ent) in box:
-                continue
-            newEnts.append(ent)
-
-        entsRemoved = len(self.Entities) - len(newEnts)
         log.debug("Removed {0} entities".format(entsRemoved))
-
-        self.Entities.value[:] = newEnts
-
         return entsRemoved
 
     def removeTileEntitiesInBox(self, box):
 
         if not hasattr(self, "TileEntities"):
             return
-        newEnts = []
-        for ent in self.TileEntities:
-            if TileEntity.pos(ent) in box:
-                continue
-            newEnts.append(ent)
+        index = self.tileEntityIndex()
+        inBox = index.maskInBox(box)
+        entsRemoved = int(inBox.sum())
+        if entsRemoved:
+            self._tileEntityIndex = index.keep(~inBox, self.TileEntities)
 
-        entsRemoved = len(self.TileEntities) - len(newEnts)
         log.debug("Removed {0} tile entities".format(entsRemoved))
+        return entsRemoved
 
-        self.TileEntities.value[:] = newEnts
+    def removeTileEntitiesInMask(self, box, mask):
+        """Removes the tile entities at the positions where mask is True. mask covers box, a part of this level,
+        with (x, z, y) indices like the array slices given by getChunkSlicesForBox. Returns the number removed."""
+        index = self.tileEntityIndex()
+        inBox = index.maskInBox(box)
+        if not inBox.any():
+            return 0
 
+        x, y, z = (index.positions[inBox] - box.origin).T
+        remove = numpy.zeros(len(inBox), bool)
+        remove[inBox] = mask[x, z, y]
+        entsRemoved = int(remove.sum())
+        if entsRemoved:
+            self._tileEntityIndex = index.keep(~remove, self.TileEntities)
         return entsRemoved
 
     def addEntities(self, entities):
@@ -471,28 +510,46 @@ class EntityLevel(MCLevel):
         self._fakeEntities = None
 
     def tileEntityAt(self, x, y, z):
-        entities = []
-        for entityTag in self.TileEntities:
-            if TileEntity.pos(entityTag) == [x, y, z]:
-                entities.append(entityTag)
-
-        if len(entities) > 1:
-            log.info("Multiple tile entities found: {0}".format(entities))
-        if len(entities) == 0:
-            return None
-
-        return entities[0]
+        return self.tileEntityIndex().at(x, y, z)
 
     def addTileEntity(self, tileEntityTag):
         assert isinstance(tileEntityTag, nbt.TAG_Compound)
 
-        def differentPosition(a):
+        index = self.tileEntityIndex()
+        samePosition = (index.positions == TileEntity.pos(tileEntityTag)).all(axis=1) & index.valid
+        samePosition |= numpy.array([tag is tileEntityTag for tag in index.tags], bool)
+        if samePosition.any():
+            index.keep(~samePosition, self.TileEntities)
 
-            return not ((tileEntityTag is a) or TileEntity.pos(a) == TileEntity.pos(tileEntityTag))
+        self.TileEntities.append(tileEntityTag)
+        self._tileEntityIndex = None
+        self._fakeEntities = None
 
-        self.TileEntities.value[:] = filter(differentPosition, self.TileEntities)
+    def addTileEntities(self, tileEntities):
+        """Adds all of tileEntities as addTileEntity would, looking for tile entities already at their positions
+        once for the whole list"""
+        # a tile entity replaces any added before it at the same position
+        newTags = []
+        positions = set()
+        for tag in reversed(list(tileEntities)):
+            assert isinstance(tag, nbt.TAG_Compound)
+            pos = tuple(TileEntity.pos(tag))
+            if pos not in positions:
+                positions.add(pos)
+                newTags.append(tag)
+        if not newTags:
+            return
+        newTags.reverse()
 
-        self.TileEntities.append(tileEntityTag)
+        added = set(map(id, newTags))
+        index = self.tileEntityIndex()
+        replaced = numpy.array([(valid and tuple(pos) in positions) or id(tag) in added
+                                for tag, pos, valid in zip(index.tags, index.positions.tolist(), index.valid)], bool)
+        if replaced.any():
+            index.keep(~replaced, self.TileEntities)
+
+        self.TileEntities.extend(newTags)
+        self._tileEntityIndex = None
         self._fakeEntities = None
 
     _fakeEntities = None
@@ -501,8 +558,9 @@ class EntityLevel(MCLevel):
         """distribute entities into sublists based on fake chunk position
         _fakeEntities keys are (cx, cz) and values are (Entities, TileEntities)"""
         if self._fakeEntities is None:
+            lists = self.Entities, self.TileEntities  # may move entities first, see MCSchematic
             self._fakeEntities = defaultdict(lambda: (nbt.TAG_List(), nbt.TAG_List()))
-            for i, e in enumerate((self.Entities, self.TileEntities)):
+            for i, e in enumerate(lists):
                 for ent in e:
                     x, y, z = [Entity, TileEntity][i].pos(ent)
                     ecx, ecz = map(lambda x: (int(floor(x)) >> 4), (x, z))
@@ -516,6 +574,10 @@ class ChunkBase(EntityLevel):
     dirty = False
     needsLighting = False
 
+    # True if blockCounts() keeps the counts until the blocks change, so that checking them costs at most one count
+    # per change. Otherwise every call counts the blocks again.
+    keepsBlockCounts = False
+
     chunkPosition = NotImplemented
     Blocks = Data = SkyLight = BlockLight = HeightMap = NotImplemented  # override these!
 
@@ -539,6 +601,10 @@ class ChunkBase(EntityLevel):
     def materials(self):
         return self.world.materials
 
+    def blockCounts(self):
+        """ Returns an array of length id_limit holding the number of blocks of each ID in this chunk. """
+        return bincount(self.Blocks.ravel(), minlength=materials.id_limit)
+
 
     def getChunkSlicesForBox(self, box):
         """
@@ -3,6 +3,8 @@ import mclevelbase
 import mclevel
 import materials
 import infiniteworld
+import block_replace
+import entity_export
 import sys
 import os
 from box import BoundingBox, Vector
@@ -55,6 +57,7 @@ class mce(object):
        {commandPrefix}removeEntities [ <EntityID> ]
        {commandPrefix}dumpSigns [ <filename> ]
        {commandPrefix}dumpChests [ <filename> ]
+       {commandPrefix}exportEntities [ <filename> ]
 
     Chunk commands:
        {commandPrefix}createChunks <box>
@@ -114,6 +117,7 @@ class mce(object):
         "removeentities",
         "dumpsigns",
         "dumpchests",
+        "exportentities",
 
         "createchunks",
         "deletechunks",
@@ -415,7 +419,11 @@ class mce(object):
 
         print "Replacing {0} with {1}".format(blockInfo.name, newBlockInfo.name)
 
-        self.level.fillBlocks(box, newBlockInfo, blocksToReplace=[blockInfo])
+        if box is None and isinstance(self.level, infiniteworld.MCInfdevOldLevel):
+            replaced, skipped = block_replace.replaceBlocksParallel(self.level, None, newBlockInfo, [blockInfo])
+            print "Replaced {0} blocks, skipped {1} chunks.".format(replaced, skipped)
+        else:
+            self.level.fillBlocks(box, newBlockInfo, blocksToReplace=[blockInfo])
 
         self.needsSave = True
         print "Done."
@@ -575,6 +583,13 @@ class mce(object):
         else:
             print "Spawn point: ", self.level.playerSpawnPosition()
 
+    def chunkTileEntities(self, cx, cz):
+        """ Returns the tile entities of a chunk. Infinite worlds read only the tile entities from the chunk. """
+        if isinstance(self.level, infiniteworld.MCInfdevOldLevel):
+            path = "Level/TileEntities/*"
+            return self.level.extractChunkTags(cx, cz, [path])[path]
+        return self.level.getChunk(cx, cz).TileEntities
+
     def _dumpsigns(self, command):
         """
     dumpSigns [ <filename> ]
@@ -612,11 +627,11 @@ class mce(object):
 
         for i, cPos in enumerate(self.level.allChunks):
             try:
-                chunk = self.level.getChunk(*cPos)
+                tileEntities = self.chunkTileEntities(*cPos)
             except mclevelbase.ChunkMalformed:
                 continue
 
-            for tileEntity in chunk.TileEntities:
+            for tileEntity in tileEntities:
                 if tileEntity["id"].value == "Sign":
                     signCount += 1
 
@@ -770,11 +785,11 @@ class mce(object):
 
         for i, cPos in enumerate(self.level.allChunks):
             try:
-                chunk = self.level.getChunk(*cPos)
+                tileEntities = self.chunkTileEntities(*cPos)
             except mclevelbase.ChunkMalformed:
                 continue
 
-            for tileEntity in chunk.TileEntities:
+            for tileEntity in tileEntities:
                 if tileEntity["id"].value == "Chest":
                     chestCount += 1
 
@@ -803,6 +818,25 @@ class mce(object):
 
         outFile.close()
 
+    def _exportentities(self, command):
+        """
+    exportEntities [ <filename> ]
+
+    Saves the ID, position and chunk of every entity and tile entity in
+    the world to a compressed numpy .npz file of columns, for analysis
+    with numpy. With no filename, saves them to <worldname>.npz
+
+    Load the file with pymclevel.entity_export.loadEntityColumns.
+    """
+        if len(command):
+            filename = command[0]
+        else:
+            filename = self.level.displayName + ".npz"
+
+        print "Exporting entities..."
+        entityCount, tileEntityCount = entity_export.exportEntities(self.level, filename)
+        print "Exported {0} entities and {1} tile entities to {2}".format(entityCount, tileEntityCount, filename)
+
     def _removeentities(self, command):
         """
     removeEntities [ [except] [ <EntityID> [ <EntityID> ... ] ] ]
@@ -1010,15 +1044,16 @@ class mce(object):
 
         print "Removing grief matter and surface lava above height {0}...".format(box.miny)
 
-        self.level.fillBlocks(box,
-                              self.level.materials.Air,
-                              blocksToReplace=[self.level.materials.Bedrock,
-                                self.level.materials.Obsidian,
-                                self.level.materials.Fire,
-                                self.level.materials.LavaActive,
-                                self.level.materials.Lava,
-                                ]
-                              )
+        blocksToReplace = [self.level.materials.Bedrock,
+                           self.level.materials.Obsidian,
+                           self.level.materials.Fire,
+                           self.level.materials.LavaActive,
+                           self.level.materials.Lava,
+                           ]
+        if isinstance(self.level, infiniteworld.MCInfdevOldLevel):
+            block_replace.replaceBlocksParallel(self.level, box, self.level.materials.Air, blocksToReplace)
+        else:
+            self.level.fillBlocks(box, self.level.materials.Air, blocksToReplace=blocksToReplace)
         self.needsSave = True
 
     def _time(self, command):
@@ -179,7 +179,7 @@ import nbt
 from numpy import fromstring
 import os
 from pocket import PocketWorld
-from schematic import INVEditChest, MCSchematic, ZipSchematic
+from schematic import INVEditChest, MCSchematic, ZipSchematic, schematicRootName
 import sys
 import traceback
 
@@ -219,6 +219,11 @@ def fromFile(filename, loadInfinite=True, readonly=False):
     if os.path.isdir(filename):
         raise ValueError("Folder {0} was not identified as a Minecraft level.".format(os.path.basename(filename)))
 
+    if schematicRootName(filename) == "Schematic":
+        # Read a piece at a time instead of decompressing the whole file below
+        log.info(u"Detected Schematic.")
+        return MCSchematic(filename=filename)
+
     f = file(filename, 'rb')
     rawdata = f.read()
     f.close()
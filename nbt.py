@@ -27,7 +27,7 @@ import zlib
 from cStringIO import StringIO
 
 import numpy
-from numpy import array, zeros, fromstring
+from numpy import array, zeros, frombuffer
 
 
 log = logging.getLogger(__name__)
@@ -67,6 +67,10 @@ class TAG_Value(object):
     _name = None
     _value = None
 
+    # counts the renames of named tags, so that a TAG_Compound whose lookup misses can tell whether one of its
+    # children may have taken the name since it was indexed
+    renames = 0
+
     @property
     def value(self):
         return self._value
@@ -83,7 +87,11 @@ class TAG_Value(object):
     @name.setter
     def name(self, newVal):
         """Change the TAG's name. Coerced to a unicode."""
-        self._name = unicode(newVal)
+        newVal = unicode(newVal)
+        oldVal = getattr(self, "_name", None)  # unset until the tag is first named
+        if oldVal and newVal != oldVal:
+            TAG_Value.renames += 1
+        self._name = newVal
 
     @classmethod
     def load_from(cls, ctx):
@@ -96,6 +104,17 @@ class TAG_Value(object):
     def __repr__(self):
         return "<%s name=\"%s\" value=%r>" % (str(self.__class__.__name__), self.name, self.value)
 
+    def copy(self):
+        """Returns a copy of this tag and everything in it. Used by copy.deepcopy, and faster than its
+        generic copy since it only copies what each tag class holds."""
+        tag = self.__class__.__new__(self.__class__)
+        tag._name = self._name
+        tag._value = self._value
+        return tag
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
     def write_tag(self, buf):
         buf.write(chr(self.tagID))
 
@@ -106,6 +125,14 @@ class TAG_Value(object):
     def write_value(self, buf):
         buf.write(self.fmt.pack(self.value))
 
+    def encoded_size(self):
+        return self.fmt.size
+
+    def write_into(self, ctx):
+        end = ctx.offset + self.fmt.size
+        ctx.data[ctx.offset:end] = self.fmt.pack(self._value)
+        ctx.offset = end
+
 
 class TAG_Byte(TAG_Value):
     __slots__ = ('_name', '_value')
@@ -162,27 +189,69 @@ class TAG_Byte_Array(TAG_Value):
         self.value = value
 
     def __repr__(self):
-        return "<%s name=%s length=%d>" % (self.__class__, self.name, len(self.value))
+        return "<%s name=%s length=%d>" % (self.__class__, self.name, len(self.view))
 
     __slots__ = ('_name', '_value')
 
     def data_type(self, value):
-        return array(value, self.dtype)
+        # Like _nbt, keep the given array instead of copying it, so a view or a numpy.memmap can be a tag's value.
+        return numpy.asarray(value, self.dtype)
 
     dtype = numpy.dtype('uint8')
 
+    @property
+    def value(self):
+        # Arrays loaded with views=True are read-only views of the loaded data until they are first asked for here.
+        value = self._value
+        if not value.flags.writeable:
+            value = self._value = value.copy()
+        return value
+
+    @value.setter
+    def value(self, newVal):
+        self._value = self.data_type(newVal)
+
+    @property
+    def view(self):
+        """The value without copying it. It may be read-only."""
+        return self._value
+
+    def copy(self):
+        tag = self.__class__.__new__(self.__class__)
+        tag._name = self._name
+        tag._value = self._value.copy()
+        return tag
+
     @classmethod
     def load_from(cls, ctx):
-        data = ctx.data[ctx.offset:]
-        (string_len,) = TAG_Int.fmt.unpack_from(data)
-        value = fromstring(data[4:string_len * cls.dtype.itemsize + 4], cls.dtype)
-        self = cls(value)
-        ctx.offset += string_len * cls.dtype.itemsize + 4
+        (string_len,) = int_fmt.unpack_from(ctx.data, ctx.offset)
+        start = ctx.offset + 4
+        end = start + string_len * cls.dtype.itemsize
+        if ctx.views:
+            value = ctx.data[start:end].view(cls.dtype)
+        else:
+            value = ctx.data[start:end].view(cls.dtype).copy()
+
+        self = cls.__new__(cls)
+        self._name = u""
+        self._value = value
+        ctx.offset = end
         return self
 
     def write_value(self, buf):
-        value_str = self.value.tostring()
-        buf.write(struct.pack(">I%ds" % (len(value_str),), self.value.size, value_str))
+        value_str = self.view.tostring()
+        buf.write(struct.pack(">I%ds" % (len(value_str),), self.view.size, value_str))
+
+    def encoded_size(self):
+        return 4 + self._value.nbytes
+
+    def write_into(self, ctx):
+        value = self._value
+        start = ctx.offset + 4
+        end = start + value.nbytes
+        ctx.data[ctx.offset:start] = array_len_fmt.pack(value.size)
+        ctx.data[start:end] = numpy.ascontiguousarray(value).data
+        ctx.offset = end
 
 
 class TAG_Int_Array(TAG_Byte_Array):
@@ -212,31 +281,36 @@ class TAG_String(TAG_Value):
             self.name = name
         self.value = value
 
-    _decodeCache = {}
-
     __slots__ = ('_name', '_value')
 
     def data_type(self, value):
         if isinstance(value, unicode):
             return value
         else:
-            decoded = self._decodeCache.get(value)
-            if decoded is None:
-                decoded = value.decode('utf-8')
-                self._decodeCache[value] = decoded
-
-            return decoded
-
+            return intern_string(value)
 
     @classmethod
     def load_from(cls, ctx):
-        value = load_string(ctx)
-        return cls(value)
+        self = cls.__new__(cls)
+        self._value = intern_string(load_string(ctx))
+        return self
 
     def write_value(self, buf):
         write_string(self._value, buf)
 
+    def encoded_size(self):
+        return 2 + len(self._value.encode('utf-8'))
+
+    def write_into(self, ctx):
+        encoded = self._value.encode('utf-8')
+        end = ctx.offset + 2 + len(encoded)
+        ctx.data[ctx.offset:end] = string_len_fmt.pack(len(encoded)) + encoded
+        ctx.offset = end
+
 string_len_fmt = struct.Struct(">H")
+int_fmt = struct.Struct(">i")
+array_len_fmt = struct.Struct(">I")
+list_header_fmt = struct.Struct(">bi")
 
 
 def load_string(ctx):
@@ -248,6 +322,32 @@ def load_string(ctx):
     return value
 
 
+# Tag names and short string values repeat in every chunk of a world ("id", "Pos", "Items", "Chest"). Decoding
+# them through this table gives all loaded tags one shared unicode object per distinct string instead of a new
+# copy each. Longer strings are decoded without being remembered, and the table is emptied once it holds
+# INTERN_MAX_COUNT strings so that it can't grow without limit.
+INTERN_MAX_LENGTH = 64
+INTERN_MAX_COUNT = 1 << 16
+_interned = {}
+
+
+def intern_string(encoded):
+    """Returns the UTF-8 encoded str decoded to unicode, sharing one object between equal short strings."""
+    decoded = _interned.get(encoded)
+    if decoded is None:
+        decoded = encoded.decode('utf-8')
+        if len(encoded) <= INTERN_MAX_LENGTH:
+            if len(_interned) >= INTERN_MAX_COUNT:
+                _interned.clear()
+            _interned[encoded] = decoded
+    return decoded
+
+
+def load_name(ctx):
+    encoded = load_string(ctx)
+    return intern_string(encoded)
+
+
 def write_string(string, buf):
     encoded = string.encode('utf-8')
     buf.write(struct.pack(">h%ds" % (len(encoded),), len(encoded), encoded))
@@ -258,13 +358,17 @@ def write_string(string, buf):
 class TAG_Compound(TAG_Value, collections.MutableMapping):
     """A heterogenous list of named tags. Names must be unique within
     the TAG_Compound. Add tags to the compound using the subscript
-    operator [].    This will automatically name the tags."""
+    operator [].    This will automatically name the tags.
+
+    Tags are looked up through an index of the first tag with each name. The
+    index follows changes made with the subscript operator and by assigning
+    to value, but not changes made to the value list in place."""
 
     tagID = TAG_COMPOUND
 
     ALLOW_DUPLICATE_KEYS = False
 
-    __slots__ = ('_name', '_value')
+    __slots__ = ('_name', '_value', '_index', '_indexedRenames')
 
     def __init__(self, value=None, name=""):
         self.value = value or []
@@ -273,6 +377,29 @@ class TAG_Compound(TAG_Value, collections.MutableMapping):
     def __repr__(self):
         return "<%s name='%s' keys=%r>" % (str(self.__class__.__name__), self.name, self.keys())
 
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, newVal):
+        self._value = self.data_type(newVal)
+        self._reindex()
+
+    def copy(self):
+        tag = self.__class__.__new__(self.__class__)
+        tag._name = self._name
+        tag._value = [t.copy() for t in self._value]
+        tag._reindex()
+        return tag
+
+    def _reindex(self):
+        index = {}
+        for tag in self._value:
+            index.setdefault(tag.name, tag)
+        self._index = index
+        self._indexedRenames = TAG_Value.renames
+
     def data_type(self, val):
         for i in val:
             self.check_value(i)
@@ -285,8 +412,12 @@ class TAG_Compound(TAG_Value, collections.MutableMapping):
             raise ValueError("Tag needs a name to be inserted into TAG_Compound: %s" % val)
 
     @classmethod
-    def load_from(cls, ctx):
+    def load_from(cls, ctx, lazy=False):
         self = cls()
+        self._load_children(ctx, lazy)
+        return self
+
+    def _load_children(self, ctx, lazy):
         while ctx.offset < len(ctx.data):
             tag_type = ctx.data[ctx.offset]
             ctx.offset += 1
@@ -294,36 +425,55 @@ class TAG_Compound(TAG_Value, collections.MutableMapping):
             if tag_type == 0:
                 break
 
-            tag_name = load_string(ctx)
-            tag = tag_classes[tag_type].load_from(ctx)
-            tag.name = tag_name
+            encoded = load_string(ctx)
+            tag_name = intern_string(encoded)
+            if lazy:
+                tag = load_lazy(ctx, tag_type)
+            else:
+                tag = tag_classes[tag_type].load_from(ctx)
+            tag._name = tag_name
 
             self._value.append(tag)
+            self._index.setdefault(tag_name, tag)
 
-        return self
-
-    def save(self, filename_or_buf=None, compressed=True):
+    def save(self, filename_or_buf=None, compressed=True, compressor=None):
         """
         Save the TAG_Compound element to a file. Since this element is the root tag, it can be named.
 
         Pass a filename to save the data to a file. Pass a file-like object (with a read() method)
         to write the data to that object. Pass nothing to return the data as a string.
+
+        Uncompressed data is written into a single buffer allocated at its final size. Compressed data is
+        written in blocks that are passed to the compressor as they fill, so the uncompressed data is never held
+        in memory all at once. Pass a zlib compressobj as compressor to use it instead of gzip.
         """
         if self.name is None:
             self.name = ""
 
-        buf = StringIO()
-        self.write_tag(buf)
-        self.write_name(buf)
-        self.write_value(buf)
-        data = buf.getvalue()
+        if compressed and compressor is None:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip format
 
-        if compressed:
-            gzio = StringIO()
-            gz = gzip.GzipFile(fileobj=gzio, mode='wb')
-            gz.write(data)
-            gz.close()
-            data = gzio.getvalue()
+        header = tag_header(self)
+        ctx = save_ctx()
+        if compressor is None:
+            size = len(header) + self.encoded_size()
+            ctx.data = bytearray(size)
+        else:
+            ctx.data = bytearray(save_ctx.block_size)
+            ctx.flush_size = save_ctx.block_size
+            ctx.compressor = compressor
+            ctx.output = []
+
+        ctx.data[0:len(header)] = header
+        ctx.offset = len(header)
+        self.write_into(ctx)
+
+        if compressor is None:
+            data = str(ctx.data)
+        else:
+            ctx.flush()
+            ctx.output.append(compressor.flush())
+            data = "".join(ctx.output)
 
         if filename_or_buf is None:
             return data
@@ -342,21 +492,48 @@ class TAG_Compound(TAG_Value, collections.MutableMapping):
 
         buf.write("\x00")
 
+    def encoded_size(self):
+        return sum(len(tag_header(tag)) + tag.encoded_size() for tag in self._value) + 1
+
+    def write_into(self, ctx):
+        for tag in self._value:
+            if ctx.offset >= ctx.flush_size:
+                ctx.flush()
+
+            header = tag_header(tag)
+            end = ctx.offset + len(header)
+            ctx.data[ctx.offset:end] = header
+            ctx.offset = end
+            tag.write_into(ctx)
+
+        ctx.data[ctx.offset:ctx.offset + 1] = "\x00"
+        ctx.offset += 1
+
     # --- collection functions ---
 
+    def _lookup(self, key):
+        tag = self._index.get(key)
+        if tag is None:
+            if self._indexedRenames == TAG_Value.renames:
+                return None
+        elif tag._name == key:
+            return tag
+
+        # a tag was renamed since it was indexed
+        self._reindex()
+        return self._index.get(key)
+
     def __getitem__(self, key):
-        # hits=filter(lambda x: x.name==key, self.value)
-        # if(len(hits)): return hits[0]
-        for tag in self.value:
-            if tag.name == key:
-                return tag
-        raise KeyError("Key {0} not found".format(key))
+        tag = self._lookup(key)
+        if tag is None:
+            raise KeyError("Key {0} not found".format(key))
+        return tag
 
     def __iter__(self):
         return itertools.imap(lambda x: x.name, self.value)
 
     def __contains__(self, key):
-        return key in map(lambda x: x.name, self.value)
+        return self._lookup(key) is not None
 
     def __len__(self):
         return self.value.__len__()
@@ -365,21 +542,26 @@ class TAG_Compound(TAG_Value, collections.MutableMapping):
         """Automatically wraps lists and tuples in a TAG_List, and wraps strings
         and unicodes in a TAG_String."""
         if isinstance(item, (list, tuple)):
-            item = TAG_List(item)
+            item = tag_classes[TAG_LIST](item)
         elif isinstance(item, basestring):
-            item = TAG_String(item)
+            item = tag_classes[TAG_STRING](item)
 
         item.name = key
         self.check_value(item)
 
         # remove any items already named "key".
         if not self.ALLOW_DUPLICATE_KEYS:
-            self._value = filter(lambda x: x.name != key, self._value)
+            if self._lookup(key) is not None:
+                self._value = filter(lambda x: x.name != key, self._value)
+            self._index[item.name] = item
+        else:
+            self._index.setdefault(item.name, item)
 
         self._value.append(item)
 
     def __delitem__(self, key):
         self.value.__delitem__(self.value.index(self[key]))
+        self._reindex()
 
     def add(self, value):
         if value.name is None:
@@ -423,30 +605,52 @@ class TAG_List(TAG_Value, collections.MutableSequence):
         assert all([x.tagID == self.list_type for x in val])
         return list(val)
 
-
+    def copy(self):
+        tag = self.__class__.__new__(self.__class__)
+        tag._name = self._name
+        tag.list_type = self.list_type
+        tag._value = [t.copy() for t in self._value]
+        return tag
 
     @classmethod
-    def load_from(cls, ctx):
+    def load_from(cls, ctx, lazy=False):
         self = cls()
+        self._load_items(ctx, lazy)
+        return self
+
+    def _load_items(self, ctx, lazy):
         self.list_type = ctx.data[ctx.offset]
         ctx.offset += 1
 
-        (list_length,) = TAG_Int.fmt.unpack_from(ctx.data, ctx.offset)
-        ctx.offset += TAG_Int.fmt.size
+        (list_length,) = int_fmt.unpack_from(ctx.data, ctx.offset)
+        ctx.offset += int_fmt.size
 
         for i in range(list_length):
-            tag = tag_classes[self.list_type].load_from(ctx)
+            if lazy:
+                tag = load_lazy(ctx, self.list_type)
+            else:
+                tag = tag_classes[self.list_type].load_from(ctx)
             self.append(tag)
 
-        return self
-
 
     def write_value(self, buf):
        buf.write(chr(self.list_type))
-       buf.write(TAG_Int.fmt.pack(len(self.value)))
+       buf.write(int_fmt.pack(len(self.value)))
        for i in self.value:
            i.write_value(buf)
 
+    def encoded_size(self):
+        return 5 + sum(tag.encoded_size() for tag in self._value)
+
+    def write_into(self, ctx):
+        end = ctx.offset + 5
+        ctx.data[ctx.offset:end] = list_header_fmt.pack(self.list_type, len(self._value))
+        ctx.offset = end
+        for tag in self._value:
+            if ctx.offset >= ctx.flush_size:
+                ctx.flush()
+            tag.write_into(ctx)
+
     def check_tag(self, value):
         if value.tagID != self.list_type:
             raise TypeError("Invalid type %s for TAG_List(%s)" % (value.__class__, tag_classes[self.list_type]))
@@ -487,10 +691,235 @@ class TAG_List(TAG_Value, collections.MutableSequence):
         self.value.insert(index, value)
 
 
+# Functions in this module find the classes here, since the names of the classes may be replaced by those from _nbt
 tag_classes = { c.tagID: c for c in (TAG_Byte, TAG_Short, TAG_Int, TAG_Long, TAG_Float, TAG_Double, TAG_String,
     TAG_Byte_Array, TAG_List, TAG_Compound, TAG_Int_Array, TAG_Short_Array) }
 
 
+# --- Saving ---
+
+# Headers are remembered for short names only, and the table is emptied once it holds INTERN_MAX_COUNT headers, in
+# the same way as the intern_string table, so that saving tags with many distinct names can't grow it without limit.
+_tag_headers = {}
+
+
+def tag_header(tag):
+    """Returns the encoded ID and name that precede a tag's value in a compound."""
+    key = (tag.tagID, tag._name)
+    header = _tag_headers.get(key)
+    if header is None:
+        header = chr(tag.tagID)
+        if tag._name is not None:
+            encoded = tag._name.encode('utf-8')
+            header += string_len_fmt.pack(len(encoded)) + encoded
+            if len(encoded) > INTERN_MAX_LENGTH:
+                return header
+        if len(_tag_headers) >= INTERN_MAX_COUNT:
+            _tag_headers.clear()
+        _tag_headers[key] = header
+    return header
+
+
+class save_ctx(object):
+    """Where tags are written by write_into. Tags write their encoded value into data at offset and advance
+    offset past it. Compounds and lists call flush between their items once offset passes flush_size."""
+    block_size = 1 << 16
+    flush_size = float('inf')
+    compressor = None
+
+    def flush(self):
+        self.output.append(self.compressor.compress(buffer(self.data, 0, self.offset)))
+        self.offset = 0
+
+
+# --- Lazy loading ---
+
+def _lazy_method(name):
+    def method(self, *args, **kw):
+        # the tag may already have been materialized if this method was looked up before another call
+        if hasattr(self, "_raw"):
+            self._materialize()
+        return getattr(self, name)(*args, **kw)
+
+    method.__name__ = name
+    return method
+
+
+class LazyTAG_Compound(TAG_Compound):
+    """A TAG_Compound loaded by load(lazy=True). Its children are only decoded from the
+    original buffer when it is first accessed, at which point it turns into an ordinary
+    TAG_Compound. Until then, saving it copies its original bytes."""
+
+    __slots__ = ()
+
+    def __init__(self, data, start, end, views):
+        self._raw = (data, start, end, views)
+
+    def _materialize(self):
+        data, start, end, views = self._raw
+        del self._raw
+        self.__class__ = tag_classes[TAG_COMPOUND]
+        self._value = []
+        self._index = {}
+        self._indexedRenames = TAG_Value.renames
+
+        ctx = load_ctx()
+        ctx.data = data
+        ctx.offset = start
+        ctx.views = views
+        self._load_children(ctx, True)
+
+    @property
+    def value(self):
+        self._materialize()
+        return self._value
+
+    @value.setter
+    def value(self, newVal):
+        del self._raw
+        self.__class__ = tag_classes[TAG_COMPOUND]
+        self.value = newVal
+
+    def write_value(self, buf):
+        data, start, end, views = self._raw
+        buf.write(data[start:end].data)
+
+    def encoded_size(self):
+        data, start, end, views = self._raw
+        return end - start
+
+    def write_into(self, ctx):
+        data, start, end, views = self._raw
+        offset = ctx.offset + end - start
+        ctx.data[ctx.offset:offset] = data[start:end].data
+        ctx.offset = offset
+
+    def copy(self):
+        tag = LazyTAG_Compound(*self._raw)
+        tag._name = self._name
+        return tag
+
+    for _name in ("__getitem__", "__iter__", "__contains__", "__len__", "__setitem__", "__delitem__", "get_all"):
+        locals()[_name] = _lazy_method(_name)
+    del _name
+
+
+class LazyTAG_List(TAG_List):
+    """A TAG_List loaded by load(lazy=True). Its items are only decoded from the original
+    buffer when it is first accessed, at which point it turns into an ordinary TAG_List.
+    Until then, saving it copies its original bytes."""
+
+    __slots__ = ()
+
+    def __init__(self, data, start, end, views):
+        self._raw = (data, start, end, views)
+        self.list_type = data[start]
+
+    def _materialize(self):
+        data, start, end, views = self._raw
+        del self._raw
+        self.__class__ = tag_classes[TAG_LIST]
+        self._value = []
+
+        ctx = load_ctx()
+        ctx.data = data
+        ctx.offset = start
+        ctx.views = views
+        self._load_items(ctx, True)
+
+    @property
+    def value(self):
+        self._materialize()
+        return self._value
+
+    @value.setter
+    def value(self, newVal):
+        del self._raw
+        self.__class__ = tag_classes[TAG_LIST]
+        self.value = newVal
+
+    def write_value(self, buf):
+        data, start, end, views = self._raw
+        buf.write(data[start:end].data)
+
+    def encoded_size(self):
+        data, start, end, views = self._raw
+        return end - start
+
+    def write_into(self, ctx):
+        data, start, end, views = self._raw
+        offset = ctx.offset + end - start
+        ctx.data[ctx.offset:offset] = data[start:end].data
+        ctx.offset = offset
+
+    def copy(self):
+        tag = LazyTAG_List(*self._raw)
+        tag._name = self._name
+        return tag
+
+    for _name in ("__iter__", "__contains__", "__getitem__", "__len__", "__setitem__", "__delitem__", "insert"):
+        locals()[_name] = _lazy_method(_name)
+    del _name
+
+
+_fixed_sizes = {TAG_BYTE: 1, TAG_SHORT: 2, TAG_INT: 4, TAG_LONG: 8, TAG_FLOAT: 4, TAG_DOUBLE: 8}
+_array_item_sizes = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_SHORT_ARRAY: 2}
+
+
+def skip_value(data, offset, tag_type):
+    """Returns the offset just past the value of a tag of type tag_type starting at offset,
+    without decoding it."""
+    size = _fixed_sizes.get(tag_type)
+    if size is not None:
+        return offset + size
+
+    size = _array_item_sizes.get(tag_type)
+    if size is not None:
+        (length,) = int_fmt.unpack_from(data, offset)
+        return offset + 4 + length * size
+
+    if tag_type == TAG_STRING:
+        (length,) = string_len_fmt.unpack_from(data, offset)
+        return offset + 2 + length
+
+    if tag_type == TAG_LIST:
+        item_type = data[offset]
+        (length,) = int_fmt.unpack_from(data, offset + 1)
+        offset += 5
+        size = _fixed_sizes.get(item_type)
+        if size is not None:
+            return offset + length * size
+        for i in xrange(length):
+            offset = skip_value(data, offset, item_type)
+        return offset
+
+    if tag_type == TAG_COMPOUND:
+        while True:
+            child_type = data[offset]
+            offset += 1
+            if child_type == 0:
+                return offset
+            (length,) = string_len_fmt.unpack_from(data, offset)
+            offset = skip_value(data, offset + 2 + length, child_type)
+
+    raise NBTFormatError("Unknown tag type %d" % tag_type)
+
+
+def load_lazy(ctx, tag_type):
+    """Loads a tag of type tag_type from ctx. Compounds and lists are skipped over and
+    returned as lazy tags, other tags are decoded as usual."""
+    if tag_type == TAG_COMPOUND:
+        tag_class = LazyTAG_Compound
+    elif tag_type == TAG_LIST:
+        tag_class = LazyTAG_List
+    else:
+        return tag_classes[tag_type].load_from(ctx)
+
+    start = ctx.offset
+    ctx.offset = skip_value(ctx.data, start, tag_type)
+    return tag_class(ctx.data, start, ctx.offset, ctx.views)
+
+
 
 def gunzip(data):
     return gzip.GzipFile(fileobj=StringIO(data)).read()
@@ -504,11 +933,18 @@ def try_gunzip(data):
     return data
 
 
-def load(filename="", buf=None):
+def load(filename="", buf=None, lazy=False, views=False):
     """
     Unserialize data from an NBT file and return the root TAG_Compound object. If filename is passed,
     reads from the file, otherwise uses data from buf. Buf can be a buffer object with a read() method or a string
     containing NBT data.
+
+    If lazy is True, compounds and lists below the root are only decoded when they are first accessed, and
+    any that are never accessed are saved by copying their original bytes.
+
+    If views is True, array tags are loaded as read-only views of the decompressed data instead of copies, which
+    keeps the whole decompressed data in memory while any of them is in use. Reading an array tag's view does not
+    copy it, while reading its value makes a writable copy the first time.
     """
     if filename:
         buf = file(filename, "rb")
@@ -516,14 +952,14 @@ def load(filename="", buf=None):
     if hasattr(buf, "read"):
         buf = buf.read()
 
-    return _load_buffer(try_gunzip(buf))
+    return _load_buffer(try_gunzip(buf), lazy, views)
 
 class load_ctx(object):
-    pass
+    views = False
 
-def _load_buffer(buf):
+def _root_ctx(buf):
     if isinstance(buf, str):
-        buf = fromstring(buf, 'uint8')
+        buf = frombuffer(buf, 'uint8')
     data = buf
 
     if not len(data):
@@ -538,24 +974,149 @@ def _load_buffer(buf):
     ctx = load_ctx()
     ctx.offset = 1
     ctx.data = data
+    return ctx
+
 
-    tag_name = load_string(ctx)
-    tag = TAG_Compound.load_from(ctx)
-    tag.name = tag_name
+def _load_buffer(buf, lazy=False, views=False):
+    ctx = _root_ctx(buf)
+    ctx.views = views
+    tag_name = load_name(ctx)
+    tag = tag_classes[TAG_COMPOUND].load_from(ctx, lazy)
+    tag._name = tag_name
 
     return tag
 
 
-__all__ = [a.__name__ for a in tag_classes.itervalues()] + ["load", "gunzip"]
+# --- Path extraction ---
+
+def extract(buf, paths):
+    """
+    Reads only the tags at the given paths from NBT data, skipping over everything else without decoding it.
+    Buf is anything load() accepts as buf. Returns a dict mapping each path to a list of the tags found there,
+    in file order.
+
+    Paths are names separated by slashes, starting below the root tag. A * matches every child of a compound
+    and every item of a list, and a number matches one item of a list:
+
+        found = nbt.extract(data, ["Level/xPos", "Level/TileEntities/*/id"])
+        xPos = found["Level/xPos"][0].value
+    """
+    if hasattr(buf, "read"):
+        buf = buf.read()
+
+    ctx = _root_ctx(try_gunzip(buf))
+    load_string(ctx)
+
+    tree = {}
+    results = {}
+    for path in paths:
+        node = tree
+        for part in path.split("/"):
+            node = node.setdefault(part, {})
+        node.setdefault(None, []).append(path)  # the key None holds the paths ending at this node
+        results[path] = []
+
+    _extract_compound(ctx, tree, results)
+    return results
+
+
+def _merge_nodes(a, b):
+    node = dict(a)
+    for key, child in b.iteritems():
+        if key is None:
+            node[None] = a.get(None, []) + child
+        elif key in node:
+            node[key] = _merge_nodes(node[key], child)
+        else:
+            node[key] = child
+    return node
+
+
+def _child_node(node, key):
+    child = node.get(key)
+    wildcard = node.get("*")
+    if child is None:
+        return wildcard
+    if wildcard is None:
+        return child
+    return _merge_nodes(child, wildcard)
+
+
+def _extract_value(ctx, tag_type, node, results):
+    paths = node.get(None)
+    if paths is not None:
+        start = ctx.offset
+        tag = tag_classes[tag_type].load_from(ctx)
+        for path in paths:
+            results[path].append(tag)
+        if len(node) == 1:
+            return
+
+        # paths below this one were also asked for
+        end = ctx.offset
+        ctx.offset = start
+        _extract_value(ctx, tag_type, dict((k, v) for k, v in node.iteritems() if k is not None), results)
+        ctx.offset = end
+
+    elif tag_type == TAG_COMPOUND:
+        _extract_compound(ctx, node, results)
+    elif tag_type == TAG_LIST:
+        _extract_list(ctx, node, results)
+    else:
+        ctx.offset = skip_value(ctx.data, ctx.offset, tag_type)
+
+
+def _extract_compound(ctx, node, results):
+    data = ctx.data
+    while True:
+        tag_type = data[ctx.offset]
+        ctx.offset += 1
+        if tag_type == 0:
+            return
+
+        child = _child_node(node, load_string(ctx))
+        if child is None:
+            ctx.offset = skip_value(data, ctx.offset, tag_type)
+        else:
+            _extract_value(ctx, tag_type, child, results)
+
+
+def _extract_list(ctx, node, results):
+    if "*" not in node and not any(key.isdigit() for key in node if key is not None):
+        ctx.offset = skip_value(ctx.data, ctx.offset, TAG_LIST)
+        return
+
+    list_type = ctx.data[ctx.offset]
+    (list_length,) = int_fmt.unpack_from(ctx.data, ctx.offset + 1)
+    ctx.offset += 5
+
+    for i in xrange(list_length):
+        child = _child_node(node, str(i))
+        if child is None:
+            ctx.offset = skip_value(ctx.data, ctx.offset, list_type)
+        else:
+            _extract_value(ctx, list_type, child, results)
+
+
+__all__ = [a.__name__ for a in tag_classes.itervalues()] + ["load", "extract", "gunzip", "backend"]
 
 import nbt_util
 
 TAG_Value.__str__ = nbt_util.nested_string
 
+# The load function of each available implementation, for comparing them. backend names the one in use.
+loaders = {"python": load}
+
 try:
     #noinspection PyUnresolvedReferences
-    from _nbt import (load, TAG_Byte, TAG_Short, TAG_Int, TAG_Long, TAG_Float, TAG_Double, TAG_String,
+    import _nbt
+    from _nbt import (load, extract, TAG_Byte, TAG_Short, TAG_Int, TAG_Long, TAG_Float, TAG_Double, TAG_String,
     TAG_Byte_Array, TAG_List, TAG_Compound, TAG_Int_Array, TAG_Short_Array, NBTFormatError)
+    _nbt.nested_string = nbt_util.nested_string
+    loaders["cython"] = load
+    backend = "cython"
 except ImportError:
-    pass
+    backend = "python"
+    log.warning("The _nbt extension is not built, using the pure-Python NBT implementation. Loading and saving "
+                "chunks will be several times slower.")
 
@@ -1,6 +1,8 @@
+from cStringIO import StringIO
 import logging
 import os
 import struct
+import zipfile
 import zlib
 
 from numpy import fromstring
@@ -58,16 +60,27 @@ class MCRegionFile(object):
                 filesize = self.SECTOR_BYTES * 2
                 f.truncate(filesize)
 
-            f.seek(0)
-            offsetsData = f.read(self.SECTOR_BYTES)
-            modTimesData = f.read(self.SECTOR_BYTES)
+            self._readHeader(f, filesize)
+
+        if self._markUsedSectors():
+            self.repair()
+
+        log.info("Found region file {file} with {used}/{total} sectors used and {chunks} chunks present".format(
+             file=os.path.basename(path), used=self.usedSectors, total=self.sectorCount, chunks=self.chunkCount))
 
-            self.freeSectors = [True] * (filesize / self.SECTOR_BYTES)
-            self.freeSectors[0:2] = False, False
+    def _readHeader(self, f, filesize):
+        f.seek(0)
+        offsetsData = f.read(self.SECTOR_BYTES).ljust(self.SECTOR_BYTES, "\0")
+        modTimesData = f.read(self.SECTOR_BYTES).ljust(self.SECTOR_BYTES, "\0")
 
-            self.offsets = fromstring(offsetsData, dtype='>u4')
-            self.modTimes = fromstring(modTimesData, dtype='>u4')
+        self.freeSectors = [True] * max(2, filesize / self.SECTOR_BYTES)
+        self.freeSectors[0:2] = False, False
 
+        self.offsets = fromstring(offsetsData, dtype='>u4')
+        self.modTimes = fromstring(modTimesData, dtype='>u4')
+
+    def _markUsedSectors(self):
+        """ Marks the sectors used by chunks in freeSectors. Returns True if the region file needs repairs. """
         needsRepair = False
 
         for offset in self.offsets:
@@ -84,11 +97,7 @@ class MCRegionFile(object):
                     needsRepair = True
                 self.freeSectors[i] = False
 
-        if needsRepair:
-            self.repair()
-
-        log.info("Found region file {file} with {used}/{total} sectors used and {chunks} chunks present".format(
-             file=os.path.basename(path), used=self.usedSectors, total=self.sectorCount, chunks=self.chunkCount))
+        return needsRepair
 
     def __repr__(self):
         return "%s(\"%s\")" % (self.__class__.__name__, self.path)
@@ -345,3 +354,111 @@ class MCRegionFile(object):
 
 class ChunkTooBig(ValueError):
     pass
+
+
+def zipMemberDataOffset(f, info):
+    """ Returns the offset of the data of the zip member described by the ZipInfo info in the archive file f. """
+    f.seek(info.header_offset)
+    header = f.read(30)
+    if header[:4] != "PK\x03\x04":
+        raise zipfile.BadZipfile("Bad local file header for {0}".format(info.filename))
+    nameLength, extraLength = struct.unpack("<HH", header[26:30])
+    return info.header_offset + 30 + nameLength + extraLength
+
+
+class ZipMemberFile(object):
+    """ Reads a zip member stored without compression in place, as if it were a file of its own. """
+    def __init__(self, path, info):
+        self._file = file(path, "rb")
+        self.start = zipMemberDataOffset(self._file, info)
+        self.size = info.compress_size
+        self.seek(0)
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.tell()
+        elif whence == 2:
+            offset += self.size
+        elif whence != 0:
+            raise ValueError("Invalid whence ({0})".format(whence))
+        if offset < 0:
+            raise IOError("Cannot seek before the start of the zip member")
+        self._file.seek(self.start + offset)
+
+    def tell(self):
+        return self._file.tell() - self.start
+
+    def read(self, size=-1):
+        # Reads stop at the end of the member instead of going on into the rest of the archive
+        remaining = max(0, self.size - self.tell())
+        if size < 0 or size > remaining:
+            size = remaining
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def readZipMember(path, info):
+    """ Returns the uncompressed data of the zip member described by info in the archive at path. """
+    with ZipMemberFile(path, info) as f:
+        data = f.read(info.compress_size)
+    if info.compress_type == zipfile.ZIP_DEFLATED:
+        data = zlib.decompress(data, -zlib.MAX_WBITS)
+    elif info.compress_type != zipfile.ZIP_STORED:
+        raise zipfile.BadZipfile("Unsupported compression method {0} for {1}".format(info.compress_type, info.filename))
+    return data
+
+
+class ZipRegionFile(MCRegionFile):
+    """
+    A region file read from a member of a zip archive without extracting it. A member stored without compression is
+    read in place from the archive. A compressed member is decompressed into memory when the region file is opened.
+
+    Zip region files are read-only. To change a region, copy the member out to a file and open that instead.
+    """
+    def __init__(self, zipFile, info, regionCoords):
+        self.path = zipFile.filename
+        self.info = info
+        self.regionCoords = regionCoords
+        self._file = None
+        self._data = None
+        if info.compress_type != zipfile.ZIP_STORED:
+            self._data = zipFile.read(info)
+
+        with self.file as f:
+            self._readHeader(f, (info.file_size + self.SECTOR_BYTES - 1) & ~(self.SECTOR_BYTES - 1))
+
+        if self._markUsedSectors():
+            log.warning("Region file {0} in {1} is damaged. It will be repaired if it is changed.".format(
+                        info.filename, os.path.basename(self.path)))
+
+    def __repr__(self):
+        return "%s(\"%s\", \"%s\")" % (self.__class__.__name__, self.path, self.info.filename)
+
+    @property
+    def file(self):
+        if self._data is not None:
+            return notclosing(StringIO(self._data))
+        return ZipMemberFile(self.path, self.info)
+
+    def close(self):
+        pass
+
+    def repair(self):
+        raise IOError("Region files in zip archives are read-only")
+
+    def _saveChunk(self, cx, cz, data, format):
+        raise IOError("Region files in zip archives are read-only")
+
+    def setOffset(self, cx, cz, offset):
+        raise IOError("Region files in zip archives are read-only")
+
+    def setTimestamp(self, cx, cz, timestamp=None):
+        raise IOError("Region files in zip archives are read-only")
@@ -5,19 +5,28 @@ Created on Jul 22, 2011
 '''
 import atexit
 from contextlib import closing
+import copy
+from datetime import datetime
+import multiprocessing
 import os
 import shutil
+import struct
+import time
 import zipfile
+import zlib
 from logging import getLogger
 
 import blockrotation
 from box import BoundingBox
+from entity import Entity, TileEntity
 import infiniteworld
-from level import MCLevel, EntityLevel
+from level import MCLevel, EntityLevel, FakeChunk
 from materials import alphaMaterials, MCMaterials, namedMaterials
 from mclevelbase import exhaust
 import nbt
-from numpy import array, swapaxes, uint8, zeros, resize
+import numpy
+from numpy import arange, array, asarray, frombuffer, swapaxes, uint8, zeros, resize
+from regionfile import readZipMember, ZipMemberFile, ZipRegionFile
 
 log = getLogger(__name__)
 
@@ -27,7 +36,13 @@ __all__ = ['MCSchematic', 'INVEditChest']
 class MCSchematic (EntityLevel):
     materials = alphaMaterials
 
-    def __init__(self, shape=None, root_tag=None, filename=None, mats='Alpha'):
+    # Rotations and flips only take views of the arrays. The rotation of the block data and the relocation of the
+    # entities they call for are composed here, and done once when the arrays or entities are next used.
+    _pendingRotation = None  # a blockrotation table to apply to Data
+    _arraysReoriented = False  # the arrays are views that should be copied to contiguous arrays
+    _pendingTransform = None  # a SchematicTransform to apply to the entities
+
+    def __init__(self, shape=None, root_tag=None, filename=None, mats='Alpha', memmap=False):
         """ shape is (x,y,z) for a new level's shape.  if none, takes
         root_tag as a TAG_Compound for an existing schematic file.  if
         none, tries to read the tag from filename.  if none, results
@@ -44,12 +59,18 @@ class MCSchematic (EntityLevel):
         rotateLeft swaps the axes of the different arrays.  because of this, the Width, Height, and Length
         reflect the current dimensions of the schematic rather than the ones specified in the NBT structure.
         I'm not sure what happens when I try to re-save a rotated schematic.
+
+        If memmap is True, the Blocks and Data arrays are backed by scratch files (see scratchArray) instead of
+        memory, so the schematic may be larger than the available memory.
         """
+        allocate = scratchArray if memmap else zeros
+        self._allocate = allocate
 
+        blocks = None
         if filename:
             self.filename = filename
             if None is root_tag and os.path.exists(filename):
-                root_tag = nbt.load(filename)
+                root_tag, blocks = readSchematicFile(filename, allocate)
         else:
             self.filename = None
 
@@ -70,8 +91,11 @@ class MCSchematic (EntityLevel):
             l = self.root_tag["Length"].value
             h = self.root_tag["Height"].value
 
-            self._Blocks = self.root_tag["Blocks"].value.astype('uint16').reshape(h, l, w) # _Blocks is y, z, x
-            del self.root_tag["Blocks"]
+            if blocks is not None:
+                self._Blocks = blocks  # read by readSchematicFile
+            else:
+                self._Blocks = self.root_tag["Blocks"].value.astype('uint16').reshape(h, l, w) # _Blocks is y, z, x
+                del self.root_tag["Blocks"]
             if "AddBlocks" in self.root_tag:
                 # Use WorldEdit's "AddBlocks" array to load and store the 4 high bits of a block ID.
                 # Unlike Minecraft's NibbleArrays, this array stores the first block's bits in the
@@ -96,7 +120,13 @@ class MCSchematic (EntityLevel):
                 self._Blocks |= add[:size].reshape(h, l, w)
                 del self.root_tag["AddBlocks"]
 
-            self.root_tag["Data"].value = self.root_tag["Data"].value.reshape(h, l, w)
+            if self.root_tag["Data"].value.shape != (h, l, w):
+                self.root_tag["Data"].value = self.root_tag["Data"].value.reshape(h, l, w)
+
+            if memmap and blocks is None:
+                # move the arrays loaded from root_tag to scratch files
+                self._Blocks = _copyInto(allocate(self._Blocks.shape, 'uint16'), self._Blocks)
+                self.root_tag["Data"].value = _copyInto(allocate((h, l, w), 'uint8'), self.root_tag["Data"].value)
 
             if "Biomes" in self.root_tag:
                 self.root_tag["Biomes"].value.shape = (l, w)
@@ -112,14 +142,70 @@ class MCSchematic (EntityLevel):
             root_tag["TileEntities"] = nbt.TAG_List()
             root_tag["Materials"] = nbt.TAG_String(self.materials.name)
 
-            self._Blocks = zeros((shape[1], shape[2], shape[0]), 'uint16')
-            root_tag["Data"] = nbt.TAG_Byte_Array(zeros((shape[1], shape[2], shape[0]), uint8))
+            self._Blocks = allocate((shape[1], shape[2], shape[0]), 'uint16')
+            root_tag["Data"] = nbt.TAG_Byte_Array(allocate((shape[1], shape[2], shape[0]), uint8))
 
             root_tag["Biomes"] = nbt.TAG_Byte_Array(zeros((shape[2], shape[0]), uint8))
 
             self.root_tag = root_tag
 
-        self.root_tag["Data"].value &= 0xF  # discard high bits
+        for slab in self._layerSlabs():
+            self.root_tag["Data"].value[slab] &= 0xF  # discard high bits
+
+    def _reorient(self, rotationTable=None):
+        """ Records a rotation or flip whose views of the arrays have been taken. Composes rotationTable, if given,
+        with the pending rotation of the block data. Returns the pending SchematicTransform of the entities. """
+        self.entitiesChanged()
+        self._arraysReoriented = True
+        if rotationTable is not None:
+            if self._pendingRotation is None:
+                self._pendingRotation = rotationTable
+            else:
+                self._pendingRotation = blockrotation.ComposeRotations(self._pendingRotation, rotationTable)
+
+        if self._pendingTransform is None:
+            self._pendingTransform = SchematicTransform()
+        return self._pendingTransform
+
+    def _applyRotation(self):
+        """ Copies the reoriented arrays to contiguous ones, rotating the block data on the way, in one pass. """
+        if not self._arraysReoriented:
+            return
+
+        blocks = self._Blocks
+        data = self.root_tag["Data"].value
+        table = self._pendingRotation
+        newBlocks = self._allocate(blocks.shape, blocks.dtype)
+        newData = self._allocate(data.shape, data.dtype)
+        for slab in self._layerSlabs():
+            newBlocks[slab] = blocks[slab]
+            if table is None:
+                newData[slab] = data[slab]
+            else:
+                newData[slab] = blockrotation.RotatedData(table, blocks[slab], data[slab])
+
+        self._Blocks = newBlocks
+        self.root_tag["Data"].value = newData
+        self._pendingRotation = None
+        self._arraysReoriented = False
+
+    def _relocateEntities(self):
+        transform = self._pendingTransform
+        if transform is None:
+            return
+        self._pendingTransform = None
+        log.info(u"Relocating entities...")
+        transform.apply(self.root_tag["Entities"], self.root_tag["TileEntities"])
+        self.entitiesChanged()
+
+    def _layerSlabs(self):
+        """ Returns slices that split the arrays, which are indexed [y, z, x], into slabs of layers of about
+        SchematicStreamReader.blockSize blocks. Working a slab at a time keeps temporary arrays small. """
+        h, l, w = self._Blocks.shape
+        layers = max(1, SchematicStreamReader.blockSize / max(1, l * w))
+        if l * w & 1:
+            layers += layers & 1  # every slab but the last starts AddBlocks on a whole byte
+        return [slice(y, y + layers) for y in xrange(0, h, layers)]
 
 
     def saveToFile(self, filename=None):
@@ -130,33 +216,38 @@ class MCSchematic (EntityLevel):
             raise IOError, u"Attempted to save an unnamed schematic in place"
 
         self.Materials = self.materials.name
+        self._applyRotation()
+        self._relocateEntities()
 
-        self.root_tag["Blocks"] = nbt.TAG_Byte_Array(self._Blocks.astype('uint8'))
-
-        add = self._Blocks >> 8
-        if add.any():
-            # WorldEdit AddBlocks compatibility.
-            # The first 4-bit value is stored in the high bits of the first byte.
+        # The arrays are written a slab of layers at a time, so saving needs little more memory than they hold.
+        slabs = self._layerSlabs()
 
-            # Increase odd size by one to align slices.
-            packed_add = zeros(add.size + (add.size & 1), 'uint8')
-            packed_add[:add.size] = add.ravel()
-
-            # Shift even bytes to the left
-            packed_add[::2] <<= 4
+        stream = SchematicStreamWriter(filename, self.root_tag.name)
+        try:
+            for name in self.root_tag:
+                if name != "Data":
+                    stream.writeTags(self.root_tag[name])
+                    continue
 
-            # Merge odd bytes into even bytes
-            packed_add[::2] |= packed_add[1::2]
+                data = self.root_tag["Data"].value
+                stream.writeArrayHeader("Data", data.size)
+                for slab in slabs:
+                    stream.write(data[slab].astype(uint8).tostring())
 
-            # Save only the even bytes, now that they contain the odd bytes in their lower bits.
-            packed_add = packed_add[0::2]
-            self.root_tag["AddBlocks"] = nbt.TAG_Byte_Array(packed_add)
+            stream.writeArrayHeader("Blocks", self._Blocks.size)
+            for slab in slabs:
+                stream.write(self._Blocks[slab].astype(uint8).tostring())
 
-        with open(filename, 'wb') as chunkfh:
-            self.root_tag.save(chunkfh)
+            if self._Blocks.size and self._Blocks.max() > 255:
+                # WorldEdit AddBlocks compatibility.
+                stream.writeArrayHeader("AddBlocks", (self._Blocks.size + 1) / 2)
+                for slab in slabs:
+                    stream.write(_packAddBlocks((self._Blocks[slab] >> 8).astype(uint8).ravel()))
 
-        del self.root_tag["Blocks"]
-        self.root_tag.pop("AddBlocks", None)
+            stream.close()
+        except:
+            stream.discard()
+            raise
 
 
     def __str__(self):
@@ -166,30 +257,34 @@ class MCSchematic (EntityLevel):
     # this will have an impact later on when editing schematics instead of just importing/exporting
     @property
     def Length(self):
-        return self.Blocks.shape[1]
+        return self._Blocks.shape[1]
 
     @property
     def Width(self):
-        return self.Blocks.shape[0]
+        return self._Blocks.shape[2]
 
     @property
     def Height(self):
-        return self.Blocks.shape[2]
+        return self._Blocks.shape[0]
 
     @property
     def Blocks(self):
+        self._applyRotation()
         return swapaxes(self._Blocks, 0, 2)
 
     @property
     def Data(self):
+        self._applyRotation()
         return swapaxes(self.root_tag["Data"].value, 0, 2)
 
     @property
     def Entities(self):
+        self._relocateEntities()
         return self.root_tag["Entities"]
 
     @property
     def TileEntities(self):
+        self._relocateEntities()
         return self.root_tag["TileEntities"]
 
     @property
@@ -212,14 +307,12 @@ class MCSchematic (EntityLevel):
 
     def _update_shape(self):
         root_tag = self.root_tag
-        shape = self.Blocks.shape
-        root_tag["Height"] = nbt.TAG_Short(shape[2])
-        root_tag["Length"] = nbt.TAG_Short(shape[1])
-        root_tag["Width"] = nbt.TAG_Short(shape[0])
+        root_tag["Height"] = nbt.TAG_Short(self.Height)
+        root_tag["Length"] = nbt.TAG_Short(self.Length)
+        root_tag["Width"] = nbt.TAG_Short(self.Width)
 
 
     def rotateLeft(self):
-        self._fakeEntities = None
         self._Blocks = swapaxes(self._Blocks, 1, 2)[:, ::-1, :]  # x=z; z=-x
         if "Biomes" in self.root_tag:
             self.root_tag["Biomes"].value = swapaxes(self.root_tag["Biomes"].value, 0, 1)[::-1, :]
@@ -227,113 +320,38 @@ class MCSchematic (EntityLevel):
         self.root_tag["Data"].value   = swapaxes(self.root_tag["Data"].value, 1, 2)[:, ::-1, :]  # x=z; z=-x
         self._update_shape()
 
-        blockrotation.RotateLeft(self.Blocks, self.Data)
-
-        log.info(u"Relocating entities...")
-        for entity in self.Entities:
-            for p in "Pos", "Motion":
-                if p == "Pos":
-                    zBase = self.Length
-                else:
-                    zBase = 0.0
-                newX = entity[p][2].value
-                newZ = zBase - entity[p][0].value
-
-                entity[p][0].value = newX
-                entity[p][2].value = newZ
-            entity["Rotation"][0].value -= 90.0
-            if entity["id"].value in ("Painting", "ItemFrame"):
-                x, z = entity["TileX"].value, entity["TileZ"].value
-                newx = z
-                newz = self.Length - x - 1
-
-                entity["TileX"].value, entity["TileZ"].value = newx, newz
-                entity["Dir"].value = (entity["Dir"].value + 1) % 4
-
-        for tileEntity in self.TileEntities:
-            if not 'x' in tileEntity:
-                continue
-
-            newX = tileEntity["z"].value
-            newZ = self.Length - tileEntity["x"].value - 1
-
-            tileEntity["x"].value = newX
-            tileEntity["z"].value = newZ
+        self._reorient(blockrotation.BlockRotation.rotateLeft).rotateLeft(self.Length)
 
     def roll(self):
         " xxx rotate stuff - destroys biomes"
         self.root_tag.pop('Biomes', None)
-        self._fakeEntities = None
 
         self._Blocks = swapaxes(self._Blocks, 2, 0)[:, :, ::-1]  # x=y; y=-x
         self.root_tag["Data"].value = swapaxes(self.root_tag["Data"].value, 2, 0)[:, :, ::-1]
         self._update_shape()
+        self._reorient()
 
     def flipVertical(self):
         " xxx delete stuff "
-        self._fakeEntities = None
-
-        blockrotation.FlipVertical(self.Blocks, self.Data)
         self._Blocks = self._Blocks[::-1, :, :]  # y=-y
         self.root_tag["Data"].value = self.root_tag["Data"].value[::-1, :, :]
+        self._reorient(blockrotation.BlockRotation.flipVertical)
 
     def flipNorthSouth(self):
         if "Biomes" in self.root_tag:
             self.root_tag["Biomes"].value = self.root_tag["Biomes"].value[::-1, :]
 
-        self._fakeEntities = None
-
-        blockrotation.FlipNorthSouth(self.Blocks, self.Data)
         self._Blocks = self._Blocks[:, :, ::-1]  # x=-x
         self.root_tag["Data"].value = self.root_tag["Data"].value[:, :, ::-1]
-
-        northSouthPaintingMap = [0, 3, 2, 1]
-
-        log.info(u"N/S Flip: Relocating entities...")
-        for entity in self.Entities:
-
-            entity["Pos"][0].value = self.Width - entity["Pos"][0].value
-            entity["Motion"][0].value = -entity["Motion"][0].value
-
-            entity["Rotation"][0].value -= 180.0
-
-            if entity["id"].value in ("Painting", "ItemFrame"):
-                entity["TileX"].value = self.Width - entity["TileX"].value
-                entity["Dir"].value = northSouthPaintingMap[entity["Dir"].value]
-
-        for tileEntity in self.TileEntities:
-            if not 'x' in tileEntity:
-                continue
-
-            tileEntity["x"].value = self.Width - tileEntity["x"].value - 1
+        self._reorient(blockrotation.BlockRotation.flipNorthSouth).flipNorthSouth(self.Width)
 
     def flipEastWest(self):
         if "Biomes" in self.root_tag:
             self.root_tag["Biomes"].value = self.root_tag["Biomes"].value[:, ::-1]
 
-        self._fakeEntities = None
-
-        blockrotation.FlipEastWest(self.Blocks, self.Data)
         self._Blocks = self._Blocks[:, ::-1, :]  # z=-z
         self.root_tag["Data"].value = self.root_tag["Data"].value[:, ::-1, :]
-
-        eastWestPaintingMap = [2, 1, 0, 3]
-
-        log.info(u"E/W Flip: Relocating entities...")
-        for entity in self.Entities:
-
-            entity["Pos"][2].value = self.Length - entity["Pos"][2].value
-            entity["Motion"][2].value = -entity["Motion"][2].value
-
-            entity["Rotation"][0].value -= 180.0
-
-            if entity["id"].value in ("Painting", "ItemFrame"):
-                entity["TileZ"].value = self.Length - entity["TileZ"].value
-                entity["Dir"].value = eastWestPaintingMap[entity["Dir"].value]
-
-        for tileEntity in self.TileEntities:
-            tileEntity["z"].value = self.Length - tileEntity["z"].value - 1
-
+        self._reorient(blockrotation.BlockRotation.flipEastWest).flipEastWest(self.Length)
 
     def setBlockDataAt(self, x, y, z, newdata):
         if x < 0 or y < 0 or z < 0:
@@ -370,8 +388,19 @@ class MCSchematic (EntityLevel):
         return chest
 
 
+    def orientedArrays(self):
+        """ Returns (blocks, data, rotationTable), where blocks and data are [x, z, y] views of the arrays as they
+        are oriented now, and rotationTable is the blockrotation table the data has yet to be rotated with, or None.
+        Unlike Blocks and Data, this does not copy the arrays to apply a pending rotation. """
+        return (swapaxes(self._Blocks, 0, 2), swapaxes(self.root_tag["Data"].value, 0, 2),
+                self._pendingRotation if self._arraysReoriented else None)
+
     def getChunk(self, cx, cz):
-        chunk = super(MCSchematic, self).getChunk(cx, cz)
+        chunk = SchematicChunk()
+        chunk.world = self
+        chunk.chunkPosition = (cx, cz)
+        chunk.Entities, chunk.TileEntities = self._getFakeChunkEntities(cx, cz)
+        chunk.root_tag = nbt.TAG_Compound()
         if "Biomes" in self.root_tag:
             x = cx << 4
             z = cz << 4
@@ -379,6 +408,127 @@ class MCSchematic (EntityLevel):
         return chunk
 
 
+class SchematicChunk(FakeChunk):
+    """ A chunk of an MCSchematic. Its arrays are views of the schematic's, taken each time they are used, so the
+    chunk can be copied from with orientedArrays before the schematic's pending rotation is applied. """
+    @property
+    def Blocks(self):
+        return self.world.fakeBlocksForChunk(*self.chunkPosition)
+
+    @property
+    def Data(self):
+        return self.world.fakeDataForChunk(*self.chunkPosition)
+
+    @property
+    def BlockLight(self):
+        light = self.__dict__.get("_light")
+        if light is None:
+            light = self._light = zeros(self.orientedArrays()[0].shape, 'uint16')
+            light[:] = 15
+        return light
+
+    SkyLight = BlockLight
+
+    def orientedArrays(self, slices=None):
+        """ Returns (blocks, data, rotationTable) like MCSchematic.orientedArrays for this chunk, or for the part of
+        it selected by slices. """
+        blocks, data, rotationTable = self.world.orientedArrays()
+        x, z = self.chunkPosition
+        chunkSlices = (slice(x << 4, (x << 4) + 16), slice(z << 4, (z << 4) + 16), slice(0, self.world.Height))
+        blocks = blocks[chunkSlices]
+        data = data[chunkSlices]
+        if slices is not None:
+            blocks = blocks[slices]
+            data = data[slices]
+        return blocks, data, rotationTable
+
+
+def _affine(xx, xz, zx, zz, x=0, z=0):
+    return array([[xx, xz, x], [zx, zz, z], [0, 0, 1]])
+
+
+class SchematicTransform(object):
+    """
+    The composition of the rotations and flips of an MCSchematic, as they move its entities and tile entities.
+    Each kind of position has an affine map over (x, z) in homogeneous coordinates: the positions and motions of
+    entities, the positions of tile entities, and the TileX and TileZ of paintings and item frames. yaw is added to
+    each entity's Rotation, and the Dir of paintings and item frames is mapped through dirMap.
+    """
+    def __init__(self):
+        self.pos = self.motion = self.tile = self.hanging = _affine(1, 0, 0, 1)
+        self.yaw = 0.0
+        self.dirMap = arange(4)
+
+    def then(self, pos, motion, tile, hanging, yaw, dirMap):
+        """ Composes the given transform after this one. """
+        self.pos = pos.dot(self.pos)
+        self.motion = motion.dot(self.motion)
+        self.tile = tile.dot(self.tile)
+        self.hanging = hanging.dot(self.hanging)
+        self.yaw += yaw
+        self.dirMap = array(dirMap)[self.dirMap]
+
+    def rotateLeft(self, length):
+        """ x=z; z=-x. length is the schematic's length after rotating. """
+        self.then(_affine(0, 1, -1, 0, 0, length), _affine(0, 1, -1, 0),
+                  _affine(0, 1, -1, 0, 0, length - 1), _affine(0, 1, -1, 0, 0, length - 1),
+                  -90.0, [1, 2, 3, 0])
+
+    def flipNorthSouth(self, width):
+        """ x=-x """
+        self.then(_affine(-1, 0, 0, 1, width), _affine(-1, 0, 0, 1),
+                  _affine(-1, 0, 0, 1, width - 1), _affine(-1, 0, 0, 1, width),
+                  -180.0, [0, 3, 2, 1])
+
+    def flipEastWest(self, length):
+        """ z=-z """
+        self.then(_affine(1, 0, 0, -1, 0, length), _affine(1, 0, 0, -1),
+                  _affine(1, 0, 0, -1, 0, length - 1), _affine(1, 0, 0, -1, 0, length),
+                  -180.0, [2, 1, 0, 3])
+
+    @staticmethod
+    def _mapped(matrix, xz):
+        return xz.dot(matrix[:2, :2].T) + matrix[:2, 2]
+
+    def apply(self, entities, tileEntities):
+        """ Moves the entities and tile entities, gathering the coordinates of each kind into one array and mapping
+        them all at once. """
+        moving = [e for e in entities if "Pos" in e]
+        if moving:
+            pos = self._mapped(self.pos, array([(e["Pos"][0].value, e["Pos"][2].value) for e in moving]))
+            for e, (x, z) in zip(moving, pos):
+                e["Pos"][0].value = x
+                e["Pos"][2].value = z
+
+        moving = [e for e in entities if "Motion" in e]
+        if moving:
+            motion = self._mapped(self.motion, array([(e["Motion"][0].value, e["Motion"][2].value) for e in moving]))
+            for e, (x, z) in zip(moving, motion):
+                e["Motion"][0].value = x
+                e["Motion"][2].value = z
+
+        if self.yaw:
+            for e in entities:
+                if "Rotation" in e:
+                    e["Rotation"][0].value += self.yaw
+
+        hanging = [e for e in entities if e["id"].value in ("Painting", "ItemFrame") and "TileX" in e]
+        if hanging:
+            tiles = self._mapped(self.hanging, array([(e["TileX"].value, e["TileZ"].value) for e in hanging]))
+            for e, (x, z) in zip(hanging, tiles):
+                e["TileX"].value = int(x)
+                e["TileZ"].value = int(z)
+                if "Dir" in e:
+                    e["Dir"].value = int(self.dirMap[e["Dir"].value % 4])
+
+        moving = [t for t in tileEntities if "x" in t]
+        if moving:
+            tiles = self._mapped(self.tile, array([(t["x"].value, t["z"].value) for t in moving]))
+            for t, (x, z) in zip(moving, tiles):
+                t["x"].value = int(x)
+                t["z"].value = int(z)
+
+
 class INVEditChest(MCSchematic):
     Width = 1
     Height = 1
@@ -392,6 +542,10 @@ class INVEditChest(MCSchematic):
     def _isTagLevel(cls, root_tag):
         return "Inventory" in root_tag
 
+    def orientedArrays(self):
+        # the chest has no arrays of its own to reorient
+        return swapaxes(self.Blocks, 0, 2), swapaxes(self.Data, 0, 2), None
+
     def __init__(self, root_tag, filename):
 
         if filename:
@@ -427,15 +581,268 @@ class INVEditChest(MCSchematic):
         return nbt.TAG_List([chestTag], name="TileEntities")
 
 
+def zipRegionCoords(name):
+    """ Returns the region coordinates of a zip member named region/r.x.z.mca, or None for any other member. """
+    folder, _, filename = name.rpartition("/")
+    bits = filename.split('.')
+    if folder != "region" or len(bits) != 4 or bits[0] != 'r' or bits[3] != "mca":
+        return None
+    try:
+        return int(bits[1]), int(bits[2])
+    except ValueError:
+        return None
+
+
+def _startZipMember(destZip, info):
+    # Writes the local header for info, whose CRC and sizes must be set, and adds it to destZip's directory. The
+    # caller writes the member's data after it.
+    info.flag_bits &= ~0x08  # the CRC and sizes go in the local header instead of a data descriptor
+    info.header_offset = destZip.fp.tell()
+    destZip.fp.write(info.FileHeader())
+    destZip.filelist.append(info)
+    destZip.NameToInfo[info.filename] = info
+    destZip._didModify = True
+
+
+def copyZipMember(sourceZip, info, destZip):
+    """ Copies a member of sourceZip into destZip, which must be open for writing, without decompressing it. """
+    _startZipMember(destZip, copy.copy(info))
+
+    with closing(ZipMemberFile(sourceZip.filename, info)) as f:
+        remaining = info.compress_size
+        while remaining:
+            data = f.read(min(remaining, 1 << 20))
+            if not data:
+                raise zipfile.BadZipfile("{0} is truncated".format(info.filename))
+            destZip.fp.write(data)
+            remaining -= len(data)
+
+
+def _compressZipMember(args):
+    """ Reads a file, or a member of a zip archive if info is given, and returns (CRC, size, data) with the data
+    compressed as compressType. Runs in worker processes. """
+    path, info, compressType = args
+    if info is None:
+        with file(path, "rb") as f:
+            data = f.read()
+    else:
+        data = readZipMember(path, info)
+
+    crc = zlib.crc32(data) & 0xffffffff
+    size = len(data)
+    if compressType == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+        data = compressor.compress(data) + compressor.flush()
+    return crc, size, data
+
+
+class ZipWorldFolder(infiniteworld.AnvilWorldFolder):
+    """
+    A world folder whose region files are read from the region folder of a zip archive without extracting them. The
+    archive's other files are expected to be extracted into the folder itself.
+
+    A region is copied out of the archive into the folder the first time it is changed. modifiedRegions holds the
+    regions whose contents are in the folder instead of the archive, including new and deleted ones.
+    """
+    def __init__(self, filename, zipfilename=None, modifiedRegions=()):
+        super(ZipWorldFolder, self).__init__(filename)
+        self.modifiedRegions = set(modifiedRegions)
+        self._openArchive(zipfilename)
+
+    def __reduce__(self):
+        return self.__class__, (self.filename, self.zipfilename, self.modifiedRegions)
+
+    def _openArchive(self, zipfilename):
+        self.zipfilename = zipfilename
+        self.zipFile = None
+        self.zipRegions = {}
+        if zipfilename is not None:
+            self.zipFile = zipfile.ZipFile(zipfilename)
+            for info in self.zipFile.infolist():
+                regionCoords = zipRegionCoords(info.filename)
+                if regionCoords is not None:
+                    self.zipRegions[regionCoords] = info
+
+    def close(self):
+        self.closeRegions()
+        if self.zipFile is not None:
+            self.zipFile.close()
+
+    def _inArchive(self, rx, rz):
+        return (rx, rz) in self.zipRegions and (rx, rz) not in self.modifiedRegions
+
+    def _modifyRegion(self, rx, rz):
+        if (rx, rz) in self.modifiedRegions:
+            return
+        if (rx, rz) in self.zipRegions:
+            self.regionFiles.pop((rx, rz), None)
+            with closing(self.zipFile.open(self.zipRegions[rx, rz])) as src:
+                with file(self.getRegionFilename(rx, rz), "wb") as dest:
+                    shutil.copyfileobj(src, dest)
+        self.modifiedRegions.add((rx, rz))
+
+    # --- Region files ---
+
+    def getRegionFile(self, rx, rz):
+        regionFile = self.regionFiles.get((rx, rz))
+        if regionFile:
+            return regionFile
+        if self._inArchive(rx, rz):
+            regionFile = ZipRegionFile(self.zipFile, self.zipRegions[rx, rz], (rx, rz))
+            self.regionFiles[rx, rz] = regionFile
+            return regionFile
+        return super(ZipWorldFolder, self).getRegionFile(rx, rz)
+
+    # --- Chunks and chunk listing ---
+
+    def listChunks(self):
+        chunks = super(ZipWorldFolder, self).listChunks()
+        for rx, rz in self.zipRegions:
+            if not self._inArchive(rx, rz):
+                continue
+            for index in self.getRegionFile(rx, rz).offsets.nonzero()[0]:
+                chunks.add(((index & 0x1f) + (rx << 5), (index >> 5) + (rz << 5)))
+
+        return chunks
+
+    def containsChunk(self, cx, cz):
+        if self._inArchive(cx >> 5, cz >> 5):
+            return self.getRegionForChunk(cx, cz).containsChunk(cx, cz)
+        return super(ZipWorldFolder, self).containsChunk(cx, cz)
+
+    def deleteChunk(self, cx, cz):
+        self._modifyRegion(cx >> 5, cz >> 5)
+        super(ZipWorldFolder, self).deleteChunk(cx, cz)
+
+    def saveChunk(self, cx, cz, data):
+        self._modifyRegion(cx >> 5, cz >> 5)
+        super(ZipWorldFolder, self).saveChunk(cx, cz, data)
+
+    def copyChunkFrom(self, worldFolder, cx, cz):
+        self._modifyRegion(cx >> 5, cz >> 5)
+        super(ZipWorldFolder, self).copyChunkFrom(worldFolder, cx, cz)
+
+    # --- Saving ---
+
+    def saveToZip(self, filename, reopen=False, compressType=zipfile.ZIP_STORED, processes=None):
+        """
+        Writes the files in the folder and the regions left in the archive to a new zip file at filename, compressed
+        as compressType. Regions left in the archive that are already compressed that way are copied without
+        decompressing them. Other regions are compressed by a pool of worker processes, then written in order of
+        their coordinates. Returns (size, uncompressedSize, duration) for the new zip file.
+
+        If reopen is True, the regions are read from the new zip file afterward and the modified region files are
+        removed from the folder.
+        """
+        startTime = datetime.now()
+        self.closeRegions()
+        tempname = filename + ".tmp"
+        pool = None
+        with closing(zipfile.ZipFile(tempname, "w", compressType)) as z:
+            # maps region coordinates to a path in the folder or a ZipInfo in the archive
+            regions = {}
+            for root, dirs, files in os.walk(self.filename):
+                # NOTE: ignore empty directories
+                for fn in files:
+                    absfn = os.path.join(root, fn)
+                    zfn = absfn[len(self.filename) + len(os.sep):]  # XXX: relative path
+                    regionCoords = zipRegionCoords(zfn.replace(os.sep, "/"))
+                    if regionCoords is None:
+                        z.write(absfn, zfn)
+                    else:
+                        regions[regionCoords] = absfn
+
+            for regionCoords, info in self.zipRegions.iteritems():
+                if self._inArchive(*regionCoords):
+                    regions[regionCoords] = info
+
+            def needsCompressing(source):
+                if isinstance(source, zipfile.ZipInfo):
+                    return source.compress_type != compressType
+                return compressType != zipfile.ZIP_STORED
+
+            tasks = [(source, None, compressType) if not isinstance(source, zipfile.ZipInfo)
+                     else (self.zipfilename, source, compressType)
+                     for regionCoords, source in sorted(regions.iteritems()) if needsCompressing(source)]
+            if tasks:
+                pool = multiprocessing.Pool(processes)
+                compressed = pool.imap(_compressZipMember, tasks)
+
+            try:
+                for regionCoords, source in sorted(regions.iteritems()):
+                    if needsCompressing(source):
+                        crc, size, data = compressed.next()
+                        if isinstance(source, zipfile.ZipInfo):
+                            info = copy.copy(source)
+                        else:
+                            info = zipfile.ZipInfo("region/r.%s.%s.mca" % regionCoords,
+                                                   time.localtime(os.path.getmtime(source))[:6])
+                            info.external_attr = 0600 << 16
+                        info.compress_type = compressType
+                        info.CRC = crc
+                        info.file_size = size
+                        info.compress_size = len(data)
+                        _startZipMember(z, info)
+                        z.fp.write(data)
+                    elif isinstance(source, zipfile.ZipInfo):
+                        copyZipMember(self.zipFile, source, z)
+                    else:
+                        z.write(source, "region/r.%s.%s.mca" % regionCoords)
+            finally:
+                if pool is not None:
+                    pool.terminate()
+                    pool.join()
+
+            uncompressedSize = sum(info.file_size for info in z.infolist())
+
+        if self.zipFile is not None:
+            self.zipFile.close()
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tempname, filename)
+
+        if reopen:
+            for rx, rz in self.modifiedRegions:
+                path = self.getRegionFilename(rx, rz)
+                if os.path.exists(path):
+                    os.remove(path)
+            self.modifiedRegions.clear()
+            self._openArchive(filename)
+        else:
+            self._openArchive(self.zipfilename)
+
+        size = os.path.getsize(filename)
+        duration = datetime.now() - startTime
+        log.info(u"Saved {0}: {1} bytes, {2:.0%} of {3} bytes uncompressed, in {4} ({5} region(s) compressed using "
+                 u"{6} processes)".format(filename, size, float(size) / max(uncompressedSize, 1), uncompressedSize,
+                                          duration, len(tasks), processes or multiprocessing.cpu_count()))
+        return size, uncompressedSize, duration
+
+
 class ZipSchematic (infiniteworld.MCInfdevOldLevel):
+    """
+    A world stored in a zip archive. Only the archive's small files are extracted into a temporary folder; the
+    region files are read from the archive as they are needed, and only the changed regions are written when saving.
+    See ZipWorldFolder.
+
+    compressed is True if the regions are stored ZIP_DEFLATED, which makes the file smaller but makes saving slower,
+    since each changed region must be compressed again. It is taken from the archive when one is opened and is the
+    default for saveToFile.
+    """
+    compressed = False
+
     def __init__(self, filename, create=False):
         self.zipfilename = filename
+        self._archive = None
 
         tempdir = tempfile.mktemp("schematic")
         if create is False:
-            zf = zipfile.ZipFile(filename)
-            zf.extractall(tempdir)
-            zf.close()
+            os.mkdir(tempdir)
+            with closing(zipfile.ZipFile(filename)) as zf:
+                zf.extractall(tempdir, [info for info in zf.infolist() if zipRegionCoords(info.filename) is None])
+                self.compressed = any(info.compress_type == zipfile.ZIP_DEFLATED for info in zf.infolist()
+                                      if zipRegionCoords(info.filename) is not None)
+            self._archive = filename
 
         super(ZipSchematic, self).__init__(tempdir, create)
         atexit.register(shutil.rmtree, self.worldFolder.filename, True)
@@ -456,13 +863,22 @@ class ZipSchematic (infiniteworld.MCInfdevOldLevel):
             self.Width = 0
             self.Length = 0
 
+    def _openWorldFolder(self, filename):
+        return ZipWorldFolder(filename, self._archive)
+
     def __del__(self):
+        self.worldFolder.close()
         shutil.rmtree(self.worldFolder.filename, True)
 
     def saveInPlace(self):
         self.saveToFile(self.zipfilename)
 
-    def saveToFile(self, filename):
+    def saveToFile(self, filename, compressed=None, processes=None):
+        """ Saves the schematic as a zip file at filename. If compressed is True, the regions are stored
+        ZIP_DEFLATED and are compressed using a pool of processes worker processes; if it is None,
+        self.compressed is used. Returns (size, uncompressedSize, duration) for the saved file. """
+        if compressed is None:
+            compressed = self.compressed
         super(ZipSchematic, self).saveInPlace()
         schematicDat = nbt.TAG_Compound()
         schematicDat.name = "Mega Schematic"
@@ -474,15 +890,13 @@ class ZipSchematic (infiniteworld.MCInfdevOldLevel):
 
         schematicDat.save(self.worldFolder.getFilePath("schematic.dat"))
 
-        basedir = self.worldFolder.filename
-        assert os.path.isdir(basedir)
-        with closing(zipfile.ZipFile(filename, "w", zipfile.ZIP_STORED)) as z:
-            for root, dirs, files in os.walk(basedir):
-                # NOTE: ignore empty directories
-                for fn in files:
-                    absfn = os.path.join(root, fn)
-                    zfn = absfn[len(basedir) + len(os.sep):]  # XXX: relative path
-                    z.write(absfn, zfn)
+        # After saving in place, the regions are read from the saved file
+        inPlace = os.path.abspath(filename) == os.path.abspath(self.zipfilename)
+        compressType = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+        report = self.worldFolder.saveToZip(filename, reopen=inPlace, compressType=compressType, processes=processes)
+        if inPlace:
+            self.compressed = compressed
+        return report
 
     def getWorldBounds(self):
         return BoundingBox((0, 0, 0), (self.Width, self.Height, self.Length))
@@ -547,18 +961,18 @@ def adjustExtractionParameters(self, box):
     return box, (destX, destY, destZ)
 
 
-def extractSchematicFrom(sourceLevel, box, entities=True):
-    return exhaust(extractSchematicFromIter(sourceLevel, box, entities))
+def extractSchematicFrom(sourceLevel, box, entities=True, memmap=False):
+    return exhaust(extractSchematicFromIter(sourceLevel, box, entities, memmap))
 
 
-def extractSchematicFromIter(sourceLevel, box, entities=True):
+def extractSchematicFromIter(sourceLevel, box, entities=True, memmap=False):
     p = sourceLevel.adjustExtractionParameters(box)
     if p is None:
         yield None
         return
     newbox, destPoint = p
 
-    tempSchematic = MCSchematic(shape=box.size, mats=sourceLevel.materials)
+    tempSchematic = MCSchematic(shape=box.size, mats=sourceLevel.materials, memmap=memmap)
     for i in tempSchematic.copyBlocksFromIter(sourceLevel, newbox, destPoint, entities=entities, biomes=True):
         yield i
 
@@ -604,17 +1018,443 @@ MCLevel.extractZipSchematic = extractZipSchematicFrom
 MCLevel.extractZipSchematicIter = extractZipSchematicFromIter
 
 
-def extractAnySchematic(level, box):
-    return exhaust(level.extractAnySchematicIter(box))
+def scratchArray(shape, dtype):
+    """ Returns a zero-filled numpy.memmap of a temporary file in tempfile's directory. The file is removed when the
+    array and every view of it are gone. """
+    if not numpy.prod(shape):
+        return zeros(shape, dtype)  # an empty file can't be mapped
+    with closing(tempfile.TemporaryFile(suffix=".scratch")) as f:
+        return numpy.memmap(f, dtype, "w+", shape=shape)
 
 
-def extractAnySchematicIter(level, box):
-    if box.chunkCount < infiniteworld.MCInfdevOldLevel.loadedChunkLimit:
-        for i in level.extractSchematicIter(box):
-            yield i
+def _copyInto(target, source):
+    """ Copies source into target a slab at a time and returns target. """
+    for y in xrange(0, len(source), 16):
+        target[y:y + 16] = source[y:y + 16]
+    return target
+
+
+def _encodedName(name):
+    encoded = (name or u"").encode('utf-8')
+    return struct.pack(">H", len(encoded)) + encoded
+
+
+def _packAddBlocks(add):
+    """ Packs the high bits of a flat run of block IDs, starting at an even index, as WorldEdit's AddBlocks array
+    does: the first 4-bit value is stored in the high bits of the first byte. """
+    if len(add) & 1:
+        add = resize(add, len(add) + 1)
+        add[-1] = 0
+    return ((add[::2] << 4) | add[1::2]).tostring()
+
+
+def _unpackAddBlocks(blocks, packed, offset):
+    """ Merges AddBlocks bytes into the flat blocks array. packed[0] is byte number offset of the AddBlocks
+    array. """
+    blocks = blocks[offset * 2:(offset + len(packed)) * 2]
+    packed = packed.astype('uint16')
+    blocks[0::2] |= (packed[:(len(blocks) + 1) / 2] >> 4) << 8
+    blocks[1::2] |= (packed[:len(blocks) / 2] & 0xf) << 8
+
+
+class SchematicStreamWriter(object):
+    """ Writes a gzip-compressed NBT file a piece at a time. The file holds a compound named rootName, whose tags
+    are written by writeTags, or by writeArrayHeader followed by writes of the array's bytes. """
+    def __init__(self, filename, rootName="Schematic"):
+        self.filename = filename
+        self._file = file(filename, "wb")
+        self._compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip format
+        self.write(chr(nbt.TAG_COMPOUND) + _encodedName(rootName))
+
+    def write(self, data):
+        self._file.write(self._compressor.compress(data))
+
+    def writeTags(self, *tags):
+        root = nbt.TAG_Compound()
+        for tag in tags:
+            root.add(tag)
+        self.write(root.save(compressed=False)[3:-1])  # strip the unnamed root's header and end tag
+
+    def writeArrayHeader(self, name, count):
+        self.write(chr(nbt.TAG_BYTE_ARRAY) + _encodedName(name) + struct.pack(">i", count))
+
+    def close(self):
+        self.write("\x00")
+        self._file.write(self._compressor.flush())
+        self._file.close()
+
+    def discard(self):
+        """ Closes and removes the unfinished file. """
+        self._file.close()
+        os.remove(self.filename)
+
+
+class SchematicStreamReader(object):
+    """ Reads an NBT file, gzip-compressed or not, a piece at a time. """
+    blockSize = 1 << 20
+
+    _valueSizes = {nbt.TAG_BYTE: 1, nbt.TAG_SHORT: 2, nbt.TAG_INT: 4, nbt.TAG_LONG: 8, nbt.TAG_FLOAT: 4,
+                   nbt.TAG_DOUBLE: 8}
+    _arrayItemSizes = {nbt.TAG_BYTE_ARRAY: 1, nbt.TAG_INT_ARRAY: 4, nbt.TAG_SHORT_ARRAY: 2}
+
+    def __init__(self, f):
+        self._file = f
+        magic = f.read(2)
+        if magic == "\x1f\x8b":
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            self._buffer = self._decompressor.decompress(magic)
+        else:
+            self._decompressor = None
+            self._buffer = magic
+        self._offset = 0
+
+    def _nextBuffer(self):
+        """ Returns the next piece of the file's data, which may be empty, or None at the end of the file. """
+        if self._decompressor is None:
+            return self._file.read(self.blockSize) or None
+        data = self._decompressor.unconsumed_tail or self._file.read(self.blockSize)
+        if not data:
+            return self._decompressor.flush() or None
+        return self._decompressor.decompress(data, self.blockSize)
+
+    def read(self, size):
+        pieces = []
+        while size:
+            if self._offset == len(self._buffer):
+                self._buffer = self._nextBuffer()
+                self._offset = 0
+                if self._buffer is None:
+                    raise nbt.NBTFormatError("Unexpected end of file")
+                continue
+            piece = self._buffer[self._offset:self._offset + size]
+            self._offset += len(piece)
+            size -= len(piece)
+            pieces.append(piece)
+        return "".join(pieces)
+
+    def readPieces(self, size):
+        """ Reads size bytes, yielding them in pieces of up to blockSize bytes. """
+        while size:
+            piece = self.read(min(size, self.blockSize))
+            size -= len(piece)
+            yield piece
+
+    def readTagType(self):
+        return ord(self.read(1))
+
+    def readName(self):
+        (length,) = struct.unpack(">H", self.read(2))
+        return self.read(length).decode('utf-8')
+
+    def readValue(self, tagType):
+        """ Returns the encoded value of a tag of the given type. """
+        size = self._valueSizes.get(tagType)
+        if size is not None:
+            return self.read(size)
+
+        if tagType == nbt.TAG_STRING:
+            header = self.read(2)
+            return header + self.read(struct.unpack(">H", header)[0])
+
+        itemSize = self._arrayItemSizes.get(tagType)
+        if itemSize is not None:
+            header = self.read(4)
+            return header + self.read(struct.unpack(">i", header)[0] * itemSize)
+
+        if tagType == nbt.TAG_LIST:
+            header = self.read(5)
+            itemType, count = struct.unpack(">bi", header)
+            return header + "".join(self.readValue(itemType) for _ in xrange(count))
+
+        if tagType == nbt.TAG_COMPOUND:
+            pieces = []
+            while True:
+                childType = self.readTagType()
+                pieces.append(chr(childType))
+                if childType == 0:
+                    return "".join(pieces)
+                pieces.append(_encodedName(self.readName()))
+                pieces.append(self.readValue(childType))
+
+        raise nbt.NBTFormatError("Unknown tag type {0}".format(tagType))
+
+
+def schematicRootName(filename):
+    """ Returns the name of the root tag of the NBT file filename, or None if it doesn't start with a compound. """
+    try:
+        with file(filename, "rb") as f:
+            stream = SchematicStreamReader(f)
+            if stream.readTagType() != nbt.TAG_COMPOUND:
+                return None
+            return stream.readName()
+    except (nbt.NBTFormatError, zlib.error, struct.error, UnicodeDecodeError):
+        return None
+
+
+def readSchematicFile(filename, allocate=zeros):
+    """
+    Reads the .schematic file filename a piece at a time. Returns (root_tag, blocks), where blocks is the Blocks
+    array indexed [y, z, x] as uint16, with the high bits from AddBlocks merged in. root_tag holds the other tags,
+    and its Data array is also indexed [y, z, x].
+
+    The Blocks and Data arrays are read straight into arrays created by allocate(shape, dtype), so reading needs
+    little more memory than the arrays themselves.
+    """
+    with file(filename, "rb") as f:
+        stream = SchematicStreamReader(f)
+        if stream.readTagType() != nbt.TAG_COMPOUND:
+            raise nbt.NBTFormatError("{0} is not an NBT file".format(filename))
+        rootName = stream.readName()
+
+        tags = []
+        blocks = data = packedAdd = None
+        while True:
+            tagType = stream.readTagType()
+            if tagType == 0:
+                break
+            name = stream.readName()
+            if tagType != nbt.TAG_BYTE_ARRAY or name not in ("Blocks", "Data", "AddBlocks"):
+                tags.append(chr(tagType) + _encodedName(name) + stream.readValue(tagType))
+                continue
+
+            (count,) = struct.unpack(">i", stream.read(4))
+            if name == "AddBlocks" and blocks is not None:
+                # Use WorldEdit's "AddBlocks" array to load the 4 high bits of a block ID.
+                offset = 0
+                for piece in stream.readPieces(count):
+                    _unpackAddBlocks(blocks, frombuffer(piece, uint8), offset)
+                    offset += len(piece)
+                continue
+
+            if name == "Blocks":
+                blocks = allocate((count,), 'uint16')
+                target = blocks
+            elif name == "Data":
+                data = allocate((count,), 'uint8')
+                target = data
+            else:
+                packedAdd = allocate((count,), 'uint8')
+                target = packedAdd
+
+            offset = 0
+            for piece in stream.readPieces(count):
+                target[offset:offset + len(piece)] = frombuffer(piece, uint8)
+                offset += len(piece)
+
+    root_tag = nbt.load(buf=chr(nbt.TAG_COMPOUND) + _encodedName(rootName) + "".join(tags) + "\x00")
+    if blocks is None or data is None:
+        raise nbt.NBTFormatError("{0} has no Blocks or Data array".format(filename))
+
+    shape = (root_tag["Height"].value, root_tag["Length"].value, root_tag["Width"].value)
+    if len(blocks) != len(data) or len(blocks) != shape[0] * shape[1] * shape[2]:
+        raise nbt.NBTFormatError("The arrays in {0} don't match its size {1}".format(filename, shape))
+
+    if packedAdd is not None:
+        # AddBlocks came before Blocks
+        step = SchematicStreamReader.blockSize
+        for offset in xrange(0, len(packedAdd), step):
+            _unpackAddBlocks(blocks, packedAdd[offset:offset + step], offset)
+        del packedAdd
+
+    root_tag["Data"] = nbt.TAG_Byte_Array(data.reshape(shape))
+    return root_tag, blocks.reshape(shape)
+
+
+class SchematicFileWriter(object):
+    """
+    Writes a .schematic file a slab of layers at a time, from the bottom up, so that the whole schematic is never
+    held in memory. The Blocks array is compressed into the file as the layers arrive. Data and the high bits of
+    the block IDs are spooled to temporary files and copied in by close, since each must be written as one NBT
+    array.
+    """
+    blockSize = 1 << 20
+
+    def __init__(self, filename, size, materials=alphaMaterials):
+        self.size = size
+        self.layers = 0
+
+        self._stream = SchematicStreamWriter(filename)
+        self._dataSpool = tempfile.TemporaryFile()
+        self._addSpool = None
+
+        w, h, l = size
+        self._stream.writeTags(nbt.TAG_Short(h, "Height"),
+                               nbt.TAG_Short(l, "Length"),
+                               nbt.TAG_Short(w, "Width"),
+                               nbt.TAG_String(materials.name, "Materials"))
+        self._stream.writeArrayHeader("Blocks", w * h * l)
+
+    def _copySpool(self, spool):
+        spool.seek(0)
+        while True:
+            data = spool.read(self.blockSize)
+            if not data:
+                break
+            yield data
+
+    def writeLayers(self, blocks, data):
+        """ Writes the next layers of the schematic. blocks and data are indexed [y, z, x], like MCSchematic's
+        _Blocks. """
+        w, h, l = self.size
+        blocks = asarray(blocks)
+        if blocks.shape[1:] != (l, w) or blocks.shape != data.shape or self.layers + len(blocks) > h:
+            raise ValueError("Layers of shape {0} don't fit a schematic of size {1} with {2} layers written".format(
+                blocks.shape, self.size, self.layers))
+
+        self._stream.write(blocks.astype(uint8).tostring())
+        self._dataSpool.write((data & 0xf).astype(uint8).tostring())
+
+        add = (blocks >> 8).astype(uint8)
+        if self._addSpool is None and add.any():
+            # WorldEdit AddBlocks compatibility. Blocks below the first with an ID over 255 have no high bits.
+            self._addSpool = tempfile.TemporaryFile()
+            self._addSpool.truncate(self.layers * l * w)
+            self._addSpool.seek(0, os.SEEK_END)
+        if self._addSpool is not None:
+            self._addSpool.write(add.tostring())
+
+        self.layers += len(blocks)
+
+    def close(self, entities=(), tileEntities=(), biomes=None):
+        """ Writes the remaining tags and closes the file. biomes is indexed [z, x], like the Biomes tag of an
+        MCSchematic. """
+        w, h, l = self.size
+        if self.layers != h:
+            raise ValueError("Only {0} of {1} layers were written".format(self.layers, h))
+        volume = w * h * l
+
+        self._stream.writeArrayHeader("Data", volume)
+        for data in self._copySpool(self._dataSpool):
+            self._stream.write(data)
+
+        if self._addSpool is not None:
+            # blockSize is even, so each block read from the spool starts at an even index.
+            self._stream.writeArrayHeader("AddBlocks", (volume + 1) / 2)
+            for data in self._copySpool(self._addSpool):
+                self._stream.write(_packAddBlocks(frombuffer(data, uint8)))
+
+        tags = [nbt.TAG_List(list(entities), "Entities"), nbt.TAG_List(list(tileEntities), "TileEntities")]
+        if biomes is not None:
+            tags.append(nbt.TAG_Byte_Array(asarray(biomes, uint8), "Biomes"))
+        self._stream.writeTags(*tags)
+
+        self._stream.close()
+        self._closeSpools()
+
+    def discard(self):
+        """ Closes and removes the unfinished file. """
+        self._stream.discard()
+        self._closeSpools()
+
+    def _closeSpools(self):
+        self._dataSpool.close()
+        if self._addSpool is not None:
+            self._addSpool.close()
+
+
+def extractSchematicToFile(sourceLevel, box, filename, entities=True, memoryBudget=None):
+    return exhaust(extractSchematicToFileIter(sourceLevel, box, filename, entities, memoryBudget))
+
+
+def extractSchematicToFileIter(sourceLevel, box, filename, entities=True, memoryBudget=None):
+    """
+    Writes the part of sourceLevel inside box to the .schematic file filename without holding the whole schematic
+    in memory. The box is extracted in slabs of layers, each as large as memoryBudget allows, and each slab is
+    written to the file by a SchematicFileWriter. Every slab reads the chunks it covers again, so this is slower
+    than extractSchematic. Yields (slabsDone, slabCount) progress pairs, and finally filename.
+    """
+    if memoryBudget is None:
+        memoryBudget = schematicMemoryBudget
+    w, h, l = box.size
+
+    layerBytes = schematicFootprint((w, 1, l))
+    slabHeight = max(1, min(h, memoryBudget // layerBytes))
+    if slabHeight > 16:
+        slabHeight &= ~15  # whole chunk sections
+    slabs = range(0, h, slabHeight)
+
+    writer = SchematicFileWriter(filename, box.size, sourceLevel.materials)
+    allEntities = []
+    allTileEntities = []
+    biomes = None
+    try:
+        for i, y in enumerate(slabs):
+            slabBox = BoundingBox((box.minx, box.miny + y, box.minz), (w, min(slabHeight, h - y), l))
+            slab = sourceLevel.extractSchematic(slabBox, entities)
+            if slab is None:  # the box is outside the level
+                slab = MCSchematic(shape=slabBox.size, mats=sourceLevel.materials)
+
+            writer.writeLayers(slab._Blocks, slab.root_tag["Data"].value)
+            allEntities.extend(Entity.copyWithOffset(e, (0, y, 0)) for e in slab.Entities)
+            allTileEntities.extend(TileEntity.copyWithOffset(e, (0, y, 0)) for e in slab.TileEntities)
+            if biomes is None and "Biomes" in slab.root_tag:
+                biomes = slab.root_tag["Biomes"].value
+            yield i + 1, len(slabs)
+
+        writer.close(allEntities, allTileEntities, biomes)
+    except:
+        writer.discard()
+        raise
+
+    yield filename
+
+MCLevel.extractSchematicToFile = extractSchematicToFile
+MCLevel.extractSchematicToFileIter = extractSchematicToFileIter
+
+# The number of bytes extractAnySchematic may use to hold a schematic in memory. Larger schematics are extracted to
+# a ZipSchematic, or streamed to a .schematic file.
+schematicMemoryBudget = 128 << 20
+
+
+def schematicFootprint(size):
+    """ Returns the number of bytes an MCSchematic of the given size holds in its Blocks, Data and Biomes arrays.
+    Saving it needs about twice as much again for the encoded arrays. """
+    w, h, l = size
+    return w * h * l * (2 + 1) + w * l  # uint16 Blocks, uint8 Data and Biomes
+
+
+def schematicExtractionMode(box, memoryBudget=None, streaming=False):
+    """ Returns how extractAnySchematic extracts box: "memory" to an MCSchematic if its footprint fits in
+    memoryBudget, otherwise "stream" to a .schematic file if streaming is True, or "zip" to a ZipSchematic. """
+    if memoryBudget is None:
+        memoryBudget = schematicMemoryBudget
+    if schematicFootprint(box.size) <= memoryBudget:
+        return "memory"
+    return "stream" if streaming else "zip"
+
+
+def extractAnySchematic(level, box, memoryBudget=None, filename=None):
+    return exhaust(level.extractAnySchematicIter(box, memoryBudget, filename))
+
+
+def extractAnySchematicIter(level, box, memoryBudget=None, filename=None):
+    """ Extracts box in the way chosen by schematicExtractionMode. Without a filename, the result is an MCSchematic
+    or a ZipSchematic. If filename is given, the box is always saved to the .schematic file filename, streaming it
+    there if it is too large for memoryBudget, and the result is filename. """
+    mode = schematicExtractionMode(box, memoryBudget, filename is not None)
+    log.debug(u"Extracting {0} ({1} bytes) by {2}".format(box, schematicFootprint(box.size), mode))
+    if mode == "stream":
+        extraction = level.extractSchematicToFileIter(box, filename, memoryBudget=memoryBudget)
+    elif mode == "memory":
+        extraction = level.extractSchematicIter(box)
     else:
-        for i in level.extractZipSchematicIter(box):
+        extraction = level.extractZipSchematicIter(box)
+
+    if filename is None or mode == "stream":
+        for i in extraction:
             yield i
+        return
+
+    # pass on the progress, holding back the schematic that comes last to save it to filename
+    schematic = None
+    for i in extraction:
+        if schematic is not None:
+            yield schematic
+        schematic = i
+    if schematic is None:  # the box is outside the level
+        schematic = MCSchematic(shape=box.size, mats=level.materials)
+    schematic.saveToFile(filename)
+    yield filename
 
 MCLevel.extractAnySchematic = extractAnySchematic
 MCLevel.extractAnySchematicIter = extractAnySchematicIter
@@ -10,6 +10,8 @@ from pymclevel import nbt
 from pymclevel.schematic import MCSchematic
 from pymclevel.box import BoundingBox
 from pymclevel import block_copy
+from pymclevel import materials
+from pymclevel.entity import Entity, TileEntity
 from templevel import mktemp, TempLevel
 
 __author__ = 'Rio'
@@ -55,6 +57,44 @@ class TestAnvilLevel(unittest.TestCase):
         newLevel.close()
         shutil.rmtree(temppath)
 
+    def testCopyWholeChunks(self):
+        level = self.anvilLevel.level
+        temppath = mktemp("AnvilCreate")
+        newLevel = MCInfdevOldLevel(filename=temppath, create=True)
+
+        cx, cz = level.allChunks.next()
+        sourceBox = BoundingBox((cx << 4, 0, cz << 4), (32, level.Height, 32))
+        assert block_copy.copiesWholeChunks(newLevel, level, sourceBox, (160, 0, -48))
+
+        for destPoint in ((cx << 4, 0, cz << 4), (160, 0, -48)):
+            newLevel.copyBlocksFrom(level, sourceBox, destPoint, create=True)
+            destBox = BoundingBox(destPoint, sourceBox.size)
+
+            assert (newLevel.extractSchematic(destBox).Blocks == level.extractSchematic(sourceBox).Blocks).all()
+            assert (len(newLevel.getEntitiesInBox(destBox)) == len(level.getEntitiesInBox(sourceBox)))
+            destChunk = newLevel.getChunk(destPoint[0] >> 4, destPoint[2] >> 4)
+            assert destChunk.root_tag["Level"]["xPos"].value == destPoint[0] >> 4
+
+        # Copying over existing chunks keeps their entities, as the block copy does
+        chunk = newLevel.getChunk(160 >> 4, -48 >> 4)
+        pig = Entity.Create("Pig")
+        Entity.setpos(pig, (160.5, 70, -47.5))
+        chest = TileEntity.Create("Chest")
+        TileEntity.setpos(chest, (160, 70, -48))
+        chunk.addEntity(pig)
+        chunk.addTileEntity(chest)
+        chunk.dirty = True
+        del chunk, destChunk
+
+        newLevel.copyBlocksFrom(level, sourceBox, (160, 0, -48))
+        chunk = newLevel.getChunk(160 >> 4, -48 >> 4)
+        assert [e["id"].value for e in chunk.getEntitiesInBox(BoundingBox((160, 70, -48), (1, 1, 1)))] == ["Pig"]
+        assert [t["id"].value for t in chunk.getTileEntitiesInBox(BoundingBox((160, 70, -48), (1, 1, 1)))] == ["Chest"]
+
+        newLevel.saveInPlace()
+        newLevel.close()
+        shutil.rmtree(temppath)
+
     def testCopyConvertBlocks(self):
         indevlevel = self.indevLevel.level
         level = self.anvilLevel.level
@@ -69,7 +109,7 @@ class TestAnvilLevel(unittest.TestCase):
         oldEntityCount = len(level.getEntitiesInBox(BoundingBox(middle, indevlevel.bounds.size)))
         level.copyBlocksFrom(indevlevel, indevlevel.bounds, middle)
 
-        convertedSourceBlocks, convertedSourceData = block_copy.convertBlocks(indevlevel, level, indevlevel.Blocks[0:16, 0:16, 0:indevlevel.Height], indevlevel.Data[0:16, 0:16, 0:indevlevel.Height])
+        convertedSourceBlocks, convertedSourceData = materials.convertBlocks(indevlevel.materials, level.materials, indevlevel.Blocks[0:16, 0:16, 0:indevlevel.Height], indevlevel.Data[0:16, 0:16, 0:indevlevel.Height])
 
         assert ((level.getChunk(x >> 4, z >> 4).Blocks[0:16, 0:16, 0:indevlevel.Height]
                 == convertedSourceBlocks).all())
@@ -77,6 +117,21 @@ class TestAnvilLevel(unittest.TestCase):
         assert (oldEntityCount + len(indevlevel.getEntitiesInBox(indevlevel.bounds))
                 == len(level.getEntitiesInBox(BoundingBox(middle, indevlevel.bounds.size))))
 
+    def testCopyMaskedBlocks(self):
+        level = self.anvilLevel.level
+        cx, cz = level.allChunks.next()
+
+        schem = MCSchematic(shape=(16, 16, 16), mats="Classic")
+        schem.Blocks[:8] = schem.materials.Stone.ID
+        schem.Blocks[8:] = schem.materials.Glass.ID
+        box = BoundingBox((cx * 16, 64, cz * 16), schem.bounds.size)
+        oldBlocks = level.extractSchematic(box).Blocks
+
+        level.copyBlocksFrom(schem, schem.bounds, box.origin, blocksToCopy=[schem.materials.Glass.ID])
+        blocks = level.extractSchematic(box).Blocks
+        assert (blocks[:8] == oldBlocks[:8]).all()
+        assert (blocks[8:] == level.materials.Glass.ID).all()
+
     def testImportSchematic(self):
         level = self.anvilLevel.level
         cx, cz = level.allChunks.next()
@@ -86,7 +141,7 @@ class TestAnvilLevel(unittest.TestCase):
         level.copyBlocksFrom(schem, schem.bounds, (0, 64, 0))
         schem = MCSchematic(shape=schem.bounds.size)
         schem.copyBlocksFrom(level, box, (0, 0, 0))
-        convertedSourceBlocks, convertedSourceData = block_copy.convertBlocks(schem, level, schem.Blocks, schem.Data)
+        convertedSourceBlocks, convertedSourceData = materials.convertBlocks(schem.materials, level.materials, schem.Blocks, schem.Data)
         assert (level.getChunk(cx, cz).Blocks[0:1, 0:3, 64:65] == convertedSourceBlocks).all()
 
     def testRecreateChunks(self):
@@ -108,6 +163,26 @@ class TestAnvilLevel(unittest.TestCase):
 
         assert (c.Blocks == 5).all()
 
+    def testReplaceSkipsChunks(self):
+        level = self.anvilLevel.level
+        cx, cz = level.allChunks.next()
+        box = BoundingBox((cx * 16, 0, cz * 16), (32, level.Height, 32))
+        level.fillBlocks(box, level.materials.Stone)
+        level.saveInPlace()
+
+        level.fillBlocks(box, level.materials.Glass, [level.materials.WoodPlanks])
+        assert level.getChunk(cx, cz).keepsBlockCounts and not level.getChunk(cx, cz).dirty
+
+        level.setBlockAt(cx * 16, 10, cz * 16, level.materials.WoodPlanks.ID)
+        level.fillBlocks(box, level.materials.Glass, [level.materials.WoodPlanks])
+        assert level.blockAt(cx * 16, 10, cz * 16) == level.materials.Glass.ID
+        assert level.getChunk(cx, cz).blockCounts()[level.materials.Glass.ID] == 1
+
+        # Writing to the Blocks array outdates the counts before the chunk is marked dirty
+        level.getChunk(cx, cz).Blocks[0, 0, 11] = level.materials.WoodPlanks.ID
+        level.fillBlocks(box, level.materials.Glass, [level.materials.WoodPlanks])
+        assert level.blockAt(cx * 16, 11, cz * 16) == level.materials.Glass.ID
+
     def testReplace(self):
         level = self.anvilLevel.level
 
@@ -0,0 +1,36 @@
+from pymclevel import block_replace, BoundingBox
+from pymclevel.infiniteworld import MCInfdevOldLevel, SessionLockLost
+from templevel import TempLevel
+
+def test_parallel_replace():
+    level = TempLevel("AnvilWorld").level
+    serialLevel = TempLevel("AnvilWorld").level
+    mats = level.materials
+    box = BoundingBox((0, 40, 0), (300, 40, 600))
+
+    # a chunk that stays in use is replaced in this process
+    cx, cz = level.allChunks.next()
+    chunk = level.getChunk(cx, cz)
+
+    progress = list(block_replace.replaceBlocksParallelIter(level, box, mats.Glass, [mats.Stone, mats.Dirt], 2))
+    replaced, skipped = progress[-1]
+    assert isinstance(progress[-1], block_replace.ReplaceResult)
+    assert not any(isinstance(p, block_replace.ReplaceResult) for p in progress[:-1])
+    serialLevel.fillBlocks(box, mats.Glass, [mats.Stone, mats.Dirt])
+
+    assert replaced
+    for cx, cz in level.allChunks:
+        assert (level.getChunk(cx, cz).Blocks == serialLevel.getChunk(cx, cz).Blocks).all()
+    assert level.chunksNeedingLighting
+
+
+def test_parallel_replace_lock():
+    level = TempLevel("AnvilWorld").level
+    MCInfdevOldLevel(level.filename)
+
+    try:
+        block_replace.replaceBlocksParallel(level, None, level.materials.Glass, [level.materials.Stone])
+    except SessionLockLost:
+        pass
+    else:
+        assert False, "Replaced blocks without the session lock"
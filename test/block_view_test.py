@@ -0,0 +1,52 @@
+import numpy
+from pymclevel import BoundingBox
+from templevel import TempLevel
+
+def test_anvil_view():
+    level = TempLevel("AnvilWorld").level
+    x, y, z = level.bounds.origin
+    x += level.bounds.size[0] / 2 & ~15
+    z += level.bounds.size[2] / 2 & ~15
+    box = BoundingBox((x + 7, 60, z + 9), (40, 20, 30))
+
+    view = level.blockView(box)
+    assert view.shape == (40, 30, 20)
+
+    schem = level.extractSchematic(box)
+    assert (view[:] == schem.Blocks).all()
+    assert (view[3, :, 2::3] == schem.Blocks[3, :, 2::3]).all()
+    assert (view[::-2, 5, -1] == schem.Blocks[::-2, 5, -1]).all()
+    assert (numpy.asarray(view.astype('uint8')) == schem.Blocks).all()
+
+    view[1:20, 2:9, 4] = level.materials.Glass.ID
+    view[::4, 0, ::2] = level.materials.Sponge.ID
+    assert level.blockAt(x + 8, 64, z + 11) == level.materials.Glass.ID
+    assert level.blockAt(x + 11, 60, z + 9) == level.materials.Sponge.ID
+    assert level.blockAt(x + 9, 61, z + 9) != level.materials.Sponge.ID
+    assert level.getChunk((x + 8) >> 4, (z + 11) >> 4).dirty
+
+    # writing blocks keeps the height map up to date
+    chunk = level.getChunk((x + 7) >> 4, (z + 9) >> 4)
+    assert chunk.HeightMap[(z + 9) & 15, (x + 7) & 15] < 80
+    view[0, 0, :] = level.materials.Stone.ID
+    assert chunk.HeightMap[(z + 9) & 15, (x + 7) & 15] == 80
+
+    # written light is kept instead of being recalculated by the next relight
+    level.generateLights()
+    lightView = level.blockView(box, "BlockLight")
+    lightView[0, 0, 0] = 7
+    assert chunk.dirty and not chunk.needsLighting
+    level.generateLights()
+    assert lightView[0, 0, 0] == 7
+
+
+def test_schematic_view():
+    level = TempLevel("AnvilWorld").level
+    schem = level.extractSchematic(BoundingBox(level.bounds.origin, (20, 20, 20)))
+
+    view = schem.blockView(BoundingBox((-5, 10, 5), (10, 15, 10)), "Data")
+    assert (view[5:, :, :10] == schem.Data[0:5, 5:15, 10:20]).all()
+    assert not view[:5].any()
+
+    view[:, :, :] = 3
+    assert (schem.Data[0:5, 5:15, 10:20] == 3).all()
@@ -0,0 +1,83 @@
+from collections import Counter
+import os
+from pymclevel import BoundingBox, Entity, TileEntity
+from pymclevel.entity_export import exportEntities, loadEntityColumns
+from pymclevel.infiniteworld import MCInfdevOldLevel
+from templevel import TempLevel, mktemp
+
+
+def test_export_anvil():
+    level = TempLevel("AnvilWorld").level
+    cx, cz = sorted(level.allChunks)[0]
+    x, z = cx << 4, cz << 4
+    chest = TileEntity.Create("Chest")
+    TileEntity.setpos(chest, (x + 3, 70, z + 5))
+    level.addTileEntity(chest)
+
+    filename = mktemp("entities.npz")
+    try:
+        entityCount, tileEntityCount = exportEntities(level, filename)
+        columns = loadEntityColumns(filename)
+    finally:
+        os.remove(filename)
+
+    expected = Counter()
+    for chunk in level.getChunks():
+        for entity in chunk.Entities:
+            expected[entity["id"].value, chunk.chunkPosition] += 1
+
+    ids = columns["strings"][columns["entity_id"]]
+    assert entityCount == len(ids) == sum(expected.values())
+    assert Counter(zip(ids, zip(columns["entity_cx"], columns["entity_cz"]))) == expected
+    assert columns["entity_x"].dtype == 'float64'
+
+    assert tileEntityCount == 1
+    assert columns["strings"][columns["tileentity_id"][0]] == "Chest"
+    assert (columns["tileentity_x"][0], columns["tileentity_y"][0], columns["tileentity_z"][0]) == (x + 3, 70, z + 5)
+    assert (columns["tileentity_cx"][0], columns["tileentity_cz"][0]) == ((x + 3) >> 4, (z + 5) >> 4)
+
+
+def test_export_schematic():
+    level = TempLevel("AnvilWorld").level
+    schem = level.extractSchematic(BoundingBox(level.bounds.origin, (64, 128, 64)))
+
+    filename = mktemp("entities.npz")
+    try:
+        entityCount, tileEntityCount = exportEntities(schem, filename)
+        columns = loadEntityColumns(filename)
+    finally:
+        os.remove(filename)
+
+    assert entityCount == len(schem.Entities) == len(columns["entity_id"])
+    assert tileEntityCount == 0 and len(columns["tileentity_x"]) == 0
+
+
+def test_export_skips_incomplete_entities():
+    level = TempLevel("AnvilWorld").level
+    cx, cz = sorted(level.allChunks)[0]
+    x, z = cx << 4, cz << 4
+    chunk = level.getChunk(cx, cz)
+    del chunk.Entities[:]
+
+    noPos = Entity.Create("Pig")
+    del noPos["Pos"]
+    noID = Entity.Create("Cow")
+    Entity.setpos(noID, (x + 1.5, 70, z + 1.5))
+    del noID["id"]
+    sheep = Entity.Create("Sheep")
+    Entity.setpos(sheep, (x + 2.5, 71, z + 3.5))
+    for entity in noPos, noID, sheep:
+        chunk.addEntity(entity)
+    chunk.dirty = True
+    level.saveInPlace()
+
+    filename = mktemp("entities.npz")
+    try:
+        exportEntities(MCInfdevOldLevel(level.filename, readonly=True), filename)
+        columns = loadEntityColumns(filename)
+    finally:
+        os.remove(filename)
+
+    inChunk = (columns["entity_cx"] == cx) & (columns["entity_cz"] == cz)
+    assert list(columns["strings"][columns["entity_id"][inChunk]]) == ["Sheep"]
+    assert [columns["entity_" + a][inChunk].tolist() for a in "xyz"] == [[x + 2.5], [71.0], [z + 3.5]]
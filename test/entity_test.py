@@ -1,4 +1,4 @@
-from pymclevel import fromFile
+from pymclevel import BoundingBox, Entity, fromFile, TileEntity
 from templevel import TempLevel
 
 __author__ = 'Rio'
@@ -18,3 +18,87 @@ def test_command_block():
     assert x == str(point[0])
     assert y == str(point[1] + 10)
     assert z == str(point[2])
+
+
+def test_position_index():
+    level = TempLevel("AnvilWorld").level
+    cx, cz = sorted(level.allChunks)[0]
+    chunk = level.getChunk(cx, cz)
+    x, z = cx << 4, cz << 4
+
+    chest = TileEntity.Create("Chest")
+    TileEntity.setpos(chest, (x + 3, 70, z + 5))
+    chunk.addTileEntity(chest)
+    assert chunk.tileEntityAt(x + 3, 70, z + 5) is chest
+    assert chunk.getTileEntitiesInBox(BoundingBox((x + 3, 70, z + 5), (1, 1, 1))) == [chest]
+
+    furnace = TileEntity.Create("Furnace")
+    TileEntity.setpos(furnace, (x + 3, 70, z + 5))
+    chunk.addTileEntity(furnace)
+    assert chunk.tileEntityAt(x + 3, 70, z + 5) is furnace
+    assert chest not in chunk.TileEntities
+
+    TileEntity.setpos(furnace, (x + 4, 70, z + 5))
+    assert chunk.tileEntityAt(x + 3, 70, z + 5) is None
+    assert level.getChunk(cx, cz).tileEntityAt(x + 4, 70, z + 5) is furnace
+
+    furnace["x"].value = x + 5
+    assert chunk.tileEntityAt(x + 4, 70, z + 5) is None
+    assert chunk.tileEntityAt(x + 5, 70, z + 5) is furnace
+
+    box = chunk.bounds
+    expected = [e for e in chunk.Entities if Entity.pos(e) in box]
+    assert chunk.getEntitiesInBox(box) == expected
+    assert chunk.removeEntitiesInBox(box) == len(expected)
+    assert chunk.getEntitiesInBox(box) == []
+    assert chunk.removeTileEntitiesInBox(box) == 1
+    assert chunk.tileEntityAt(x + 5, 70, z + 5) is None
+
+
+def test_position_index_moved_entities():
+    level = TempLevel("AnvilWorld").level
+    cx, cz = sorted(level.allChunks)[0]
+    chunk = level.getChunk(cx, cz)
+    x, z = cx << 4, cz << 4
+    box = BoundingBox((x, 70, z), (1, 1, 1))
+
+    pig = Entity.Create("Pig")
+    Entity.setpos(pig, (x + 0.5, 70, z + 0.5))
+    chunk.addEntity(pig)
+    assert chunk.getEntitiesInBox(box) == [pig]
+
+    Entity.setpos(pig, (x + 2.5, 70, z + 0.5))
+    assert chunk.getEntitiesInBox(box) == []
+    assert chunk.getEntitiesInBox(BoundingBox((x + 2, 70, z), (1, 1, 1))) == [pig]
+
+    pig["Pos"][0].value = x + 0.5
+    assert chunk.getEntitiesInBox(box) == [pig]
+
+    cow = Entity.Create("Cow")
+    Entity.setpos(cow, (x + 0.5, 70, z + 0.5))
+    chunk.addEntity(Entity.Create("Sheep"))
+    i = next(i for i, e in enumerate(chunk.Entities) if e is pig)
+    chunk.Entities[i] = cow
+    assert chunk.getEntitiesInBox(box) == [cow]
+    assert chunk.removeEntitiesInBox(box) == 1 and not any(e is cow for e in chunk.Entities)
+
+
+def test_add_tile_entities():
+    level = TempLevel("AnvilWorld").level
+    cx, cz = sorted(level.allChunks)[0]
+    x, z = cx << 4, cz << 4
+
+    def create(name, dx):
+        tag = TileEntity.Create(name)
+        TileEntity.setpos(tag, (x + dx, 70, z))
+        return tag
+
+    old = create("Chest", 0)
+    level.addTileEntity(old)
+    first, second, third = create("Furnace", 0), create("Sign", 0), create("Chest", 1)
+    level.addTileEntities([first, second, third])
+
+    chunk = level.getChunk(cx, cz)
+    assert chunk.tileEntityAt(x, 70, z) is second
+    assert chunk.tileEntityAt(x + 1, 70, z) is third
+    assert [t for t in (old, first, second, third) if any(t is c for c in chunk.TileEntities)] == [second, third]
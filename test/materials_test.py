@@ -0,0 +1,93 @@
+import os
+import shutil
+from pymclevel import materials
+from pymclevel.materials import MCMaterials
+from templevel import mktemp
+
+
+def tables(mats):
+    return (mats.names, mats.aka, mats.type, mats.idStr, mats.yamlDatas, mats.blockTextures.tolist(),
+            mats.lightEmission.tolist(), mats.lightAbsorption.tolist(), mats.flatColors.tolist(),
+            [(b.ID, b.blockData, b.hasVariants, b.yaml) for b in mats.allBlocks[1:]],
+            sorted((t, [(b.ID, b.blockData) for b in blocks]) for t, blocks in mats.blocksByType.items()))
+
+
+def test_compiled_tables():
+    cacheDir = mktemp("materials")
+    oldCacheDir = materials.materialsCacheDir
+    materials.materialsCacheDir = cacheDir
+    try:
+        built = MCMaterials(defaultName="Not present in Indev", filename="indev.yaml",
+                            setup=materials._defineIndevBlocks)
+        assert "names" not in built.__dict__
+
+        assert built.Sponge == built[19]
+        assert len(os.listdir(cacheDir)) == 1
+
+        loaded = MCMaterials(defaultName="Not present in Indev", filename="indev.yaml",
+                             setup=materials._defineIndevBlocks)
+        assert loaded.Sponge.name == "Sponge"
+        assert tables(loaded) == tables(built)
+        assert loaded.color is loaded.flatColors
+        assert loaded[19] is loaded.blocksByID[19, 0]
+
+        yamlBuilt = MCMaterials(defaultName="Not present in Indev")
+        yamlBuilt.addYamlBlocksFromFile("indev.yaml")
+        materials._defineIndevBlocks(yamlBuilt)
+        assert tables(loaded) == tables(yamlBuilt)
+    finally:
+        materials.materialsCacheDir = oldCacheDir
+        shutil.rmtree(cacheDir, ignore_errors=True)
+
+
+def test_cached_filter_table():
+    cacheDir = mktemp("materials")
+    oldCacheDir = materials.materialsCacheDir
+    oldFilterTables = dict(materials._filterTables)
+    materials.materialsCacheDir = cacheDir
+    try:
+        materials._filterTables.clear()
+        guessed = materials.filterTable(materials.alphaMaterials, materials.classicMaterials)
+        path = materials.filterTablePath(materials.alphaMaterials, materials.classicMaterials)
+        assert os.path.basename(path) in os.listdir(cacheDir)
+
+        materials._filterTables.clear()
+        loaded = materials.filterTable(materials.alphaMaterials, materials.classicMaterials)
+        assert loaded is not guessed
+        assert loaded.dtype == guessed.dtype and (loaded == guessed).all()
+        assert tuple(loaded[materials.classicMaterials["Indigo Wool"].ID, 0]) == (35, 10)
+    finally:
+        materials.materialsCacheDir = oldCacheDir
+        materials._filterTables.clear()
+        materials._filterTables.update(oldFilterTables)
+        shutil.rmtree(cacheDir, ignore_errors=True)
+
+
+def test_block_fields():
+    mats = MCMaterials()
+    planks = mats.addBlock(5, 0, name="Planks", opacity=7, mapcolor=(1, 2, 3))
+    assert (planks.name, planks.aka, planks.type, planks.opacity) == ("Planks", "", "NORMAL", 7)
+    assert tuple(planks.color) == (1, 2, 3, 255)
+    assert planks.lightAbsorption == 7
+    assert not planks.hasVariants
+
+    variant = mats.addBlock(5, 2, name="Planks Two", aka="Boards", opacity=3, type="WOOD")
+    assert (variant.name, variant.aka, variant.type, variant.opacity) == ("Planks Two", "Boards", "WOOD", 3)
+    assert planks.hasVariants and variant.hasVariants
+    assert (planks.name, planks.type, planks.opacity) == ("Planks", "NORMAL", 3)
+    assert planks < variant and sorted([variant, mats.Air, planks]) == [mats.Air, planks, variant]
+
+    assert mats["Planks"] is planks
+    assert mats.blocksMatching("PLANKS") == [planks, variant]
+    assert mats.blocksMatching("boards") == [variant]
+    assert mats.blocksMatching("a") == [mats.Air, planks, variant]
+    assert mats.blocksMatching("Planks\nAir") == []
+
+
+def test_blocks_matching():
+    mats = materials.alphaMaterials
+    for name in ("wool", "Stone", "ore", "ai", "sandstone slab"):
+        name = name.lower()
+        assert mats.blocksMatching(name) == [b for b in mats.allBlocks
+                                             if name in b.name.lower() or name in b.aka.lower()]
+    assert mats["Stone"] is mats.Stone
@@ -0,0 +1,57 @@
+import os
+from os.path import join
+from pymclevel import nbt
+
+
+def nbtFiles():
+    for dirpath, dirnames, filenames in os.walk("testfiles"):
+        for filename in sorted(filenames):
+            path = join(dirpath, filename)
+            data = nbt.try_gunzip(file(path, "rb").read())
+            try:
+                nbt.loaders["python"](buf=data, lazy=True)
+            except Exception:
+                continue  # not an NBT file
+            yield path, data
+
+
+def test_backend():
+    assert nbt.backend in nbt.loaders
+    assert nbt.load is nbt.loaders[nbt.backend]
+
+
+def test_round_trip():
+    count = 0
+    for path, data in nbtFiles():
+        count += 1
+        for name, load in sorted(nbt.loaders.iteritems()):
+            for kw in {}, {"lazy": True, "views": True}:
+                resaved = load(buf=data, **kw).save(compressed=False)
+                assert resaved == data, "{0} differs when saved by the {1} backend with {2}".format(path, name, kw)
+
+    assert count > 0
+
+
+def test_renamed_child():
+    root = nbt.TAG_Compound()
+    root["old"] = nbt.TAG_Int(1)
+    data = root.save(compressed=False)
+    for name, load in sorted(nbt.loaders.iteritems()):
+        for kw in {}, {"lazy": True}:
+            tag = load(buf=data, **kw)
+            tag["old"].name = "new"
+            assert "new" in tag and tag["new"].value == 1, "{0} with {1}".format(name, kw)
+            assert "old" not in tag, "{0} with {1}".format(name, kw)
+
+
+def test_set_renamed_child():
+    root = nbt.TAG_Compound()
+    root["a"] = nbt.TAG_Int(1)
+    root["b"] = nbt.TAG_Int(2)
+    data = root.save(compressed=False)
+    for name, load in sorted(nbt.loaders.iteritems()):
+        tag = load(buf=data)
+        assert "c" not in tag
+        tag["a"].name = "c"
+        tag["c"] = nbt.TAG_Int(3)
+        assert [(t.name, t.value) for t in tag.value] == [("b", 2), ("c", 3)], name
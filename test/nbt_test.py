@@ -1,8 +1,10 @@
+from copy import deepcopy
 from cStringIO import StringIO
 import os
 from os.path import join
 import time
 import unittest
+import zlib
 import numpy
 from pymclevel import nbt
 from templevel import TempLevel
@@ -171,6 +173,141 @@ class TestNBT():
         else:
             assert False
 
+    def testCompoundIndex(self):
+        tag = nbt.TAG_Compound()
+        tag["a"] = nbt.TAG_Int(1)
+        tag["b"] = nbt.TAG_Int(2)
+        tag["a"] = nbt.TAG_Int(3)
+        assert tag.keys() == ["b", "a"]
+        assert tag["a"].value == 3 and "b" in tag and "c" not in tag
+
+        tag["b"].name = "c"
+        assert tag["c"].value == 2
+        del tag["a"]
+        assert "a" not in tag
+        assert nbt.load(buf=tag.save(compressed=False)).keys() == ["c"]
+
+        nbt.TAG_Compound.ALLOW_DUPLICATE_KEYS = True
+        try:
+            tag["c"] = nbt.TAG_Int(4)
+            assert tag["c"].value == 2
+            assert [t.value for t in tag.get_all("c")] == [2, 4]
+            del tag["c"]
+            assert tag["c"].value == 4
+        finally:
+            nbt.TAG_Compound.ALLOW_DUPLICATE_KEYS = False
+
+    def testLazyLoad(self):
+        d = join("testfiles", "TileTicks_chunks")
+        for f in sorted(os.listdir(d))[:10]:
+            data = nbt.load(join(d, f)).save(compressed=False)
+            lazy = nbt.load(buf=data, lazy=True)
+            assert lazy.save(compressed=False) == data
+
+            level = lazy["Level"]
+            for tick in level["TileTicks"]:
+                tick["t"].value += 0
+            assert lazy.save(compressed=False) == data
+            assert type(level["TileTicks"]) is nbt.TAG_List
+
+        level = nbt.load(buf=data, lazy=True)["Level"]
+        ticks = level["TileTicks"]
+        assert len(ticks) == len(nbt.load(buf=data)["Level"]["TileTicks"])
+        ticks[0]["x"].value += 1
+        entities = level["Entities"]
+        entities.append(nbt.TAG_Compound())
+        level["HeightMap"].value[0] = 99
+
+        tag = nbt.load(buf=level.save(compressed=False), lazy=True)
+        assert tag["TileTicks"][0]["x"].value == ticks[0]["x"].value
+        assert len(tag["Entities"]) == len(entities)
+        assert tag["HeightMap"].value[0] == 99
+
+    def testStreamingSave(self):
+        tag = nbt.load(join("testfiles", "TileTicks.nbt"))
+        data = tag.save(compressed=False)
+        assert nbt.gunzip(tag.save()) == data
+
+        blockSize = nbt.save_ctx.block_size
+        nbt.save_ctx.block_size = 1000
+        try:
+            assert nbt.gunzip(tag.save()) == data
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+            assert zlib.decompress(tag.save(compressor=compressor), -zlib.MAX_WBITS) == data
+        finally:
+            nbt.save_ctx.block_size = blockSize
+
+    def testViews(self):
+        data = nbt.load(join("testfiles", "AnvilChunk.dat")).save(compressed=False)
+        tag = nbt.load(buf=data, views=True)
+        assert tag.save(compressed=False) == data
+
+        section = tag["Level"]["Sections"][0]
+        blocks = section["Blocks"]
+        assert not blocks.view.flags.writeable
+        original = blocks.view
+        blocks.value[0] = 42
+        assert blocks.view.flags.writeable
+        assert blocks.view[0] == 42 and original[0] != 42
+
+        section["Data"].view.shape = (16, 16, 8)
+        saved = nbt.load(buf=tag.save(compressed=False))
+        assert saved["Level"]["Sections"][0]["Blocks"].value[0] == 42
+        assert (saved["Level"]["Sections"][0]["Data"].value == section["Data"].view.ravel()).all()
+
+    def testExtract(self):
+        d = join("testfiles", "TileTicks_chunks")
+        for f in sorted(os.listdir(d))[:10]:
+            data = file(join(d, f), "rb").read()
+            level = nbt.load(buf=data)["Level"]
+            found = nbt.extract(data, ["Level/xPos", "Level/TileTicks/*/i", "Level/TileTicks/0",
+                                       "Level/Entities/*/Pos/1", "Level/Missing", "Level/Data"])
+
+            assert [t.value for t in found["Level/xPos"]] == [level["xPos"].value]
+            assert [t.value for t in found["Level/TileTicks/*/i"]] == [t["i"].value for t in level["TileTicks"]]
+            assert [t.keys() for t in found["Level/TileTicks/0"]] == [level["TileTicks"][0].keys()]
+            assert [t.value for t in found["Level/Entities/*/Pos/1"]] == [e["Pos"][1].value for e in level["Entities"]]
+            assert found["Level/Missing"] == []
+            assert (found["Level/Data"][0].value == level["Data"].value).all()
+
+    def testCopy(self):
+        data = nbt.load(join("testfiles", "AnvilChunk.dat")).save(compressed=False)
+        for kw in {}, {"lazy": True, "views": True}:
+            tag = nbt.load(buf=data, **kw)
+            copied = tag.copy()
+            assert copied.save(compressed=False) == data
+
+            section = copied["Level"]["Sections"][0]
+            section["Blocks"].value[0] += 1
+            section["Y"].value += 1
+            copied["Level"]["Entities"].append(nbt.TAG_Compound())
+            assert tag.save(compressed=False) == data
+            assert deepcopy(tag).save(compressed=False) == data
+
+    def testInterning(self):
+        data = file(join("testfiles", "TileTicks_chunks", "c.-1.6.dat"), "rb").read()
+        first = nbt.load(buf=data)["Level"]["Entities"][0]
+        second = nbt.load(buf=data)["Level"]["Entities"][0]
+        assert [t.name for t in first.value] == [t.name for t in second.value]
+        for a, b in zip(first.value, second.value):
+            assert a.name is b.name
+        assert first["id"].value == u"Sheep" and first["id"].value is second["id"].value
+
+    def testHeaderCacheBounded(self):
+        tag = nbt.TAG_Compound()
+        for i in range(100):
+            tag["name%d" % i] = nbt.TAG_Int(i)
+        tag["x" * (nbt.INTERN_MAX_LENGTH + 1)] = nbt.TAG_Int(0)
+
+        oldCount = nbt.INTERN_MAX_COUNT
+        nbt.INTERN_MAX_COUNT = 10
+        try:
+            data = tag.save(compressed=False)
+            assert len(nbt._tag_headers) <= 10
+        finally:
+            nbt.INTERN_MAX_COUNT = oldCount
+        assert nbt.load(buf=data)["name99"].value == 99
+
     def testSpeed(self):
         d = join("testfiles", "TileTicks_chunks")
         files = [join(d, f) for f in os.listdir(d)]
@@ -1,10 +1,16 @@
+from contextlib import closing
 import itertools
+import numpy
 import os
 import unittest
-from pymclevel import mclevel
+import zipfile
+from pymclevel import mclevel, nbt
 from templevel import TempLevel, mktemp
-from pymclevel.schematic import MCSchematic
+from pymclevel.schematic import (MCSchematic, SchematicChunk, SchematicFileWriter, ZipSchematic,
+                                 readSchematicFile, schematicExtractionMode, schematicRootName)
 from pymclevel.box import BoundingBox
+from pymclevel.regionfile import ZipMemberFile
+from pymclevel.entity import Entity, TileEntity
 
 __author__ = 'Rio'
 
@@ -44,6 +50,23 @@ class TestSchematics(unittest.TestCase):
         schematic.close()
         os.remove(temp)
 
+    def testReplace(self):
+        schematic = MCSchematic(shape=(20, 4, 20))
+        mats = schematic.materials
+        schematic.Blocks[:, :2, :] = mats.Stone.ID
+
+        def blockCounts(chunk):
+            raise AssertionError("A schematic chunk counted its blocks to decide whether to replace them")
+
+        oldBlockCounts = SchematicChunk.blockCounts
+        SchematicChunk.blockCounts = blockCounts
+        try:
+            schematic.fillBlocks(schematic.bounds, mats.Glass, [mats.Stone])
+        finally:
+            SchematicChunk.blockCounts = oldBlockCounts
+        assert (schematic.Blocks[:, :2, :] == mats.Glass.ID).all()
+        assert (schematic.Blocks[:, 2:, :] == mats.Air.ID).all()
+
     def testRotate(self):
         level = self.anvilLevel.level
         schematic = level.extractSchematic(BoundingBox((0, 0, 0), (21, 11, 8)))
@@ -70,10 +93,286 @@ class TestSchematics(unittest.TestCase):
         zs.close()
         os.remove(zs.filename)
 
+    def testZipSchematicRegions(self):
+        level = self.anvilLevel.level
+        filename = mktemp("regions.zip")
+        cx, cz = sorted(level.allChunks)[0]
+        zs = level.extractZipSchematic(BoundingBox((cx << 4, 0, cz << 4), (32, 64, 32)), filename)
+        zs.createChunk(40, 0)
+        zs.saveInPlace()
+        zs.close()
+
+        zs = ZipSchematic(filename)
+        assert not os.listdir(zs.worldFolder.getFolderPath("region"))
+        assert set([(40, 0), (0, 0)]) <= set(zs.allChunks)
+        farChunkData = zs.worldFolder.readChunk(40, 0)
+
+        chunk = zs.getChunk(0, 0)
+        chunk.Blocks[0, 0, 0] = 1
+        chunk.chunkChanged()
+        del chunk
+        zs.saveInPlace()
+        assert zs.worldFolder.modifiedRegions == set()
+        assert zs.worldFolder.readChunk(40, 0) == farChunkData
+        zs.close()
+
+        names = zipfile.ZipFile(filename).namelist()
+        assert len(names) == len(set(names))
+
+        zs = ZipSchematic(filename)
+        assert zs.getChunk(0, 0).Blocks[0, 0, 0] == 1
+        assert zs.worldFolder.readChunk(40, 0) == farChunkData
+        zs.close()
+        os.remove(filename)
+
+    def testZipMemberFile(self):
+        filename = mktemp("members.zip")
+        with closing(zipfile.ZipFile(filename, "w", zipfile.ZIP_STORED)) as zf:
+            zf.writestr("first", "0123456789")
+            zf.writestr("second", "abcdef")
+
+        with closing(zipfile.ZipFile(filename)) as zf:
+            info = zf.getinfo("first")
+        with ZipMemberFile(filename, info) as f:
+            assert f.read() == "0123456789"
+            f.seek(-4, 2)
+            assert f.tell() == 6
+            f.seek(-2, 1)
+            assert f.read(100) == "456789"
+            f.seek(2)
+            assert f.read(3) == "234"
+        os.remove(filename)
+
+    def testZipSchematicCompressed(self):
+        level = self.anvilLevel.level
+        filename = mktemp("compressed.zip")
+        cx, cz = sorted(level.allChunks)[0]
+        zs = level.extractZipSchematic(BoundingBox((cx << 4, 0, cz << 4), (32, 64, 32)), filename)
+        zs.createChunk(40, 0)
+        zs.createChunk(-40, 0)
+        zs.saveInPlace()
+        chunkData = zs.worldFolder.readChunk(0, 0)
+
+        size, uncompressedSize, duration = zs.saveToFile(filename, compressed=True, processes=2)
+        assert zs.compressed
+        assert size < uncompressedSize
+        zs.close()
+
+        with closing(zipfile.ZipFile(filename)) as zf:
+            regions = [info for info in zf.infolist() if info.filename.startswith("region/")]
+            assert [info.filename for info in regions] == ["region/r.-2.0.mca", "region/r.0.0.mca", "region/r.1.0.mca"]
+            assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in regions)
+            assert zf.testzip() is None
+
+        zs = ZipSchematic(filename)
+        assert zs.compressed
+        assert zs.worldFolder.readChunk(0, 0) == chunkData
+        assert set([(40, 0), (-40, 0), (0, 0)]) <= set(zs.allChunks)
+        zs.saveToFile(filename, compressed=False)
+        zs.close()
+
+        with closing(zipfile.ZipFile(filename)) as zf:
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist())
+            assert zf.testzip() is None
+        os.remove(filename)
+
+    def testExtractionMode(self):
+        box = BoundingBox((0, 0, 0), (64, 64, 64))
+        assert schematicExtractionMode(box, memoryBudget=64 * 64 * 64 * 3 + 64 * 64) == "memory"
+        assert schematicExtractionMode(box, memoryBudget=64 * 64 * 64 * 3) == "zip"
+        assert schematicExtractionMode(box, memoryBudget=64 * 64 * 64 * 3, streaming=True) == "stream"
+
+    def testExtractStreamed(self):
+        level = self.anvilLevel.level
+        box = BoundingBox(level.bounds.origin, (40, 70, 36))
+        filename = mktemp("streamed.schematic")
+        schematic = level.extractSchematic(box)
+
+        assert level.extractAnySchematic(box, memoryBudget=40 * 36 * 3 * 20, filename=filename) == filename
+        streamed = MCSchematic(filename=filename)
+        assert streamed.size == schematic.size
+        assert (streamed.Blocks == schematic.Blocks).all()
+        assert (streamed.Data == schematic.Data).all()
+        assert (streamed.Biomes == schematic.Biomes).all()
+        assert len(streamed.Entities) == len(schematic.Entities)
+        assert len(streamed.TileEntities) == len(schematic.TileEntities)
+        os.remove(filename)
+
+        # a box within the budget is saved to the file too
+        assert level.extractAnySchematic(box, filename=filename) == filename
+        saved = MCSchematic(filename=filename)
+        assert (saved.Blocks == schematic.Blocks).all()
+        assert (saved.Data == schematic.Data).all()
+        os.remove(filename)
+
+    def testSchematicFileWriter(self):
+        blocks = numpy.arange(3 * 5 * 7, dtype='uint16').reshape(3, 5, 7) * 5
+        data = (blocks & 0xf).astype('uint8')
+        filename = mktemp("written.schematic")
+        writer = SchematicFileWriter(filename, (7, 3, 5))
+        writer.writeLayers(blocks[:1], data[:1])
+        writer.writeLayers(blocks[1:], data[1:])
+        writer.close()
+
+        schematic = MCSchematic(filename=filename)
+        assert (schematic._Blocks == blocks).all()
+        assert (schematic.root_tag["Data"].value == data).all()
+        os.remove(filename)
+
+    def testStreamedSaveAndLoad(self):
+        schematic = MCSchematic(shape=(7, 3, 5))
+        schematic._Blocks[:] = numpy.arange(3 * 5 * 7).reshape(3, 5, 7) * 5
+        schematic.Data[:] = 3
+        schematic.rotateLeft()
+        filename = mktemp("streamed.schematic")
+        schematic.saveToFile(filename)
+
+        root_tag = schematic.root_tag.copy()
+        root_tag["Blocks"] = nbt.TAG_Byte_Array(schematic._Blocks.astype('uint8'))
+        add = numpy.zeros(3 * 5 * 7 + 1, 'uint8')
+        add[:-1] = (schematic._Blocks >> 8).ravel()
+        root_tag["AddBlocks"] = nbt.TAG_Byte_Array((add[::2] << 4) | add[1::2])
+        assert nbt.gunzip(file(filename, "rb").read()) == root_tag.save(compressed=False)
+
+        loaded = mclevel.fromFile(filename)
+        assert isinstance(loaded, MCSchematic)
+        assert loaded.size == schematic.size
+        assert (loaded.Blocks == schematic.Blocks).all()
+        assert (loaded.Data == schematic.Data).all()
+
+        # the arrays are filled whatever memory allocate returns
+        root_tag, blocks = readSchematicFile(filename, lambda shape, dtype: numpy.full(shape, 0xff, dtype))
+        assert (blocks == schematic._Blocks).all()
+        assert (root_tag["Data"].value == schematic.root_tag["Data"].value).all()
+        os.remove(filename)
+
+        for name in "CreativeInABox.schematic", "Chests/TinkerersBox.inv":
+            path = os.path.join("schematics", name)
+            if schematicRootName(path) != "Schematic":
+                continue
+            streamed = MCSchematic(filename=path)
+            whole = MCSchematic(root_tag=nbt.load(path))
+            assert (streamed.Blocks == whole.Blocks).all()
+            assert (streamed.Data == whole.Data).all()
+            assert len(streamed.Entities) == len(whole.Entities)
+
+    def testMemmap(self):
+        level = self.anvilLevel.level
+        box = BoundingBox(level.bounds.origin, (21, 40, 8))
+        schematic = level.extractSchematic(box)
+        mapped = level.extractSchematic(box, memmap=True)
+        assert isinstance(mapped._Blocks, numpy.memmap)
+        assert (mapped.Blocks == schematic.Blocks).all()
+
+        for s in schematic, mapped:
+            s.rotateLeft()
+            s.flipNorthSouth()
+            s.flipEastWest()
+            s.flipVertical()
+        assert isinstance(mapped._Blocks, numpy.memmap)
+        assert (mapped.Blocks == schematic.Blocks).all()
+        assert (mapped.Data == schematic.Data).all()
+
+        copied = MCSchematic(shape=mapped.size, memmap=True)
+        copied.copyBlocksFrom(mapped, mapped.bounds, (0, 0, 0))
+        assert (copied.getChunk(0, 0).Blocks == schematic.getChunk(0, 0).Blocks).all()
+
+        filename = mktemp("memmap.schematic")
+        copied.saveToFile(filename)
+        loaded = MCSchematic(filename=filename, memmap=True)
+        assert isinstance(loaded._Blocks, numpy.memmap)
+        assert (loaded.Blocks == schematic.Blocks).all()
+        assert (loaded.Data == schematic.Data).all()
+        os.remove(filename)
+
+    def testLazyTransforms(self):
+        level = self.anvilLevel.level
+        schematic = level.extractSchematic(BoundingBox(level.bounds.origin, (21, 11, 8)))
+        blocks = schematic._Blocks.copy()
+        data = schematic.root_tag["Data"].value.copy()
+
+        pig = Entity.Create("Pig")
+        Entity.setpos(pig, (1.5, 2.0, 3.25))
+        pig["Motion"] = nbt.TAG_List([nbt.TAG_Double(m) for m in (0.5, 0.0, -0.25)])
+        pig["Rotation"] = nbt.TAG_List([nbt.TAG_Float(10.0), nbt.TAG_Float(0.0)])
+        painting = Entity.Create("Painting")
+        for name, value in ("TileX", 4), ("TileY", 2), ("TileZ", 1), ("Dir", 3):
+            painting[name] = nbt.TAG_Int(value)
+        chest = TileEntity.Create("Chest")
+        TileEntity.setpos(chest, (1, 2, 3))
+        schematic.root_tag["Entities"] = nbt.TAG_List([pig, painting])
+        schematic.root_tag["TileEntities"] = nbt.TAG_List([chest])
+        assert schematic.getEntitiesInBox(BoundingBox((1, 2, 3), (1, 1, 1))) == [pig]
+        assert schematic.tileEntityAt(1, 2, 3) is chest
+
+        schematic.rotateLeft()
+        assert schematic._pendingTransform is not None and schematic._arraysReoriented
+        assert (schematic.Width, schematic.Length) == (8, 21)
+        assert pig["Pos"][0].value == 1.5  # relocated when the entities are next used
+        assert len(schematic.Entities) == 2 and schematic._pendingTransform is None
+        assert [p.value for p in pig["Pos"]] == [3.25, 2.0, 21 - 1.5]
+        assert [m.value for m in pig["Motion"]] == [-0.25, 0.0, -0.5]
+        assert pig["Rotation"][0].value == -80.0
+        assert (painting["TileX"].value, painting["TileZ"].value, painting["Dir"].value) == (1, 21 - 4 - 1, 0)
+        assert TileEntity.pos(chest) == [3, 2, 21 - 1 - 1]
+        assert schematic.getEntitiesInBox(BoundingBox((1, 2, 3), (1, 1, 1))) == []
+        assert schematic.getEntitiesInBox(BoundingBox((3, 2, 19), (1, 1, 1))) == [pig]
+        assert schematic.tileEntityAt(1, 2, 3) is None
+        assert schematic.tileEntityAt(3, 2, 19) is chest
+
+        schematic.flipNorthSouth()
+        assert schematic.tileEntityAt(3, 2, 19) is None
+        assert schematic.tileEntityAt(8 - 3 - 1, 2, 19) is chest
+        assert painting["TileX"].value == 8 - 1
+        assert TileEntity.pos(chest) == [8 - 3 - 1, 2, 19]
+
+        schematic.flipNorthSouth()
+        for i in range(3):
+            schematic.rotateLeft()
+        assert schematic._arraysReoriented
+        assert (schematic._Blocks == blocks).all()
+        assert (schematic.Data == data.swapaxes(0, 2)).all()
+        assert not schematic._arraysReoriented and schematic._Blocks.flags.c_contiguous
+        schematic.Entities
+        assert [p.value for p in pig["Pos"]] == [1.5, 2.0, 3.25]
+        assert pig["Rotation"][0].value == 10.0 - 90.0 * 4 - 180.0 * 2
+        assert (painting["TileX"].value, painting["TileZ"].value, painting["Dir"].value) == (4, 1, 3)
+        assert TileEntity.pos(chest) == [1, 2, 3]
+
+    def testCopyRotated(self):
+        level = self.anvilLevel.level
+        box = BoundingBox(level.bounds.origin, (21, 11, 8))
+        rotated, applied = level.extractSchematic(box), level.extractSchematic(box)
+        for schematic in rotated, applied:
+            schematic.Blocks[::2, 3, :4] = schematic.materials.Torch.ID
+            schematic.Data[::2, 3, :4] = [1, 2, 3, 4]
+            schematic.Blocks[1::2, 4, :] = schematic.materials.WoodenStairs.ID
+            schematic.Data[1::2, 4, :] = numpy.arange(11) % 4
+            schematic.rotateLeft()
+            schematic.flipEastWest()
+        applied.Blocks
+
+        for mats in "Alpha", "Classic":
+            copies = []
+            for schematic in rotated, applied:
+                copy = MCSchematic(shape=(8, 11, 21), mats=mats)
+                copy.copyBlocksFrom(schematic, schematic.bounds, (0, 0, 0))
+                copies.append(copy)
+            assert rotated._arraysReoriented and rotated._pendingRotation is not None
+            assert (copies[0].Blocks == copies[1].Blocks).all()
+            assert (copies[0].Data == copies[1].Data).all()
+
+        assert (rotated.Blocks == applied.Blocks).all() and (rotated.Data == applied.Data).all()
+
     def testINVEditChests(self):
         invFile = mclevel.fromFile("schematics/Chests/TinkerersBox.inv")
         assert invFile.Blocks.any()
         assert not invFile.Data.any()
         assert len(invFile.Entities) == 0
         assert len(invFile.TileEntities) == 1
+
+        dest = MCSchematic(shape=(3, 3, 3))
+        dest.copyBlocksFrom(invFile, invFile.bounds, (1, 1, 1))
+        assert dest.Blocks[1, 1, 1] == invFile.Blocks[0, 0, 0]
+        assert len(dest.TileEntities) == 1 and TileEntity.pos(dest.TileEntities[0]) == [1, 1, 1]
         # raise SystemExit
@@ -0,0 +1,30 @@
+from pymclevel.infiniteworld import MCInfdevOldLevel
+from pymclevel.schematic import MCSchematic
+from pymclevel.box import BoundingBox
+from timeit import timeit
+import numpy
+
+import templevel
+
+#import logging
+#logging.basicConfig(level=logging.INFO)
+
+def classic_copy():
+    t = templevel.TempLevel("TimeCopy", createFunc=lambda f: MCInfdevOldLevel(f, create=True))
+
+    world = t.level
+    schem = MCSchematic(shape=(512, 64, 512), mats="Classic")
+    schem.Blocks[:] = numpy.random.randint(0, 50, schem.Blocks.shape)
+
+    world.createChunksInBox(schem.bounds)
+    world.copyBlocksFrom(schem, schem.bounds, (0, 0, 0))
+
+    chunkCount = BoundingBox((0, 0, 0), schem.bounds.size).chunkCount
+    t = timeit(lambda: world.copyBlocksFrom(schem, schem.bounds, (0, 0, 0)), number=1)
+    print "Copy classic schematic: %d chunks in %.02f seconds (%.02fms per chunk)" % (chunkCount, t, t / chunkCount * 1000)
+
+    t = timeit(lambda: world.copyBlocksFrom(schem, schem.bounds, (0, 0, 0), blocksToCopy=range(1, 20)), number=1)
+    print "Copy classic schematic, masked: %d chunks in %.02f seconds (%.02fms per chunk)" % (chunkCount, t, t / chunkCount * 1000)
+
+if __name__ == '__main__':
+    classic_copy()
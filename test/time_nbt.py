@@ -20,10 +20,18 @@ def save_file():
     #resaved_test_file = test_file.save(buf=s)
     #resaved_test_file = s.getvalue()
 
+def save_file_compressed():
+    global compressed_test_file
+    compressed_test_file = test_file.save()
+
 print "File: ", path
 print "Load: %0.1f ms" % (timeit(load_file, number=1)*1000)
 print "Save: %0.1f ms" % (timeit(save_file, number=1)*1000)
+print "Save compressed: %0.1f ms" % (timeit(save_file_compressed, number=1)*1000)
 print "Length: ", len(resaved_test_file)
+print "Compressed length: ", len(compressed_test_file)
+
+assert nbt.gunzip(compressed_test_file) == resaved_test_file
 
 assert test_data == resaved_test_file
 __author__ = 'Rio'